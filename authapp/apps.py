@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AuthappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authapp'
+
+    def ready(self):
+        from backend.images import track_renditions
+        from .models import Employee
+
+        track_renditions(Employee, 'profile_pic')
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from backend.images import rendition_url
 from .models import Employee,Company
 
 
@@ -33,8 +35,8 @@ class EmployeeSerializer(serializers.ModelSerializer):
         if obj.profile_pic:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.profile_pic.url)
-            return obj.profile_pic.url
+                return request.build_absolute_uri(rendition_url(obj.profile_pic))
+            return rendition_url(obj.profile_pic)
         return None
     
     def get_app_icon(self, obj):
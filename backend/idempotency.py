@@ -0,0 +1,95 @@
+"""
+Idempotency-Key support for the mutating mobile APIViews.
+
+A client that may retry a request sends a unique Idempotency-Key header
+with it. The first request with a key runs normally, and its response is
+kept in the cache for IDEMPOTENCY_KEY_TTL seconds. Repeats of that key get
+the stored response back (marked Idempotent-Replayed: true) without running
+the handler again.
+
+A repeat that arrives while the first request is still running gets a 409.
+Reusing a key for a different request body gets a 422. Server errors are
+not stored, so they can be retried. Requests without the header behave as
+before.
+
+Entries expire through the cache's own timeouts. With more than one worker
+process the cache must be shared (CACHE_BACKEND=redis) for keys to be seen
+across workers.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Stored entries are tuples to keep them small:
+# (PENDING, fingerprint) while running, (DONE, fingerprint, status, data) after
+PENDING, DONE = 0, 1
+
+
+def _store_key(request, key):
+    scope = f'{request.user.pk}:{request.method}:{request.path}:{key}'
+    return 'idempotency:' + hashlib.md5(scope.encode(), usedforsecurity=False).hexdigest()
+
+
+def _value(value):
+    if isinstance(value, UploadedFile):
+        return ('file', value.name, value.size)
+    return value
+
+
+def request_fingerprint(request):
+    """Hash of the parsed request body; uploads count by name and size"""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = sorted((name, [_value(v) for v in values]) for name, values in data.lists())
+    return hashlib.md5(repr(data).encode(), usedforsecurity=False).hexdigest()
+
+
+def _error(message, status_code):
+    return Response({"error": message}, status=status_code)
+
+
+def idempotent(handler):
+    """Decorate an APIView post/put/patch/delete handler to honour Idempotency-Key"""
+    @wraps(handler)
+    def wrapped(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters", status.HTTP_400_BAD_REQUEST)
+
+        store_key = _store_key(request, key)
+        fingerprint = request_fingerprint(request)
+        if not cache.add(store_key, (PENDING, fingerprint), settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            entry = cache.get(store_key)
+            if entry is not None:
+                if entry[1] != fingerprint:
+                    return _error(f"{IDEMPOTENCY_HEADER} was already used for a different request", status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if entry[0] == PENDING:
+                    return _error("A request with this Idempotency-Key is still in progress", status.HTTP_409_CONFLICT)
+                response = Response(entry[3], status=entry[2])
+                response['Idempotent-Replayed'] = 'true'
+                return response
+            # The entry expired between add() and get(); run the request as new
+            cache.set(store_key, (PENDING, fingerprint), settings.IDEMPOTENCY_LOCK_TIMEOUT)
+
+        try:
+            response = handler(view, request, *args, **kwargs)
+        except Exception:
+            cache.delete(store_key)
+            raise
+
+        if response.status_code >= 500 or not hasattr(response, 'data'):
+            cache.delete(store_key)
+        else:
+            cache.set(store_key, (DONE, fingerprint, response.status_code, response.data), settings.IDEMPOTENCY_KEY_TTL)
+        return response
+    return wrapped
@@ -0,0 +1,160 @@
+"""
+Downsized renditions of uploaded photos.
+
+Phone uploads are kept as they arrive, and next to each original a few
+smaller copies are written at the sizes in IMAGE_RENDITIONS, with a name
+derived from the original's:
+
+    task_progress_images/IMG_0042.jpg
+    task_progress_images/IMG_0042.jpg.thumb.webp
+    task_progress_images/IMG_0042.jpg.medium.webp
+
+The original's extension stays in the name, so IMG_0042.jpg and
+IMG_0042.png uploaded to one directory keep their own renditions.
+
+Renditions are rotated upright from the EXIF orientation and saved without
+EXIF, so the camera's metadata (GPS position included) never reaches them.
+They are WebP, or JPEG when Pillow was built without WebP support.
+
+track_renditions() hooks a model's image fields so each new upload queues
+a job (jobs.queue) that writes its renditions, keeping the resizing out of
+the request. Because the names are derived, rendition_url() needs no
+database lookup, only a check that the rendition is stored: until a worker
+has written it, and for files Pillow can't read, the URL is the original's.
+Run `manage.py generate_image_renditions` for files uploaded before a
+field was tracked.
+"""
+import logging
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save, pre_save
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from jobs.queue import enqueue, job
+from .storage import ContentAddressedStorage
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = settings.IMAGE_RENDITIONS
+RENDITION_QUALITY = settings.IMAGE_RENDITION_QUALITY
+
+if features.check('webp'):
+    RENDITION_FORMAT, RENDITION_EXTENSION = 'WEBP', 'webp'
+else:
+    RENDITION_FORMAT, RENDITION_EXTENSION = 'JPEG', 'jpg'
+
+# {model: (field name, ...)} for every model hooked by track_renditions()
+TRACKED_FIELDS = {}
+
+
+def rendition_name(name, size):
+    """Storage name of the size rendition of the file stored under name"""
+    return f'{name}.{size}.{RENDITION_EXTENSION}'
+
+
+def stored_rendition_name(field_file, size):
+    """Name of the size rendition of an image field's file, or the file's own name while the rendition isn't stored"""
+    name = rendition_name(field_file.name, size)
+    return name if field_file.storage.exists(name) else field_file.name
+
+
+def rendition_url(field_file, size='thumb'):
+    """URL of a rendition of an image field's file (or of the file, see above), None when the field is empty"""
+    if not field_file:
+        return None
+    return field_file.storage.url(stored_rendition_name(field_file, size))
+
+
+def _encode(image):
+    if RENDITION_FORMAT == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+    buffer = BytesIO()
+    # No exif= argument, so none of the original's metadata is written
+    image.save(buffer, RENDITION_FORMAT, quality=RENDITION_QUALITY)
+    return buffer.getvalue()
+
+
+def generate_renditions(field_file):
+    """
+    Write every rendition of an image field's file to its storage,
+    replacing existing ones. Returns the names written; an empty list when
+    the file is missing or isn't an image Pillow can read.
+    """
+    if not field_file:
+        return []
+    storage = field_file.storage
+    largest = max(RENDITIONS.values())
+    try:
+        with storage.open(field_file.name, 'rb') as source:
+            image = Image.open(source)
+            # Let the JPEG decoder downscale while reading a 12MP photo
+            image.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning("Cannot make renditions of %s: %s", field_file.name, exc)
+        return []
+
+    written = []
+    # Each size is scaled down from the one before, not from the original
+    for size, edge in sorted(RENDITIONS.items(), key=lambda item: -item[1]):
+        image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        written.append(_write(storage, rendition_name(field_file.name, size), _encode(image)))
+    return written
+
+
+def _write(storage, name, data):
+    """Store data under exactly name, replacing any file there"""
+    if isinstance(storage, ContentAddressedStorage):
+        # Its save() would file the rendition under its own hash
+        return storage.save_as(name, ContentFile(data))
+    storage.delete(name)
+    return storage.save(name, ContentFile(data))
+
+
+def has_renditions(field_file):
+    """Whether every rendition of an image field's file is already stored"""
+    storage = field_file.storage
+    return all(storage.exists(rendition_name(field_file.name, size)) for size in RENDITIONS)
+
+
+@job('images.renditions')
+def make_renditions(model, pk, field):
+    instance = apps.get_model(model)._default_manager.filter(pk=pk).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field)
+    # A content-addressed upload seen before already has its renditions
+    if field_file and isinstance(field_file.storage, ContentAddressedStorage) and has_renditions(field_file):
+        return
+    generate_renditions(field_file)
+
+
+def _new_uploads(sender, instance, **kwargs):
+    # Before the fields' pre_save, a file still to be written is uncommitted
+    instance._rendition_fields = [
+        name for name in TRACKED_FIELDS[sender]
+        if getattr(instance, name) and not getattr(instance, name)._committed
+    ]
+
+
+def _queue_renditions(sender, instance, **kwargs):
+    names = getattr(instance, '_rendition_fields', None)
+    if not names:
+        return
+    instance._rendition_fields = []
+    for name in names:
+        enqueue('images.renditions', {'model': sender._meta.label, 'pk': instance.pk, 'field': name})
+
+
+def track_renditions(model, *field_names):
+    """Queue renditions of new uploads to these image fields of model. Call from AppConfig.ready()."""
+    TRACKED_FIELDS[model] = field_names
+    uid = f'renditions:{model._meta.label}'
+    pre_save.connect(_new_uploads, sender=model, dispatch_uid=uid)
+    post_save.connect(_queue_renditions, sender=model, dispatch_uid=uid)
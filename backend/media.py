@@ -0,0 +1,226 @@
+"""
+Media files served behind a login.
+
+Every MEDIA_URL path is answered by MediaView, which needs a signed-in
+user (a JWT from the apps, or a dashboard session). Personal documents are
+only given to the employee they belong to and to admins:
+
+    employee_documents/      visa, passport, Emirates ID ... copies
+    leave_attachments/       leave application attachments
+    signature_attachments/   leave application signatures
+
+Whose file it is comes from one query on an index over the file column and
+the owner; admins need no query at all. Any signed-in user may fetch the
+rest of the media (profile pictures, task and vehicle photos, logos), as
+the apps show them across employees. A file someone may not see is a 404,
+the same as a missing one. Responses are marked private, so shared caches
+and CDNs never keep a copy.
+
+The bytes themselves are sent by the web server when it can. With
+MEDIA_ACCEL_REDIRECT set, the view answers with an X-Accel-Redirect to that
+internal location, and nginx sends the file, handling Range and conditional
+requests itself:
+
+    location /media/ {
+        proxy_pass http://backend;
+    }
+    location /protected-media/ {
+        internal;
+        alias /srv/weinber/media/;
+    }
+
+Without it the file goes out in a FileResponse, which WSGI servers with
+wsgi.file_wrapper (gunicorn) pass to sendfile(). The view then answers
+If-None-Match / If-Modified-Since with 304s and a single Range (with
+If-Range) with a 206, so interrupted downloads of large scans resume.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+# {directory: (model, file field, lookup from the model to the owning employee)}
+OWNED_MEDIA = {
+    'employee_documents/': ('profileapp.Document', 'document_file', 'visa_details__employee'),
+    'leave_attachments/': ('home.Leave', 'attachment', 'employee'),
+    'signature_attachments/': ('home.Leave', 'signature', 'employee'),
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRange:
+    """
+    An open file read from its current position for length bytes at most.
+    It keeps fileno(), so a server's sendfile() still sends it directly,
+    bounded by the Content-Length.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _clean_name(name):
+    """The storage name a media URL path asks for; 404 unless it is already in canonical form"""
+    if posixpath.normpath(name) != name or name.startswith(('/', '.')) or '/.' in name:
+        raise Http404
+    return name
+
+
+def may_read(user, name):
+    """Whether user may fetch the media file called name"""
+    for directory, (label, field, owner) in OWNED_MEDIA.items():
+        if name.startswith(directory):
+            if user.is_staff or user.is_superuser or user.role in ['super_admin', 'admin']:
+                return True
+            model = apps.get_model(label)
+            return model.objects.filter(**{field: name, owner: user}).exists()
+    return True
+
+
+def byte_range(header, size):
+    """
+    The (first, last) byte positions asked for by a Range header, or None
+    when the whole file should be sent: no header, one the view can't parse,
+    or several ranges. Raises RangeNotSatisfiable when it asks for bytes
+    past the end.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # A suffix: the final last bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+def _if_range_passes(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Only a strong ETag can validate a range
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _accel_response(name):
+    response = HttpResponse(content_type=mimetypes.guess_type(name)[0] or 'application/octet-stream')
+    response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/' + quote(name)
+    return response
+
+
+def _file_response(request, name):
+    try:
+        path = default_storage.path(name)
+        file = open(path, 'rb')
+    except (SuspiciousFileOperation, FileNotFoundError, IsADirectoryError):
+        raise Http404
+    try:
+        file_stat = os.fstat(file.fileno())
+        if not stat.S_ISREG(file_stat.st_mode):
+            raise Http404
+        size = file_stat.st_size
+        last_modified = int(file_stat.st_mtime)
+        etag = quote_etag(f'{file_stat.st_mtime_ns:x}-{size:x}')
+
+        validators = HttpResponse()
+        validators['ETag'] = etag
+        validators['Last-Modified'] = http_date(last_modified)
+        conditional = get_conditional_response(request, etag=etag, last_modified=last_modified, response=validators)
+        if conditional is not validators:
+            file.close()
+            return conditional
+
+        requested = None
+        if request.method == 'GET' and _if_range_passes(request, etag, last_modified):
+            try:
+                requested = byte_range(request.headers.get('Range', ''), size)
+            except RangeNotSatisfiable:
+                file.close()
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+    except BaseException:
+        file.close()
+        raise
+
+    if requested is None:
+        response = FileResponse(file)
+    else:
+        first, last = requested
+        file.seek(first)
+        response = FileResponse(FileRange(file, last - first + 1), status=206)
+        response['Content-Length'] = last - first + 1
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+    response.block_size = STREAM_BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    for header in ('ETag', 'Last-Modified'):
+        response[header] = validators[header]
+    return response
+
+
+class MediaView(APIView):
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # Image and PDF requests rarely accept JSON; errors are rendered regardless
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, name):
+        name = _clean_name(name)
+        if not may_read(request.user, name):
+            raise Http404
+        if settings.MEDIA_ACCEL_REDIRECT:
+            response = _accel_response(name)
+        else:
+            response = _file_response(request, name)
+        # Only the signed-in client may keep a copy; nginx passes both headers
+        # on from an X-Accel-Redirect response
+        patch_cache_control(response, private=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+        patch_vary_headers(response, ['Authorization', 'Cookie'])
+        return response
@@ -47,6 +47,8 @@ INSTALLED_APPS = [
     'home',
     'dashboard',
     'office',
+    'jobs',
+    'uploads',
 ]
 
 from datetime import timedelta
@@ -57,6 +59,10 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Default and maximum page sizes for the cursor-paginated mobile lists
+MOBILE_PAGE_SIZE = config('MOBILE_PAGE_SIZE', default=20, cast=int)
+MOBILE_MAX_PAGE_SIZE = 100
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -117,6 +123,31 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# locmem is per process; use the file or redis backend when running
+# several workers so cache invalidations reach all of them.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[config('CACHE_BACKEND', default='locmem')],
+        'LOCATION': config('CACHE_LOCATION', default='weinber-default'),
+    }
+}
+
+HOME_PAYLOAD_CACHE_TIMEOUT = config('HOME_PAYLOAD_CACHE_TIMEOUT', default=300, cast=int)
+ANNOUNCEMENT_CACHE_TIMEOUT = config('ANNOUNCEMENT_CACHE_TIMEOUT', default=600, cast=int)
+
+# How long responses are kept for replay under their Idempotency-Key, and how
+# long a key stays locked while its first request is still running
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = 60
 
 
 # Password validation
@@ -177,3 +208,57 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Media is served by backend.media.MediaView after an access check. Behind
+# nginx, set this to an internal location aliased to MEDIA_ROOT (e.g.
+# /protected-media/) and nginx sends the files; otherwise Django streams them.
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default='')
+# Seconds a client may reuse a media file before revalidating it
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=86400, cast=int)
+
+# Uploads are stored once per distinct content, named by its hash
+STORAGES = {
+    'default': {
+        'BACKEND': 'backend.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+
+# Read dates/times from the typed shadow columns instead of the legacy
+# string columns. Enable once `manage.py backfill_temporal_columns` has run.
+TEMPORAL_CUTOVER = config('TEMPORAL_CUTOVER', default=False, cast=bool)
+
+# Length of a standard working day; timesheet time past it counts as overtime
+TIMESHEET_DAY_HOURS = config('TIMESHEET_DAY_HOURS', default=8, cast=float)
+
+# Days of leave granted per category each year. Individual employees'
+# entitlements are edited on their LeaveBalance rows.
+LEAVE_ENTITLEMENTS = {
+    'annual': 30,
+}
+
+# Renditions written next to uploaded photos (see backend/images.py): the
+# longest edge in pixels of each size, and the encoder quality
+IMAGE_RENDITIONS = {
+    'thumb': 320,
+    'medium': 1280,
+}
+IMAGE_RENDITION_QUALITY = config('IMAGE_RENDITION_QUALITY', default=80, cast=int)
+
+# Background jobs (jobs.queue), run by `manage.py runworker`. JOBS_EAGER
+# runs them in-process after commit instead, for development without a worker.
+JOBS_EAGER = config('JOBS_EAGER', default=False, cast=bool)
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 30
+JOB_RETRY_MAX_DELAY = 3600
+# Seconds before a running job is taken to belong to a dead worker
+JOB_LOCK_TIMEOUT = config('JOB_LOCK_TIMEOUT', default=600, cast=int)
+
+# Resumable uploads (uploads.views). Part files are kept outside MEDIA_ROOT
+# but should be on the same filesystem, so completing an upload is a rename.
+UPLOAD_SESSION_ROOT = config('UPLOAD_SESSION_ROOT', default=os.path.join(BASE_DIR, 'upload_sessions'))
+UPLOAD_SESSION_MAX_SIZE = config('UPLOAD_SESSION_MAX_SIZE', default=100 * 1024 * 1024, cast=int)
+# Seconds an upload session is kept after it is created
+UPLOAD_SESSION_TTL = config('UPLOAD_SESSION_TTL', default=86400, cast=int)
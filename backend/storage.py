@@ -0,0 +1,141 @@
+"""
+Content-addressed media storage.
+
+Uploads are stored under the hash of their bytes instead of the name they
+arrived with, inside their field's upload_to directory:
+
+    employee_documents/3f/3f9a...c41e.pdf
+
+An upload is hashed as it is written to a temporary file beside the
+stored ones, in a single pass, then renamed to its digest. When content
+with that digest is already stored the temporary file is dropped and the
+existing name returned, so a retried progress photo or a visa document
+uploaded again shares one file with the first copy. Files and image fields work
+unchanged on top of it; only the names they record differ. Files saved
+before the switch keep their old names.
+
+The digest is a 160-bit BLAKE2b, which keeps names well inside the
+FileField default max_length of 100. The extension is kept, lower-cased,
+so the web server can still pick the content type from the name.
+
+Rows may share a file, so deleting a stored file removes it for every row
+that references it.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.utils.deconstruct import deconstructible
+
+DIGEST_SIZE = 20
+
+
+def _as_bytes(chunk):
+    return chunk.encode() if isinstance(chunk, str) else chunk
+
+
+@deconstructible(path='backend.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+
+    def digest(self, content):
+        """Hex digest of a file's content, read in chunks"""
+        hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        for chunk in content.chunks():
+            hasher.update(_as_bytes(chunk))
+        return hasher.hexdigest()
+
+    def blob_name(self, name, digest):
+        """Where content with this digest, uploaded as name, is stored"""
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+
+        if hasattr(content, 'temporary_file_path'):
+            # Already on disk: hashed where it is and moved, never copied
+            blob = self._checked_blob_name(name, self.digest(content), max_length)
+            if not self.exists(blob):
+                self._write(blob, content)
+            return blob
+
+        directory = self.path(posixpath.dirname(name))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    chunk = _as_bytes(chunk)
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+            blob = self._checked_blob_name(name, hasher.hexdigest(), max_length)
+            if self.exists(blob):
+                os.remove(temp_path)
+            else:
+                full_path = self.path(blob)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(temp_path, full_path)
+                self._set_permissions(full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return blob
+
+    def _checked_blob_name(self, name, digest, max_length):
+        blob = self.blob_name(name, digest)
+        validate_file_name(blob, allow_relative_path=True)
+        if max_length and len(blob) > max_length:
+            raise SuspiciousFileOperation(f"Storage name '{blob}' is longer than {max_length} characters")
+        return blob
+
+    def save_as(self, name, content):
+        """
+        Write content under exactly name, replacing any file there. For files
+        derived from a stored one (image renditions), whose names are already
+        unique to its content.
+        """
+        validate_file_name(name, allow_relative_path=True)
+        self._write(name, content if hasattr(content, 'chunks') else File(content, name))
+        return name
+
+    def _write(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Written beside its final path and renamed into place, so readers
+        # never see part of a file and concurrent saves of the same content
+        # both end with the complete file
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), full_path, allow_overwrite=True)
+        else:
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+            try:
+                with os.fdopen(fd, 'wb') as temp_file:
+                    for chunk in content.chunks():
+                        temp_file.write(_as_bytes(chunk))
+                os.replace(temp_path, full_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        self._set_permissions(full_path)
+
+    def _set_permissions(self, full_path):
+        # mkstemp creates files readable only by their owner
+        mode = self.file_permissions_mode
+        os.chmod(full_path, mode if mode is not None else 0o644)
+        self._ensure_location_group_id(full_path)
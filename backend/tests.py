@@ -0,0 +1,287 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from authapp.models import Employee
+from home.models import Leave
+from profileapp.models import Document, VisaDetails
+from .idempotency import idempotent
+from .media import RangeNotSatisfiable, _clean_name, byte_range, may_read
+from .storage import ContentAddressedStorage
+
+
+class ByteRangeTests(SimpleTestCase):
+
+    def test_bounded(self):
+        self.assertEqual(byte_range('bytes=100-199', 1000), (100, 199))
+
+    def test_bounded_past_the_end_is_clamped(self):
+        self.assertEqual(byte_range('bytes=900-5000', 1000), (900, 999))
+
+    def test_open_ended(self):
+        self.assertEqual(byte_range('bytes=990-', 1000), (990, 999))
+
+    def test_suffix(self):
+        self.assertEqual(byte_range('bytes=-10', 1000), (990, 999))
+        self.assertEqual(byte_range('bytes=-5000', 1000), (0, 999))
+
+    def test_whole_file_when_not_understood(self):
+        for header in ['', 'bytes=-', 'bytes=5-1', 'bytes=0-1,5-6', 'items=0-9', 'bytes=a-b']:
+            with self.subTest(header=header):
+                self.assertIsNone(byte_range(header, 1000))
+
+    def test_not_satisfiable(self):
+        for header, size in [('bytes=1000-', 1000), ('bytes=1000-1001', 1000), ('bytes=-0', 1000), ('bytes=-10', 0)]:
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(RangeNotSatisfiable):
+                    byte_range(header, size)
+
+
+class CleanNameTests(SimpleTestCase):
+
+    def test_canonical_names_pass(self):
+        for name in ['employee_documents/3f/3f9a.pdf', 'company_logos/logo.png']:
+            with self.subTest(name=name):
+                self.assertEqual(_clean_name(name), name)
+
+    def test_other_names_are_not_found(self):
+        for name in [
+            'employee_profile_pics/../employee_documents/3f/3f9a.pdf',
+            '../settings.py',
+            'employee_documents//3f9a.pdf',
+            'employee_documents/./3f9a.pdf',
+            '/etc/passwd',
+            'employee_documents/3f/.upload-x1y2',
+            '.hidden',
+        ]:
+            with self.subTest(name=name):
+                with self.assertRaises(Http404):
+                    _clean_name(name)
+
+
+class MediaTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # In place before setUpTestData saves the files
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root, MEDIA_ACCEL_REDIRECT='')
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = Employee.objects.create(employeeId='MEDIA1', email='media1@example.com')
+        cls.other = Employee.objects.create(employeeId='MEDIA2', email='media2@example.com')
+        cls.admin = Employee.objects.create(employeeId='MEDIA3', email='media3@example.com', role='admin')
+        visa_details = VisaDetails.objects.create(employee=cls.owner)
+        cls.document = Document.objects.create(
+            visa_details=visa_details,
+            document_type='passport_copy',
+            document_file=ContentFile(bytes(range(256)) * 4, name='passport.pdf'),
+        )
+        cls.leave = Leave.objects.create(
+            employee=cls.owner,
+            category='annual',
+            total_days=1,
+            attachment=ContentFile(b'attachment', name='note.png'),
+        )
+
+
+class MayReadTests(MediaTestCase):
+
+    def test_owner_may_read_their_files(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(may_read(self.owner, self.document.document_file.name))
+        self.assertTrue(may_read(self.owner, self.leave.attachment.name))
+
+    def test_other_employee_may_not(self):
+        self.assertFalse(may_read(self.other, self.document.document_file.name))
+        self.assertFalse(may_read(self.other, self.leave.attachment.name))
+
+    def test_admin_may_read_without_a_query(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(may_read(self.admin, self.document.document_file.name))
+
+    def test_shared_media_is_open_to_everyone_signed_in(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(may_read(self.other, 'task_progress_images/ab/ab12.jpg'))
+
+
+class MediaViewTests(MediaTestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.url = self.document.document_file.url
+
+    def assertPrivate(self, response):
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Authorization', response['Vary'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_signed_out(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_other_employee_gets_not_found(self):
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_file_response(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(256)) * 4)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertPrivate(response)
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertPrivate(not_modified)
+
+    def test_range(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+        b''.join(stale.streaming_content)
+
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=2000-').status_code, 416)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.document.document_file.name)
+        self.assertPrivate(response)
+
+
+class CountingView(APIView):
+    calls = 0
+
+    @idempotent
+    def post(self, request):
+        CountingView.calls += 1
+        if request.data.get('fail'):
+            return Response({"error": "boom"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({"call": CountingView.calls}, status=status.HTTP_201_CREATED)
+
+
+class IdempotencyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(employeeId='IDEM1', email='idem1@example.com')
+
+    def setUp(self):
+        cache.clear()
+        CountingView.calls = 0
+        self.factory = APIRequestFactory()
+
+    def post(self, data, key=None, employee=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        request = self.factory.post('/counting/', data, format='json', **headers)
+        force_authenticate(request, employee or self.employee)
+        return CountingView.as_view()(request)
+
+    def test_replay_returns_the_stored_response(self):
+        first = self.post({'a': 1}, key='k1')
+        replay = self.post({'a': 1}, key='k1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.data, {"call": 1})
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_same_key_with_a_different_body_is_rejected(self):
+        self.post({'a': 1}, key='k1')
+        response = self.post({'a': 2}, key='k1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_keys_are_per_user(self):
+        other = Employee.objects.create(employeeId='IDEM2', email='idem2@example.com')
+        self.post({'a': 1}, key='k1')
+        self.assertEqual(self.post({'a': 1}, key='k1', employee=other).data, {"call": 2})
+
+    def test_server_errors_are_not_stored(self):
+        self.post({'fail': True}, key='k1')
+        self.post({'fail': True}, key='k1')
+        self.assertEqual(CountingView.calls, 2)
+
+    def test_requests_without_a_key_always_run(self):
+        self.post({'a': 1})
+        self.post({'a': 1})
+        self.assertEqual(CountingView.calls, 2)
+
+
+class CountingContent(ContentFile):
+    reads = 0
+
+    def chunks(self, chunk_size=None):
+        CountingContent.reads += 1
+        return super().chunks(chunk_size)
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.location)
+        CountingContent.reads = 0
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, filename), self.location)
+            for root, _, filenames in os.walk(self.location)
+            for filename in filenames
+        )
+
+    def test_named_by_content_in_one_read(self):
+        name = self.storage.save('employee_documents/Scan.PDF', CountingContent(b'scan'))
+        self.assertRegex(name, r'^employee_documents/([0-9a-f]{2})/\1[0-9a-f]{38}\.pdf$')
+        self.assertEqual(CountingContent.reads, 1)
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'scan')
+
+    def test_same_content_is_stored_once(self):
+        first = self.storage.save('employee_documents/a.pdf', ContentFile(b'scan'))
+        second = self.storage.save('employee_documents/b.pdf', ContentFile(b'scan'))
+        self.assertEqual(first, second)
+        # No temporary file is left behind by the second save
+        self.assertEqual(self.stored_files(), [first])
+
+    def test_other_content_gets_another_name(self):
+        first = self.storage.save('employee_documents/a.pdf', ContentFile(b'scan'))
+        second = self.storage.save('employee_documents/a.pdf', ContentFile(b'other scan'))
+        self.assertNotEqual(first, second)
+
+    def test_failed_write_leaves_nothing(self):
+        class Broken(ContentFile):
+            def chunks(self, chunk_size=None):
+                yield b'part'
+                raise OSError("connection reset")
+
+        with self.assertRaises(OSError):
+            self.storage.save('employee_documents/a.pdf', Broken(b''))
+        self.assertEqual(self.stored_files(), [])
@@ -17,7 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include
 from django.conf import settings
-from django.conf.urls.static import static
+from backend.media import MediaView
+from home.views import SyncAPIView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,8 +28,9 @@ urlpatterns = [
     path('api/profile/', include('profileapp.urls')),
     path('api/task/', include('task.urls')),
     path('api/office/', include('office.urls')),
+    path('api/uploads/', include('uploads.urls')),
+    path('api/sync/', SyncAPIView.as_view(), name='sync'),
+    # Uploaded files, after an access check (backend/media.py)
+    path(settings.MEDIA_URL.lstrip('/') + '<path:name>', MediaView.as_view(), name='media'),
 
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
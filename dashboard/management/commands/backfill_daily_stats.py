@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authapp.models import Employee
+from dashboard.rollups import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyStats rollup table over a date range"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument('--end', help="Last day to rebuild (YYYY-MM-DD), defaults to today")
+        parser.add_argument('--employee', help="Only rebuild rows for this employeeId")
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=31,
+            help="Number of days rebuilt per transaction"
+        )
+
+    def handle(self, *args, **options):
+        start = self._parse_date(options['start'])
+        end = self._parse_date(options['end']) if options['end'] else date.today()
+        if end < start:
+            raise CommandError("--end must not be before --start")
+        if options['chunk_days'] < 1:
+            raise CommandError("--chunk-days must be at least 1")
+
+        employee_ids = None
+        if options['employee']:
+            try:
+                employee_ids = [Employee.objects.get(employeeId=options['employee']).id]
+            except Employee.DoesNotExist:
+                raise CommandError(f"Employee {options['employee']} not found")
+
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), end)
+            rebuild_daily_stats(chunk_start, chunk_end, employee_ids=employee_ids)
+            self.stdout.write(f"Rebuilt {chunk_start} to {chunk_end}")
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS("Daily stats backfill complete"))
+
+    def _parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
@@ -0,0 +1,117 @@
+import re
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from authapp.models import Employee
+from home.models import AttendanceCheck, BreakTimer, Leave
+from task.models import Task
+
+
+SEQ_SCAN_RE = re.compile(r'Seq Scan on (\w+)')
+INDEX_SCAN_RE = re.compile(r'(?:Index Scan|Index Only Scan|Bitmap Index Scan) (?:Backward )?(?:using|on) (\w+)')
+
+
+def hot_queries(employee_id, today):
+    """The employee/date lookups made on every mobile request, as (label, expected index, queryset)"""
+    day = today.isoformat()
+    return [
+        ('check-in guard', 'attendance_emp_date_type_uniq', AttendanceCheck.objects.filter(
+            employee_id=employee_id, check_date=day, check_type='in'
+        )),
+        ('today checks', 'attendance_emp_date_type_uniq', AttendanceCheck.objects.filter(
+            employee_id=employee_id, check_date=day
+        ).order_by('-created_at')),
+        ('open break', 'break_open_emp_date_uniq', BreakTimer.objects.filter(
+            employee_id=employee_id, break_end_time__isnull=True
+        )),
+        ('open break today', 'break_open_emp_date_uniq', BreakTimer.objects.filter(
+            employee_id=employee_id, date=day, break_end_time__isnull=True
+        )),
+        ('today breaks', 'break_emp_date_idx', BreakTimer.objects.filter(employee_id=employee_id, date=day)),
+        ('today tasks', 'task_emp_assign_time_idx', Task.objects.filter(
+            employee_id=employee_id, task_assign_time__date=today
+        )),
+        ('pending tasks', 'task_emp_status_idx', Task.objects.filter(
+            employee_id=employee_id,
+            status__in=['not_started', 'paused', 'in_progress', 'on_hold'],
+        ).order_by('task_assign_time')),
+        ('annual leave taken', 'leave_emp_status_cat_idx', Leave.objects.filter(
+            employee_id=employee_id, status='approved', category='annual'
+        )),
+        ('pending leave queue', 'leave_pending_created_idx', Leave.objects.filter(
+            status='pending'
+        ).order_by('-created_at')[:5]),
+    ]
+
+
+def existing_indexes():
+    """Names of the indexes on the tables the hot queries read"""
+    tables = [model._meta.db_table for model in (AttendanceCheck, BreakTimer, Leave, Task)]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = ANY(%s)", [tables])
+        return {row[0] for row in cursor.fetchall()}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN over the hot employee/date queries and check that each plan uses the "
+        "index built for it. Reports indexes that are missing, plans that use another index "
+        "(such as the single-column employee_id foreign key index) and sequential scans. "
+        "Sequential scans are disabled for the planner while the plans are made. Plans follow "
+        "table statistics, so run it against a database of production size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employee', help="employeeId to plan the queries for, defaults to the first employee")
+        parser.add_argument('--analyze', action='store_true', help="Use EXPLAIN ANALYZE (executes the queries)")
+        parser.add_argument(
+            '--check', '--fail-on-seqscan',
+            dest='check',
+            action='store_true',
+            help="Exit with an error if any query does not use its expected index"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("explain_hot_queries requires PostgreSQL")
+
+        if options['employee']:
+            try:
+                employee_id = Employee.objects.get(employeeId=options['employee']).id
+            except Employee.DoesNotExist:
+                raise CommandError(f"Employee {options['employee']} not found")
+        else:
+            employee_id = Employee.objects.order_by('id').values_list('id', flat=True).first() or 0
+
+        indexes = existing_indexes()
+        flagged = []
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for label, expected, queryset in hot_queries(employee_id, date.today()):
+                plan = queryset.explain(analyze=options['analyze'])
+                used = INDEX_SCAN_RE.findall(plan)
+                seq_scans = sorted(set(SEQ_SCAN_RE.findall(plan)))
+                if expected not in indexes:
+                    flagged.append(label)
+                    self.stdout.write(self.style.ERROR(f"MISSING   {label}: index {expected} does not exist"))
+                elif expected in used:
+                    self.stdout.write(f"ok        {label}: {expected}")
+                elif seq_scans:
+                    flagged.append(label)
+                    self.stdout.write(self.style.WARNING(f"SEQ SCAN  {label}: {', '.join(seq_scans)}"))
+                else:
+                    flagged.append(label)
+                    self.stdout.write(self.style.WARNING(
+                        f"OTHER     {label}: uses {', '.join(sorted(set(used))) or 'no index'} instead of {expected}"
+                    ))
+                if options['verbosity'] > 1:
+                    self.stdout.write(plan + "\n")
+
+        if flagged and options['check']:
+            raise CommandError(f"Not using their expected index: {', '.join(flagged)}")
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS("All hot queries use their expected index"))
@@ -0,0 +1,193 @@
+from datetime import date, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from authapp.models import Employee
+from home.models import AttendanceCheck, BreakTimer, Leave
+from home.utils import parse_date
+from task.models import Task
+from .models import DailyStats
+
+
+class DashboardMetrics:
+    """
+    Computes every KPI shown on the admin dashboard with a fixed number
+    of conditional-aggregation queries, independent of headcount or history.
+    """
+
+    def __init__(self, today=None):
+        self.today = today or date.today()
+        self.start_of_week = self.today - timedelta(days=self.today.weekday())
+        self.week_days = [self.start_of_week + timedelta(days=i) for i in range(7)]
+
+    def employee_stats(self):
+        """Active/inactive employee counts in one query"""
+        counts = Employee.objects.filter(is_superuser=False).aggregate(
+            active=Count('id', filter=Q(is_active=True, role='employee')),
+            inactive=Count('id', filter=Q(is_active=False)),
+        )
+        return {
+            'total_employees': counts['active'],
+            'active_employees': counts['active'],
+            'inactive_employees': counts['inactive'],
+        }
+
+    def attendance_stats(self):
+        """Today's check counts and the weekly attendance series in one grouped query"""
+        date_field = AttendanceCheck.date_field()
+        rows = AttendanceCheck.objects.on_dates(self.week_days).filter(
+            employee__is_superuser=False,
+            employee__role='employee',
+        ).values(date_field).annotate(
+            present=Count('employee_id', filter=Q(check_type='in'), distinct=True),
+            present_active=Count(
+                'employee_id',
+                filter=Q(check_type='in', employee__is_active=True),
+                distinct=True,
+            ),
+            check_ins=Count('id', filter=Q(check_type='in')),
+            check_outs=Count('id', filter=Q(check_type='out')),
+        ).order_by()
+
+        # Keyed by date, whichever column the rows were grouped on
+        by_date = {parse_date(row[date_field]): row for row in rows}
+        today_row = by_date.get(self.today, {})
+
+        week_attendance = {}
+        for day in self.week_days:
+            week_attendance[day.strftime('%a')] = by_date.get(day, {}).get('present', 0)
+
+        return {
+            'check_in_count': today_row.get('check_ins', 0),
+            'check_out_count': today_row.get('check_outs', 0),
+            'employees_present': today_row.get('present_active', 0),
+            'week_attendance': week_attendance,
+        }
+
+    def leave_stats(self):
+        """
+        Pending count plus month/active/trend figures for approved leaves,
+        read from the company rows of the DailyStats rollup.
+        """
+        pending_leaves = Leave.objects.filter(status='pending').count()
+
+        month_starts = []
+        year, month = self.today.year, self.today.month
+        for _ in range(6):
+            month_starts.insert(0, date(year, month, 1))
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+        next_month = (month_starts[-1] + timedelta(days=32)).replace(day=1)
+        rows = DailyStats.objects.filter(
+            employee__isnull=True,
+            date__gte=month_starts[0],
+            date__lt=next_month,
+        ).annotate(month=TruncMonth('date')).values('month').annotate(
+            started=Sum('leaves_started'),
+            on_leave_today=Sum('on_leave', filter=Q(date=self.today)),
+        ).order_by()
+        by_month = {row['month']: row for row in rows}
+        current = by_month.get(month_starts[-1], {})
+
+        return {
+            'pending_leaves': pending_leaves,
+            'approved_leaves_month': current.get('started') or 0,
+            'active_leaves_today': current.get('on_leave_today') or 0,
+            'monthly_leaves': [
+                {'month': d.strftime('%b'), 'count': by_month.get(d, {}).get('started') or 0}
+                for d in month_starts
+            ],
+        }
+
+    def task_stats(self):
+        """Task status counts in one query plus today's distribution by type"""
+        tasks = Task.objects.filter(
+            employee__is_superuser=False,
+            employee__role='employee',
+        )
+        counts = tasks.aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            in_progress=Count('id', filter=Q(status='in_progress')),
+            not_started=Count('id', filter=Q(status='not_started')),
+            urgent=Count('id', filter=Q(due_date__date__lte=self.today) & ~Q(status='completed')),
+        )
+        today_tasks_by_type = list(
+            tasks.filter(task_assign_time__date=self.today)
+            .values('task_type')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+
+        total = counts['total']
+        return {
+            'total_tasks': total,
+            'completed_tasks': counts['completed'],
+            'in_progress_tasks': counts['in_progress'],
+            'not_started_tasks': counts['not_started'],
+            'urgent_tasks': counts['urgent'],
+            'task_completion_rate': round((counts['completed'] / total) * 100, 1) if total > 0 else 0,
+            'today_tasks_by_type': today_tasks_by_type,
+        }
+
+    def break_stats(self):
+        return {
+            'today_breaks': BreakTimer.objects.filter(
+                date=self.today,
+                employee__is_superuser=False,
+                employee__role='employee'
+            ).count()
+        }
+
+    def recent_activity(self):
+        """Top performers and latest leaves, tasks and check-ins"""
+        return {
+            'top_employees': Employee.objects.filter(
+                is_superuser=False,
+                is_active=True,
+                role='employee'
+            ).annotate(
+                task_count=Count('tasks', filter=Q(tasks__status='completed'))
+            ).order_by('-task_count')[:5],
+            'recent_leaves': Leave.objects.filter(
+                status='pending'
+            ).select_related('employee').order_by('-created_at')[:5],
+            'recent_tasks': Task.objects.filter(
+                employee__is_superuser=False,
+                employee__role='employee'
+            ).select_related('employee').order_by('-created_at')[:5],
+            'recent_attendance': AttendanceCheck.objects.filter(
+                employee__is_superuser=False,
+                employee__role='employee'
+            ).select_related('employee').order_by('-created_at')[:5],
+        }
+
+    def get_context(self):
+        """Full template context for dashboard.html"""
+        today = self.today
+        first_day_of_month = date(today.year, today.month, 1)
+        if today.month < 12:
+            last_day_of_month = date(today.year, today.month + 1, 1) - timedelta(days=1)
+        else:
+            last_day_of_month = date(today.year, 12, 31)
+
+        context = {}
+        context.update(self.employee_stats())
+        context.update(self.attendance_stats())
+        context.update(self.break_stats())
+        context.update(self.leave_stats())
+        context.update(self.task_stats())
+        context.update(self.recent_activity())
+
+        active = context['active_employees']
+        context['attendance_percentage'] = (
+            round((context['employees_present'] / active * 100), 1) if active > 0 else 0
+        )
+        context.update({
+            'today': today.strftime('%B %d, %Y'),
+            'current_month': today.strftime('%B %Y'),
+            'first_day_of_month': first_day_of_month.strftime('%b %d'),
+            'last_day_of_month': last_day_of_month.strftime('%b %d'),
+        })
+        return context
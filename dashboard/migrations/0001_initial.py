@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('authapp', '0005_employee_emergency_contact_name_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present', models.IntegerField(default=0)),
+                ('check_ins', models.IntegerField(default=0)),
+                ('check_outs', models.IntegerField(default=0)),
+                ('breaks', models.IntegerField(default=0)),
+                ('break_seconds', models.IntegerField(default=0)),
+                ('on_leave', models.IntegerField(default=0)),
+                ('leaves_started', models.IntegerField(default=0)),
+                ('tasks_assigned', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='authapp.company')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Stats',
+                'verbose_name_plural': 'Daily Stats',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'company'], name='dashboard_d_date_087912_idx'), models.Index(fields=['employee', 'date'], name='dashboard_d_employe_ab103a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:30
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def dedupe(apps, schema_editor):
+    """
+    Concurrent refreshes of the same employee or company could both insert
+    their rows. Keep the newest of each group so the unique constraints in
+    the next migration can be built; `manage.py backfill_daily_stats`
+    recomputes any day that needs it.
+    """
+    DailyStats = apps.get_model('dashboard', 'DailyStats')
+    groups = {
+        ('employee', 'date'): DailyStats.objects.filter(employee__isnull=False),
+        ('company', 'date'): DailyStats.objects.filter(employee__isnull=True, company__isnull=False),
+        ('date',): DailyStats.objects.filter(employee__isnull=True, company__isnull=True),
+    }
+    for fields, rows in groups.items():
+        duplicates = (
+            rows.values(*fields)
+            .annotate(rows=Count('id'), keep=Max('id'))
+            .filter(rows__gt=1)
+            .order_by()
+        )
+        for group in duplicates:
+            keep = group.pop('keep')
+            group.pop('rows')
+            rows.filter(**group).exclude(id=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+    ]
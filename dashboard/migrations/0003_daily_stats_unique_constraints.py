@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_dedupe_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='dailystats',
+            constraint=models.UniqueConstraint(fields=('employee', 'date'), name='dailystats_employee_date_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailystats',
+            constraint=models.UniqueConstraint(condition=models.Q(('company__isnull', False), ('employee__isnull', True)), fields=('company', 'date'), name='dailystats_company_date_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailystats',
+            constraint=models.UniqueConstraint(condition=models.Q(('company__isnull', True), ('employee__isnull', True)), fields=('date',), name='dailystats_unassigned_date_uniq'),
+        ),
+        # Covered by dailystats_employee_date_uniq
+        migrations.RemoveIndex(
+            model_name='dailystats',
+            name='dashboard_d_employe_ab103a_idx',
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:40
+
+from datetime import date, timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+# Months of rows DashboardMetrics.leave_stats reads, the current one included
+DASHBOARD_MONTHS = 6
+
+
+def backfill(apps, schema_editor):
+    """
+    Build the DailyStats rows the dashboard reads. Signals only refresh the
+    employee-days they touch, so until the months it charts are rebuilt
+    whole, its leave figures would read zeros or partial totals. Older
+    history is left to backfill_daily_stats.
+
+    This runs the live rollup on purpose: the rows must be built exactly as
+    the signals rebuild them.
+    """
+    from dashboard.rollups import rebuild_daily_stats
+
+    today = timezone.localdate()
+    year, month = today.year, today.month
+    for _ in range(DASHBOARD_MONTHS - 1):
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+    # A month per transaction, as backfill_daily_stats does by default,
+    # through the end of this one for leaves starting later this month
+    start = date(year, month, 1)
+    while start <= today:
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        rebuild_daily_stats(start, end)
+        start = end + timedelta(days=1)
+
+
+class Migration(migrations.Migration):
+    # Each month is rebuilt and committed on its own
+    atomic = False
+
+    dependencies = [
+        ('dashboard', '0003_daily_stats_unique_constraints'),
+        ('authapp', '0005_employee_emergency_contact_name_and_more'),
+        ('home', '0019_employeedaystate_day_date'),
+        ('task', '0004_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
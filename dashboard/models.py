@@ -0,0 +1,67 @@
+from django.db import models
+
+from authapp.models import Company, Employee
+
+
+class DailyStats(models.Model):
+    """
+    Per-day rollup of attendance, break, leave and task activity.
+    Rows with an employee hold that employee's figures; rows without one
+    hold the totals for a company (company is null for unassigned staff).
+    """
+
+    date = models.DateField()
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='daily_stats'
+    )
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='daily_stats'
+    )
+
+    present = models.IntegerField(default=0)
+    check_ins = models.IntegerField(default=0)
+    check_outs = models.IntegerField(default=0)
+    breaks = models.IntegerField(default=0)
+    break_seconds = models.IntegerField(default=0)
+    on_leave = models.IntegerField(default=0)
+    leaves_started = models.IntegerField(default=0)
+    tasks_assigned = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = 'Daily Stats'
+        verbose_name_plural = 'Daily Stats'
+        indexes = [
+            models.Index(fields=['date', 'company']),
+        ]
+        constraints = [
+            # One row per employee per day; its index also serves the
+            # per-employee lookups
+            models.UniqueConstraint(fields=['employee', 'date'], name='dailystats_employee_date_uniq'),
+            # One totals row per company per day, and one for unassigned staff
+            models.UniqueConstraint(
+                fields=['company', 'date'],
+                condition=models.Q(employee__isnull=True, company__isnull=False),
+                name='dailystats_company_date_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['date'],
+                condition=models.Q(employee__isnull=True, company__isnull=True),
+                name='dailystats_unassigned_date_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        owner = self.employee or self.company or 'Unassigned'
+        return f"{owner} - {self.date}"
@@ -0,0 +1,84 @@
+"""
+Cached pending-leave digest behind the admin header's notification menus.
+
+The digest (pending count plus the newest few applications, already
+formatted for display) is built once and kept in the cache. Leave saves
+and deletes rebuild it after commit, so pages and the polling endpoint
+read it from the cache instead of querying and parsing dates per render.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+
+from home.models import Leave
+from home.utils import parse_date
+
+
+NOTIFICATION_CACHE_TIMEOUT = getattr(settings, 'NOTIFICATION_CACHE_TIMEOUT', 600)
+LEAVE_DIGEST_KEY = 'notifications:leave_digest'
+LEAVE_DIGEST_SIZE = 5
+
+
+def _date_range(leave):
+    if not (leave.start_date and leave.end_date):
+        return "Date not specified"
+    start = leave.starts_on or parse_date(leave.start_date)
+    end = leave.ends_on or parse_date(leave.end_date)
+    if start and end:
+        return f'{start.strftime("%b %d")} - {end.strftime("%b %d")}'
+    return f'{leave.start_date} - {leave.end_date}'
+
+
+def _leave_notification(leave):
+    employee_name = leave.employee.employee_name or leave.employee.employeeId
+    leave_type = leave.get_category_display()
+    return {
+        'id': leave.id,
+        'type': 'leave',
+        'title': 'New Leave Application',
+        'message': f'{employee_name} applied for {leave_type} leave',
+        'time': leave.created_at,
+        'url': f'/leaves/{leave.id}/',
+        'approve_url': f'/leaves/{leave.id}/approve/',
+        'icon': 'calendar_month',
+        'employee_name': employee_name,
+        'leave_type': leave_type,
+        'days': leave.total_days,
+        'date_range': _date_range(leave),
+        'status': leave.status,
+        'category': leave.category,
+    }
+
+
+def _build_digest():
+    pending = Leave.objects.filter(status='pending')
+    pending_count = pending.aggregate(count=Count('id'))['count']
+    recent = pending.select_related('employee').order_by('-created_at')[:LEAVE_DIGEST_SIZE]
+    notifications = [_leave_notification(leave) for leave in recent]
+
+    body = json.dumps([pending_count, notifications], cls=DjangoJSONEncoder, sort_keys=True)
+    return {
+        'etag': '"%s"' % hashlib.md5(body.encode(), usedforsecurity=False).hexdigest(),
+        'pending_leaves_count': pending_count,
+        'leave_notifications': notifications,
+        # Leaves are the only notifications for now
+        'total_notifications_count': pending_count,
+    }
+
+
+def leave_digest():
+    """The pending-leave digest, from the cache; built from the database only on a miss"""
+    digest = cache.get(LEAVE_DIGEST_KEY)
+    if digest is None:
+        digest = rebuild_leave_digest()
+    return digest
+
+
+def rebuild_leave_digest():
+    digest = _build_digest()
+    cache.set(LEAVE_DIGEST_KEY, digest, NOTIFICATION_CACHE_TIMEOUT)
+    return digest
@@ -0,0 +1,228 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+from authapp.models import Employee
+from home.models import AttendanceCheck, BreakHistory, BreakTimer, Leave
+from home.utils import parse_date
+from task.models import Task
+from .models import DailyStats
+
+
+STAT_FIELDS = [
+    'present',
+    'check_ins',
+    'check_outs',
+    'breaks',
+    'break_seconds',
+    'on_leave',
+    'leaves_started',
+    'tasks_assigned',
+    'tasks_completed',
+]
+
+# Guard against malformed leave ranges exploding into thousands of days
+MAX_LEAVE_DAYS = 366
+
+# pg_advisory_xact_lock keys, (namespace, id), held while rows are rebuilt
+LOCK_ALL = (4201, 0)
+LOCK_EMPLOYEE = 4202
+LOCK_COMPANY = 4203
+
+
+def to_date(value):
+    """Convert a stored date string (or date/datetime) to a date, or None"""
+    return parse_date(value)
+
+
+def leave_days(start_value, end_value):
+    """All days covered by a leave, inclusive"""
+    start = to_date(start_value)
+    end = to_date(end_value) or start
+    if not start or end < start or (end - start).days > MAX_LEAVE_DAYS:
+        return []
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def _date_range(start, end):
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def day_runs(days):
+    """Split a collection of dates into (start, end) runs of consecutive days"""
+    runs = []
+    for day in sorted(set(d for d in days if d)):
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [(start, end) for start, end in runs]
+
+
+def _lock_rows(employee_ids, company_ids):
+    """
+    Serialise rebuilds of the same rows until the transaction ends, so two
+    refreshes of one employee or company can't both delete and re-insert
+    its rows. A full rebuild excludes all others; targeted rebuilds only
+    exclude those sharing an employee or company. Locks are always taken
+    in the same order, so rebuilds can't deadlock.
+    """
+    with connection.cursor() as cursor:
+        if employee_ids is None:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', LOCK_ALL)
+            return
+        cursor.execute('SELECT pg_advisory_xact_lock_shared(%s, %s)', LOCK_ALL)
+        for employee_id in sorted(employee_ids):
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [LOCK_EMPLOYEE, employee_id])
+        # Unassigned staff's totals are locked as company 0
+        for company_id in sorted(company_id or 0 for company_id in company_ids):
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [LOCK_COMPANY, company_id])
+
+
+def rebuild_daily_stats(start, end, employee_ids=None):
+    """
+    Recompute the DailyStats rows between start and end (inclusive) from the
+    raw attendance, break, leave and task tables, using one grouped query per
+    source table. Limit to employee_ids to refresh only those employees and
+    the company totals they contribute to.
+    """
+    with transaction.atomic():
+        _rebuild_daily_stats(start, end, employee_ids)
+
+
+def _rebuild_daily_stats(start, end, employee_ids):
+    days = _date_range(start, end)
+    employee_filter = {'employee_id__in': employee_ids} if employee_ids is not None else {}
+
+    employees = Employee.objects.all()
+    if employee_ids is not None:
+        employees = employees.filter(id__in=employee_ids)
+    company_of = dict(employees.values_list('id', 'company_id'))
+    company_ids = set(company_of.values()) if employee_ids is not None else None
+
+    # Taken before the source tables are read, so the rows written reflect
+    # everything committed before the previous rebuild of them finished
+    _lock_rows(employee_ids, company_ids)
+
+    rows = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+
+    day_field = AttendanceCheck.date_field()
+    attendance = AttendanceCheck.objects.on_dates(days).filter(
+        **employee_filter
+    ).values('employee_id', day_field).annotate(
+        ins=Count('id', filter=Q(check_type='in')),
+        outs=Count('id', filter=Q(check_type='out')),
+    ).order_by()
+    for record in attendance:
+        row = rows[(record['employee_id'], to_date(record[day_field]))]
+        row['check_ins'] = record['ins']
+        row['check_outs'] = record['outs']
+        row['present'] = 1 if record['ins'] else 0
+
+    break_day_field = BreakTimer.date_field()
+    breaks = BreakTimer.objects.on_dates(days).filter(**employee_filter).values(
+        'employee_id', break_day_field
+    ).annotate(count=Count('id')).order_by()
+    for record in breaks:
+        rows[(record['employee_id'], to_date(record[break_day_field]))]['breaks'] = record['count']
+
+    # Break time is totalled into BreakHistory as each break ends
+    for employee_id, day, total in BreakHistory.objects.filter(
+        date__range=(start, end), **employee_filter
+    ).values_list('employee_id', 'date', 'total_break_time'):
+        rows[(employee_id, day)]['break_seconds'] = max(int(total.total_seconds()), 0)
+
+    assigned = Task.objects.filter(
+        task_assign_time__date__range=(start, end), **employee_filter
+    ).annotate(day=TruncDate('task_assign_time')).values('employee_id', 'day').annotate(
+        count=Count('id')
+    ).order_by()
+    for record in assigned:
+        rows[(record['employee_id'], record['day'])]['tasks_assigned'] = record['count']
+
+    completed = Task.objects.filter(
+        task_completed_date__date__range=(start, end), **employee_filter
+    ).annotate(day=TruncDate('task_completed_date')).values('employee_id', 'day').annotate(
+        count=Count('id')
+    ).order_by()
+    for record in completed:
+        rows[(record['employee_id'], record['day'])]['tasks_completed'] = record['count']
+
+    approved = Leave.objects.filter(status='approved', **employee_filter)
+    if settings.TEMPORAL_CUTOVER:
+        approved = approved.overlapping(start, end).values_list('employee_id', 'starts_on', 'ends_on')
+    else:
+        approved = approved.values_list('employee_id', 'start_date', 'end_date')
+    for employee_id, start_value, end_value in approved:
+        covered = leave_days(start_value, end_value)
+        if not covered or covered[-1] < start or covered[0] > end:
+            continue
+        if start <= covered[0] <= end:
+            rows[(employee_id, covered[0])]['leaves_started'] += 1
+        for day in covered:
+            if start <= day <= end:
+                rows[(employee_id, day)]['on_leave'] = 1
+
+    stale = DailyStats.objects.filter(date__range=(start, end), employee__isnull=False)
+    if employee_ids is not None:
+        stale = stale.filter(employee_id__in=employee_ids)
+    stale.delete()
+
+    DailyStats.objects.bulk_create([
+        DailyStats(
+            date=day,
+            employee_id=employee_id,
+            company_id=company_of.get(employee_id),
+            **values
+        )
+        for (employee_id, day), values in rows.items()
+        if employee_id in company_of and any(values.values())
+    ])
+
+    _rebuild_company_rows(start, end, company_ids)
+
+
+def _rebuild_company_rows(start, end, company_ids=None):
+    """Re-sum the per-company totals from the per-employee rows. Call with the companies locked."""
+    company_filter = Q()
+    if company_ids is not None:
+        company_filter = Q(company_id__in=[c for c in company_ids if c is not None])
+        if None in company_ids:
+            company_filter |= Q(company__isnull=True)
+
+    DailyStats.objects.filter(
+        company_filter, date__range=(start, end), employee__isnull=True
+    ).delete()
+
+    totals = DailyStats.objects.filter(
+        company_filter, date__range=(start, end), employee__isnull=False
+    ).values('date', 'company_id').annotate(
+        **{f'total_{field}': Sum(field) for field in STAT_FIELDS}
+    ).order_by()
+
+    DailyStats.objects.bulk_create([
+        DailyStats(
+            date=record['date'],
+            company_id=record['company_id'],
+            **{field: record[f'total_{field}'] or 0 for field in STAT_FIELDS}
+        )
+        for record in totals
+    ])
+
+
+def refresh_employee_days(employee_id, days):
+    """Rebuild the rows for one employee on the given days"""
+    for start, end in day_runs(days):
+        rebuild_daily_stats(start, end, employee_ids=[employee_id])
+
+
+def schedule_refresh(employee_id, days):
+    """Refresh an employee's rows once the current transaction commits"""
+    days = set(d for d in days if d)
+    if not employee_id or not days:
+        return
+    transaction.on_commit(lambda: refresh_employee_days(employee_id, days))
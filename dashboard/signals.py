@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from home.models import AttendanceCheck, BreakTimer, Leave
+from task.models import Task
+from .notifications import rebuild_leave_digest
+from .rollups import leave_days, schedule_refresh, to_date
+
+
+def _task_days(task):
+    days = set()
+    for value in (task.task_assign_time, task.task_completed_date):
+        if value:
+            days.add(timezone.localdate(value) if timezone.is_aware(value) else value.date())
+    return days
+
+
+def _leave_days(leave):
+    return set(leave_days(leave.start_date, leave.end_date))
+
+
+def _previous_days(sender, instance, days_for):
+    """Days the row covered before this save, so moved dates get refreshed too"""
+    if not instance.pk:
+        return set()
+    previous = sender.objects.filter(pk=instance.pk).first()
+    return days_for(previous) if previous else set()
+
+
+@receiver(pre_save, sender=Leave)
+def remember_leave_days(sender, instance, **kwargs):
+    instance._stats_previous_days = _previous_days(sender, instance, _leave_days)
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_days(sender, instance, **kwargs):
+    instance._stats_previous_days = _previous_days(sender, instance, _task_days)
+
+
+@receiver([post_save, post_delete], sender=AttendanceCheck)
+def refresh_attendance_stats(sender, instance, **kwargs):
+    schedule_refresh(instance.employee_id, {to_date(instance.check_date)})
+
+
+@receiver([post_save, post_delete], sender=BreakTimer)
+def refresh_break_stats(sender, instance, **kwargs):
+    schedule_refresh(instance.employee_id, {to_date(instance.date)})
+
+
+@receiver([post_save, post_delete], sender=Leave)
+def refresh_leave_stats(sender, instance, **kwargs):
+    days = _leave_days(instance) | getattr(instance, '_stats_previous_days', set())
+    schedule_refresh(instance.employee_id, days)
+
+
+@receiver([post_save, post_delete], sender=Task)
+def refresh_task_stats(sender, instance, **kwargs):
+    days = _task_days(instance) | getattr(instance, '_stats_previous_days', set())
+    schedule_refresh(instance.employee_id, days)
+
+
+@receiver([post_save, post_delete], sender=Leave)
+def refresh_leave_digest(sender, instance, **kwargs):
+    transaction.on_commit(rebuild_leave_digest)
@@ -1,3 +1,27 @@
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from authapp.models import Employee
+
+
+class TimesheetAccessTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(employeeId='TS1', email='ts1@example.com', role='employee')
+        cls.admin = Employee.objects.create(employeeId='TS2', email='ts2@example.com', role='admin')
+
+    def test_signed_out_goes_to_the_admin_login(self):
+        response = self.client.get(reverse('timesheet'))
+        self.assertRedirects(response, '/admin-login/?next=/timesheet/', fetch_redirect_response=False)
+
+    def test_employees_may_not_export(self):
+        self.client.force_login(self.employee)
+        response = self.client.get(reverse('timesheet'), {'format': 'csv'})
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    def test_admins_may_export(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('timesheet'), {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
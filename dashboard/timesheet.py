@@ -0,0 +1,139 @@
+"""
+Timesheet engine: worked, break and overtime seconds per employee per day.
+
+A whole range is computed from two grouped queries, one over the check-ins
+and check-outs and one over the BreakHistory totals, followed by a single
+pass over the rows in Python. Monthly payroll for every employee costs the
+same two queries as one employee's day.
+
+A day's worked time runs from its check-in to its check-out, less its
+breaks. A check-out earlier on the clock than the check-in is an overnight
+shift and ends on the following day. Time past TIMESHEET_DAY_HOURS on a
+day counts as overtime. Days with a check-in but no check-out count as
+present but contribute no worked time.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+
+from home.models import AttendanceCheck, BreakHistory
+from home.utils import parse_date, parse_time
+
+
+TIMESHEET_FIELDS = [
+    'days_present',
+    'days_incomplete',
+    'worked_seconds',
+    'break_seconds',
+    'overtime_seconds',
+]
+
+
+def standard_day_seconds():
+    return int(settings.TIMESHEET_DAY_HOURS * 3600)
+
+
+def shift_seconds(check_in, check_out):
+    """Seconds from check-in to check-out times, wrapping past midnight; None if either is missing"""
+    if check_in is None or check_out is None:
+        return None
+    start = datetime.combine(date.min, check_in)
+    end = datetime.combine(date.min, check_out)
+    if end < start:
+        end += timedelta(days=1)
+    return int((end - start).total_seconds())
+
+
+def worked_seconds(check_in, check_out, break_seconds=0):
+    """Seconds worked between two check times, less breaks; None when the day is incomplete"""
+    shift = shift_seconds(parse_time(check_in), parse_time(check_out))
+    if shift is None:
+        return None
+    return max(shift - break_seconds, 0)
+
+
+def format_seconds(seconds):
+    """'Xh Ym' for a number of seconds"""
+    minutes = int(seconds) // 60
+    return f"{minutes // 60}h {minutes % 60}m"
+
+
+def _check_times(start, end, employee_ids):
+    """{(employee_id, day): {'in': time, 'out': time}} for the range, in one query"""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    checks = AttendanceCheck.objects.on_dates(days)
+    if employee_ids is not None:
+        checks = checks.filter(employee_id__in=employee_ids)
+
+    if settings.TEMPORAL_CUTOVER:
+        rows = checks.values_list('employee_id', 'checked_on', 'check_type', 'checked_at')
+    else:
+        rows = checks.values_list('employee_id', 'check_date', 'check_type', 'check_time')
+
+    # A month has a few dozen distinct date and time strings; parse each once
+    days_parsed, clocks_parsed = {}, {}
+    times = defaultdict(dict)
+    for employee_id, day, check_type, clock in rows.order_by():
+        if day not in days_parsed:
+            days_parsed[day] = parse_date(day)
+        if clock not in clocks_parsed:
+            clocks_parsed[clock] = parse_time(clock)
+        times[(employee_id, days_parsed[day])][check_type] = clocks_parsed[clock]
+    return times
+
+
+def _break_totals(start, end, employee_ids):
+    """{(employee_id, day): seconds} from BreakHistory, in one query"""
+    history = BreakHistory.objects.filter(date__range=(start, end))
+    if employee_ids is not None:
+        history = history.filter(employee_id__in=employee_ids)
+    return {
+        (employee_id, day): int(total.total_seconds())
+        for employee_id, day, total in history.values_list('employee_id', 'date', 'total_break_time')
+    }
+
+
+def timesheet_days(start, end, employee_ids=None):
+    """
+    One row per employee per day with a check-in between start and end
+    (inclusive), ordered by employee and day. Limit to employee_ids to
+    compute only those employees.
+    """
+    standard = standard_day_seconds()
+    times = _check_times(start, end, employee_ids)
+    breaks = _break_totals(start, end, employee_ids)
+
+    for (employee_id, day) in sorted(times, key=lambda key: (key[0], key[1] or date.min)):
+        checks = times[(employee_id, day)]
+        check_in = checks.get('in')
+        if day is None or check_in is None:
+            continue
+        check_out = checks.get('out')
+        break_seconds = breaks.get((employee_id, day), 0)
+        shift = shift_seconds(check_in, check_out)
+        worked = max(shift - break_seconds, 0) if shift is not None else 0
+        yield {
+            'employee_id': employee_id,
+            'date': day,
+            'check_in': check_in,
+            'check_out': check_out,
+            'complete': shift is not None,
+            'worked_seconds': worked,
+            'break_seconds': break_seconds,
+            'overtime_seconds': max(worked - standard, 0),
+        }
+
+
+def build_timesheet(start, end, employee_ids=None):
+    """{employee_id: totals} over the range, with the TIMESHEET_FIELDS as keys"""
+    totals = defaultdict(lambda: dict.fromkeys(TIMESHEET_FIELDS, 0))
+    for row in timesheet_days(start, end, employee_ids):
+        employee_totals = totals[row['employee_id']]
+        employee_totals['days_present'] += 1
+        if not row['complete']:
+            employee_totals['days_incomplete'] += 1
+        employee_totals['worked_seconds'] += row['worked_seconds']
+        employee_totals['break_seconds'] += row['break_seconds']
+        employee_totals['overtime_seconds'] += row['overtime_seconds']
+    return totals
@@ -20,6 +20,7 @@ urlpatterns = [
     path('attendance/', AttendanceListView.as_view(), name='attendance-list'),
     path('attendance/employee/<int:pk>/', EmployeeAttendanceDetailView.as_view(), name='employee-attendance-detail'),
     path('attendance/daily/', DailyAttendanceView.as_view(), name='daily-attendance'),
+    path('timesheet/', TimesheetView.as_view(), name='timesheet'),
 
 
     path('tasks/dashboard/', TaskDashboardView.as_view(), name='task-dashboard'),
@@ -34,4 +35,6 @@ urlpatterns = [
     path('leaves/<int:pk>/reject/', RejectLeaveView.as_view(), name='reject-leave'),
     path('leaves/<int:pk>/cancel/', CancelLeaveView.as_view(), name='cancel-leave'),
 
+    path('notifications/', NotificationsView.as_view(), name='notifications'),
+
 ]
\ No newline at end of file
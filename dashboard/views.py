@@ -4,22 +4,33 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
-from django.http import HttpResponseRedirect, JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from authapp.models import Employee
-from home.models import AttendanceCheck, BreakTimer, CompanyAnnouncement,Leave
+from home.models import AttendanceCheck, BreakHistory, BreakTimer, CompanyAnnouncement,Leave, LeaveBalance
+from home.utils import parse_date
 from profileapp.models import Document, VisaDetails
 from django.views.generic import ListView, CreateView, DeleteView
 from django.urls import reverse_lazy
 from datetime import datetime, timedelta,date
 from django.utils import timezone
+from django.utils.http import parse_etags
 from django.core.paginator import Paginator
 from django.views.decorators.cache import never_cache
-from django.db.models import Count, Sum, Avg, Q
-from django.db.models.functions import TruncMonth
+from django.db import transaction
+from django.db.models import Count, Sum, Avg, Q, F, OuterRef, Subquery
+from django.db.models.functions import ExtractYear, TruncMonth
 from django.core.mail import send_mail
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from collections import defaultdict
+import csv
+import json
 from task.models import Task, DeliveryTask, OfficeTask, ServiceTask, TaskDuty, TaskProgressImage
+from .metrics import DashboardMetrics
+from .notifications import leave_digest
+from .timesheet import TIMESHEET_FIELDS, build_timesheet, format_seconds, timesheet_days, worked_seconds
+from .xlsx import XLSX_CONTENT_TYPE, write_xlsx
 
 
 class AdminLogin(View):
@@ -92,231 +103,7 @@ class AdminDashboard(LoginRequiredMixin, View):
     login_url = '/admin-login/'
     
     def get(self, request):
-
-        
-        today = date.today()
-        current_month = today.month
-        current_year = today.year
-        first_day_of_month = date(current_year, current_month, 1)
-        last_day_of_month = date(current_year, current_month + 1, 1) - timedelta(days=1) if current_month < 12 else date(current_year, 12, 31)
-        
-        start_of_week = today - timedelta(days=today.weekday())
-        end_of_week = start_of_week + timedelta(days=6)
-        
-        total_employees = Employee.objects.filter(
-            is_superuser=False, 
-            is_active=True,
-            role='employee'
-        ).count()
-        
-        active_employees = Employee.objects.filter(
-            is_superuser=False,
-            is_active=True,
-            role='employee'
-        ).count()
-        
-        inactive_employees = Employee.objects.filter(
-            is_superuser=False,
-            is_active=False
-        ).count()
-        
-        # 2. Attendance Statistics (Today) - FIXED QUERY
-        today_attendance = AttendanceCheck.objects.filter(
-            check_date=today,
-            employee__is_superuser=False,
-            employee__role='employee'
-        )
-        
-        check_in_count = today_attendance.filter(check_type='in').count()
-        check_out_count = today_attendance.filter(check_type='out').count()
-        
-        # Employees present today (at least checked in once) - FIXED QUERY
-        employees_present_ids = AttendanceCheck.objects.filter(
-            check_date=today,
-            check_type='in',
-            employee__is_superuser=False,
-            employee__is_active=True,
-            employee__role='employee'
-        ).values_list('employee_id', flat=True).distinct()
-        
-        employees_present = len(set(employees_present_ids))
-        
-        # 3. Leave Statistics
-        pending_leaves = Leave.objects.filter(status='pending').count()
-        approved_leaves_month = Leave.objects.filter(
-            status='approved',
-            start_date__month=current_month,
-            start_date__year=current_year
-        ).count()
-        
-        # Active leaves today (approved and within date range)
-        active_leaves_today = Leave.objects.filter(
-            status='approved',
-            start_date__lte=today,
-            end_date__gte=today
-        ).count()
-        
-        # 4. Task Statistics
-        total_tasks = Task.objects.filter(
-            employee__is_superuser=False,
-            employee__role='employee'
-        ).count()
-        
-        completed_tasks = Task.objects.filter(
-            employee__is_superuser=False,
-            employee__role='employee',
-            status='completed'
-        ).count()
-        
-        in_progress_tasks = Task.objects.filter(
-            employee__is_superuser=False,
-            employee__role='employee',
-            status='in_progress'
-        ).count()
-        
-        # Urgent tasks (due today or overdue)
-        urgent_tasks = Task.objects.filter(
-            employee__is_superuser=False,
-            employee__role='employee',
-            due_date__date__lte=today
-        ).exclude(status='completed').count()
-        
-        # 5. Today's Task Distribution
-        today_tasks_by_type = Task.objects.filter(
-            employee__is_superuser=False,
-            employee__role='employee',
-            task_assign_time__date=today
-        ).values('task_type').annotate(count=Count('id'))
-        
-        # 6. Attendance Rate (This Week) - FIXED QUERY
-        week_attendance = {}
-        for i in range(7):
-            day = start_of_week + timedelta(days=i)
-            # Get distinct employee IDs who checked in on this day
-            day_employee_ids = AttendanceCheck.objects.filter(
-                check_date=day,
-                employee__is_superuser=False,
-                employee__role='employee',
-                check_type='in'
-            ).values_list('employee_id', flat=True).distinct()
-            
-            week_attendance[day.strftime('%a')] = len(set(day_employee_ids))
-        
-        # 7. Monthly Leave Trend (Last 6 months)
-        monthly_leaves = []
-        for i in range(5, -1, -1):  # Last 6 months
-            month_date = today - timedelta(days=30*i)
-            month_start = date(month_date.year, month_date.month, 1)
-            month_end = date(month_date.year, month_date.month + 1, 1) - timedelta(days=1) if month_date.month < 12 else date(month_date.year, 12, 31)
-            
-            leaves_count = Leave.objects.filter(
-                status='approved',
-                start_date__gte=month_start,
-                start_date__lte=month_end
-            ).count()
-            
-            monthly_leaves.append({
-                'month': month_start.strftime('%b'),
-                'count': leaves_count
-            })
-        
-        # 8. Top Performing Employees (by completed tasks)
-        top_employees = Employee.objects.filter(
-            is_superuser=False,
-            is_active=True,
-            role='employee'
-        ).annotate(
-            task_count=Count('tasks', filter=Q(tasks__status='completed'))
-        ).order_by('-task_count')[:5]
-        
-        # 9. Recent Activities
-        recent_leaves = Leave.objects.filter(
-            status='pending'
-        ).select_related('employee').order_by('-created_at')[:5]
-        
-        recent_tasks = Task.objects.filter(
-            employee__is_superuser=False,
-            employee__role='employee'
-        ).select_related('employee').order_by('-created_at')[:5]
-        
-        recent_attendance = AttendanceCheck.objects.filter(
-            employee__is_superuser=False,
-            employee__role='employee'
-        ).select_related('employee').order_by('-created_at')[:5]
-        
-        # 10. Task Completion Rate
-        if total_tasks > 0:
-            task_completion_rate = round((completed_tasks / total_tasks) * 100, 1)
-        else:
-            task_completion_rate = 0
-        
-        # 11. Attendance Percentage (Today)
-        attendance_percentage = round((employees_present / active_employees * 100), 1) if active_employees > 0 else 0
-        
-        # 12. Break Statistics (Today)
-        today_breaks = BreakTimer.objects.filter(
-            date=today,
-            employee__is_superuser=False,
-            employee__role='employee'
-        ).count()
-        
-        # 13. Get task counts for Not Started (calculate it)
-        not_started_tasks = Task.objects.filter(
-            employee__is_superuser=False,
-            employee__role='employee',
-            status='not_started'
-        ).count()
-        
-        context = {
-            # Employee Statistics
-            'total_employees': total_employees,
-            'active_employees': active_employees,
-            'inactive_employees': inactive_employees,
-            
-            # Attendance Statistics
-            'check_in_count': check_in_count,
-            'check_out_count': check_out_count,
-            'employees_present': employees_present,
-            'attendance_percentage': attendance_percentage,
-            'today_breaks': today_breaks,
-            
-            # Leave Statistics
-            'pending_leaves': pending_leaves,
-            'approved_leaves_month': approved_leaves_month,
-            'active_leaves_today': active_leaves_today,
-            
-            # Task Statistics
-            'total_tasks': total_tasks,
-            'completed_tasks': completed_tasks,
-            'in_progress_tasks': in_progress_tasks,
-            'urgent_tasks': urgent_tasks,
-            'not_started_tasks': not_started_tasks,
-            'task_completion_rate': task_completion_rate,
-            
-            # Today's Distribution
-            'today_tasks_by_type': today_tasks_by_type,
-            
-            # Weekly Data
-            'week_attendance': week_attendance,
-            
-            # Monthly Trends
-            'monthly_leaves': monthly_leaves,
-            
-            # Top Performers
-            'top_employees': top_employees,
-            
-            # Recent Activities
-            'recent_leaves': recent_leaves,
-            'recent_tasks': recent_tasks,
-            'recent_attendance': recent_attendance,
-            
-            # Dates for display
-            'today': today.strftime('%B %d, %Y'),
-            'current_month': today.strftime('%B %Y'),
-            'first_day_of_month': first_day_of_month.strftime('%b %d'),
-            'last_day_of_month': last_day_of_month.strftime('%b %d'),
-        }
-        
+        context = DashboardMetrics().get_context()
         return render(request, 'dashboard.html', context)
     
 
@@ -742,7 +529,7 @@ class AttendanceListView(LoginRequiredMixin,View):
         if date_filter:
             try:
                 filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-                queryset = queryset.filter(check_date=filter_date)
+                queryset = queryset.on_date(filter_date)
             except ValueError:
                 pass
         
@@ -828,28 +615,18 @@ class EmployeeAttendanceDetailView(LoginRequiredMixin,View):
             target_date = timezone.now().date()
         
         # Get attendance records for the selected date
-        attendance_records = AttendanceCheck.objects.filter(
-            employee=employee,
-            check_date=target_date
+        attendance_records = AttendanceCheck.objects.on_date(target_date).filter(
+            employee=employee
         ).order_by('check_time')
         
         # Get break records for the selected date
-        break_records = BreakTimer.objects.filter(
-            employee=employee,
-            date=target_date
+        break_records = BreakTimer.objects.on_date(target_date).filter(
+            employee=employee
         ).order_by('break_start_time')
         
-        # Calculate total break time
-        total_break_minutes = 0
-        for break_record in break_records:
-            if break_record.break_end_time:
-                try:
-                    start_time = datetime.strptime(break_record.break_start_time, '%H:%M:%S')
-                    end_time = datetime.strptime(break_record.break_end_time, '%H:%M:%S')
-                    break_duration = (end_time - start_time).total_seconds() / 60
-                    total_break_minutes += break_duration
-                except ValueError:
-                    pass
+        # Total break time is kept in BreakHistory as breaks end
+        break_history = BreakHistory.objects.filter(employee=employee, date=target_date).first()
+        total_break_minutes = break_history.total_break_time.total_seconds() / 60 if break_history else 0
         
         total_break_time = f"{int(total_break_minutes // 60)}h {int(total_break_minutes % 60)}m"
         
@@ -857,17 +634,11 @@ class EmployeeAttendanceDetailView(LoginRequiredMixin,View):
         check_in = attendance_records.filter(check_type='in').first()
         check_out = attendance_records.filter(check_type='out').last()
         
-        # Calculate working hours
+        # Calculate working hours, overnight shifts included
+        working_seconds = None
         if check_in and check_out:
-            try:
-                in_time = datetime.strptime(check_in.check_time, '%H:%M:%S')
-                out_time = datetime.strptime(check_out.check_time, '%H:%M:%S')
-                working_minutes = (out_time - in_time).total_seconds() / 60 - total_break_minutes
-                working_hours = f"{int(working_minutes // 60)}h {int(working_minutes % 60)}m"
-            except ValueError:
-                working_hours = "N/A"
-        else:
-            working_hours = "N/A"
+            working_seconds = worked_seconds(check_in.check_time, check_out.check_time, int(total_break_minutes * 60))
+        working_hours = format_seconds(working_seconds) if working_seconds is not None else "N/A"
         
         context = {
             'employee': employee,
@@ -901,79 +672,258 @@ class DailyAttendanceView(LoginRequiredMixin,View):
         ).exclude(
             role__in=['super_admin', 'admin']  # Exclude admin roles
         )
-                
-        # Get attendance data for each employee for the selected date
-        daily_data = []
-        present_count = 0
-        absent_count = 0
-        
-        for employee in employees:
-            attendance_records = AttendanceCheck.objects.filter(
-                employee=employee,
-                check_date=target_date
-            ).order_by('check_time')
-            
-            break_records = BreakTimer.objects.filter(
-                employee=employee,
-                date=target_date
+
+        if request.GET.get('format') == 'json':
+            response = StreamingHttpResponse(
+                self._stream_json(target_date, employees),
+                content_type='application/json'
             )
-            
-            check_in = attendance_records.filter(check_type='in').first()
-            check_out = attendance_records.filter(check_type='out').last()
-            
-            # Count present/absent
-            if check_in:
-                present_count += 1
-            else:
-                absent_count += 1
-            
-            # Calculate total break time
-            total_break_minutes = 0
-            for break_record in break_records:
-                if break_record.break_end_time:
-                    try:
-                        start_time = datetime.strptime(break_record.break_start_time, '%H:%M:%S')
-                        end_time = datetime.strptime(break_record.break_end_time, '%H:%M:%S')
-                        break_duration = (end_time - start_time).total_seconds() / 60
-                        total_break_minutes += break_duration
-                    except ValueError:
-                        pass
-            
-            # Calculate working hours
-            working_hours = "N/A"
-            if check_in and check_out:
-                try:
-                    in_time = datetime.strptime(check_in.check_time, '%H:%M:%S')
-                    out_time = datetime.strptime(check_out.check_time, '%H:%M:%S')
-                    working_minutes = (out_time - in_time).total_seconds() / 60 - total_break_minutes
-                    working_hours = f"{int(working_minutes // 60)}h {int(working_minutes % 60)}m"
-                except ValueError:
-                    working_hours = "N/A"
-            
-            daily_data.append({
-                'employee': employee,
-                'check_in': check_in,
-                'check_out': check_out,
-                'break_count': break_records.count(),
-                'total_break_time': f"{int(total_break_minutes // 60)}h {int(total_break_minutes % 60)}m",
-                'working_hours': working_hours,
-                'status': 'Present' if check_in else 'Absent'
-            })
+            response['Content-Disposition'] = f'inline; filename="attendance-{target_date.isoformat()}.json"'
+            return response
+
+        daily_data = list(self._daily_rows(target_date, employees))
+        present_count = sum(1 for row in daily_data if row['check_in'])
         
         context = {
             'selected_date': target_date,
             'daily_data': daily_data,
             'total_employees': len(daily_data),
             'present_count': present_count,
-            'absent_count': absent_count,
+            'absent_count': len(daily_data) - present_count,
         }
         
         return render(request, 'daily_attendance.html', context)
+
+    def _daily_rows(self, target_date, employees):
+        """
+        Yield one summary row per employee, built from bulk queries for the
+        day's attendance, break counts and BreakHistory totals keyed by
+        employee_id.
+        """
+        attendance_by_employee = defaultdict(list)
+        for record in AttendanceCheck.objects.on_date(target_date).filter(
+            employee__in=employees
+        ).order_by('check_time'):
+            attendance_by_employee[record.employee_id].append(record)
+
+        break_counts = dict(
+            BreakTimer.objects.on_date(target_date).filter(employee__in=employees)
+            .values('employee_id').annotate(breaks=Count('id')).order_by()
+            .values_list('employee_id', 'breaks')
+        )
+        break_totals = dict(
+            BreakHistory.objects.filter(employee__in=employees, date=target_date)
+            .values_list('employee_id', 'total_break_time')
+        )
+
+        for employee in employees.iterator(chunk_size=500):
+            attendance_records = attendance_by_employee.get(employee.id, [])
+
+            check_ins = [r for r in attendance_records if r.check_type == 'in']
+            check_outs = [r for r in attendance_records if r.check_type == 'out']
+            check_in = check_ins[0] if check_ins else None
+            check_out = check_outs[-1] if check_outs else None
+
+            total_break = break_totals.get(employee.id)
+            total_break_minutes = total_break.total_seconds() / 60 if total_break else 0
+
+            # Calculate working hours, overnight shifts included
+            working_seconds = None
+            if check_in and check_out:
+                working_seconds = worked_seconds(check_in.check_time, check_out.check_time, int(total_break_minutes * 60))
+            working_hours = format_seconds(working_seconds) if working_seconds is not None else "N/A"
+
+            yield {
+                'employee': employee,
+                'check_in': check_in,
+                'check_out': check_out,
+                'break_count': break_counts.get(employee.id, 0),
+                'total_break_minutes': int(total_break_minutes),
+                'total_break_time': f"{int(total_break_minutes // 60)}h {int(total_break_minutes % 60)}m",
+                'working_minutes': working_seconds // 60 if working_seconds is not None else None,
+                'working_hours': working_hours,
+                'status': 'Present' if check_in else 'Absent'
+            }
+
+    def _stream_json(self, target_date, employees):
+        """Stream the day's rows as a JSON document without building it in memory"""
+        present_count = 0
+        total = 0
+        yield '{"date": "%s", "employees": [' % target_date.isoformat()
+        for row in self._daily_rows(target_date, employees):
+            employee = row['employee']
+            check_in = row['check_in']
+            check_out = row['check_out']
+            if check_in:
+                present_count += 1
+            item = {
+                'employee_id': employee.employeeId,
+                'employee_name': employee.employee_name,
+                'status': row['status'],
+                'check_in': check_in.check_time if check_in else None,
+                'check_in_location': check_in.location if check_in else None,
+                'check_out': check_out.check_time if check_out else None,
+                'check_out_location': check_out.location if check_out else None,
+                'break_count': row['break_count'],
+                'total_break_minutes': row['total_break_minutes'],
+                'working_minutes': row['working_minutes'],
+            }
+            yield (',' if total else '') + json.dumps(item, cls=DjangoJSONEncoder)
+            total += 1
+        yield '], "total_employees": %d, "present_count": %d, "absent_count": %d}' % (
+            total, present_count, total - present_count
+        )
     
 
 
 
 
+class TimesheetView(LoginRequiredMixin, View):
+    """
+    Worked, break and overtime totals per employee over a date range,
+    rendered or exported with ?format=csv or ?format=xlsx. Exports give one
+    row per employee, or one per employee-day with ?rows=days.
+    """
+    login_url = '/admin-login/'
+    max_days = 366
+
+    def get(self, request):
+        # Every employee's hours, so admins only
+        if not (request.user.is_staff or request.user.is_superuser or request.user.role in ['super_admin', 'admin']):
+            messages.error(request, 'Permission denied.')
+            return redirect('dashboard')
+
+        today = timezone.localdate()
+        start = self._parse_date(request.GET.get('start')) or today.replace(day=1)
+        end = self._parse_date(request.GET.get('end')) or today
+        if end < start:
+            messages.error(request, "End date must not be before start date")
+            start, end = today.replace(day=1), today
+        elif (end - start).days >= self.max_days:
+            messages.error(request, f"Timesheets cover at most {self.max_days} days")
+            start = end - timedelta(days=self.max_days - 1)
+
+        employees = Employee.objects.filter(
+            is_active=True,
+            is_superuser=False,
+            is_staff=False
+        ).exclude(
+            role__in=['super_admin', 'admin']
+        ).order_by('employeeId')
+        employee_filter = request.GET.get('employee', '').strip()
+        if employee_filter:
+            employees = employees.filter(
+                Q(employeeId__icontains=employee_filter) |
+                Q(employee_name__icontains=employee_filter)
+            )
+        employees = list(employees.only('id', 'employeeId', 'employee_name'))
+        employee_ids = [employee.id for employee in employees]
+
+        export_format = request.GET.get('format')
+        if export_format in ('csv', 'xlsx'):
+            if request.GET.get('rows') == 'days':
+                rows = self._day_rows(employees, start, end)
+            else:
+                rows = self._summary_rows(employees, build_timesheet(start, end, employee_ids))
+            return self._export(rows, export_format, start, end)
+
+        totals = build_timesheet(start, end, employee_ids)
+        timesheet = []
+        for employee in employees:
+            employee_totals = totals.get(employee.id, dict.fromkeys(TIMESHEET_FIELDS, 0))
+            timesheet.append({
+                'employee': employee,
+                **employee_totals,
+                'worked_time': format_seconds(employee_totals['worked_seconds']),
+                'break_time': format_seconds(employee_totals['break_seconds']),
+                'overtime': format_seconds(employee_totals['overtime_seconds']),
+            })
+
+        context = {
+            'start_date': start,
+            'end_date': end,
+            'employee_filter': employee_filter,
+            'timesheet': timesheet,
+            'total_worked': format_seconds(sum(row['worked_seconds'] for row in timesheet)),
+            'total_overtime': format_seconds(sum(row['overtime_seconds'] for row in timesheet)),
+            'day_hours': settings.TIMESHEET_DAY_HOURS,
+        }
+        return render(request, 'timesheet.html', context)
+
+    def _summary_rows(self, employees, totals):
+        yield ['Employee ID', 'Employee Name', 'Days Present', 'Incomplete Days',
+               'Worked Hours', 'Break Hours', 'Overtime Hours']
+        for employee in employees:
+            employee_totals = totals.get(employee.id, dict.fromkeys(TIMESHEET_FIELDS, 0))
+            yield [
+                employee.employeeId,
+                employee.employee_name or '',
+                employee_totals['days_present'],
+                employee_totals['days_incomplete'],
+                self._hours(employee_totals['worked_seconds']),
+                self._hours(employee_totals['break_seconds']),
+                self._hours(employee_totals['overtime_seconds']),
+            ]
+
+    def _day_rows(self, employees, start, end):
+        by_id = {employee.id: employee for employee in employees}
+        yield ['Employee ID', 'Employee Name', 'Date', 'Check In', 'Check Out',
+               'Worked Hours', 'Break Hours', 'Overtime Hours']
+        for row in timesheet_days(start, end, list(by_id)):
+            employee = by_id[row['employee_id']]
+            yield [
+                employee.employeeId,
+                employee.employee_name or '',
+                row['date'].isoformat(),
+                row['check_in'].strftime('%H:%M:%S'),
+                row['check_out'].strftime('%H:%M:%S') if row['check_out'] else '',
+                self._hours(row['worked_seconds']),
+                self._hours(row['break_seconds']),
+                self._hours(row['overtime_seconds']),
+            ]
+
+    def _export(self, rows, export_format, start, end):
+        filename = f'timesheet-{start.isoformat()}-{end.isoformat()}.{export_format}'
+        if export_format == 'xlsx':
+            response = HttpResponse(write_xlsx(rows, sheet_name='Timesheet'), content_type=XLSX_CONTENT_TYPE)
+        else:
+            response = HttpResponse(content_type='text/csv')
+            csv.writer(response).writerows(rows)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def _hours(self, seconds):
+        return round(seconds / 3600, 2)
+
+    def _parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return None
+
+
+class NotificationsView(LoginRequiredMixin, View):
+    """The header's notification digest as JSON, polled by the bell icon"""
+    login_url = '/admin-login/'
+
+    def get(self, request):
+        if not (request.user.is_staff or request.user.is_superuser or request.user.role in ['super_admin', 'admin']):
+            return JsonResponse({'error': 'Permission denied.'}, status=403)
+
+        digest = leave_digest()
+        if digest['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse({
+                'pending_leaves_count': digest['pending_leaves_count'],
+                'total_notifications_count': digest['total_notifications_count'],
+                'leave_notifications': digest['leave_notifications'],
+            })
+        response['ETag'] = digest['etag']
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
 class TaskDashboardView(LoginRequiredMixin, View):
     login_url = '/admin-login/'
     
@@ -1252,6 +1202,7 @@ class CreateTaskView(LoginRequiredMixin, View):
 
 class LeaveListView(LoginRequiredMixin, View):
     login_url = '/admin-login/'
+    paginate_by = 20
     
     def get(self, request):
         # Get filter parameters from request
@@ -1268,35 +1219,30 @@ class LeaveListView(LoginRequiredMixin, View):
         # Base queryset - different for admin vs regular employees
         if request.user.is_staff or request.user.is_superuser or request.user.role in ['super_admin', 'admin']:
             leaves = Leave.objects.all().select_related('employee', 'approved_by')
-            
-            # Calculate monthly leave counts for all employees
-            employees_monthly_leaves = {}
-            for emp in Employee.objects.filter(is_superuser=False, is_active=True):
-                monthly_count = Leave.objects.filter(
-                    employee=emp,
-                    start_date__month=current_month,
-                    start_date__year=current_year,
-                    status='approved'
-                ).count()
-                employees_monthly_leaves[emp.employeeId] = monthly_count
+            monthly_leaves = Leave.objects.filter(employee__is_superuser=False, employee__is_active=True)
         else:
             # Regular employees can only see their own leaves
             leaves = Leave.objects.filter(employee=request.user).select_related('employee', 'approved_by')
-            
-            # Calculate monthly leave count for current user
-            monthly_count = Leave.objects.filter(
-                employee=request.user,
-                start_date__month=current_month,
-                start_date__year=current_year,
-                status='approved'
-            ).count()
-            employees_monthly_leaves = {request.user.employeeId: monthly_count}
-        
-        # Apply filters if provided
-        if from_date:
-            leaves = leaves.filter(start_date__gte=from_date)
-        if to_date:
-            leaves = leaves.filter(end_date__lte=to_date)
+            monthly_leaves = Leave.objects.filter(employee=request.user)
+        
+        # Approved leaves starting this month, per employee, in one grouped query
+        employees_monthly_leaves = dict(
+            monthly_leaves.starting_in_month(current_year, current_month)
+            .filter(status='approved')
+            .values('employee__employeeId')
+            .annotate(count=Count('id'))
+            .order_by()
+            .values_list('employee__employeeId', 'count')
+        )
+        
+        # Apply filters if provided; dates the picker didn't send as
+        # YYYY-MM-DD are ignored
+        from_day = parse_date(from_date)
+        to_day = parse_date(to_date)
+        if from_day:
+            leaves = leaves.starting_from(from_day)
+        if to_day:
+            leaves = leaves.ending_by(to_day)
         if employee_id:
             leaves = leaves.filter(employee__employeeId=employee_id)
         if status:
@@ -1304,29 +1250,32 @@ class LeaveListView(LoginRequiredMixin, View):
         if category:
             leaves = leaves.filter(category=category)
         
-        # Order by latest first
-        leaves = leaves.order_by('-created_at')
-        
-        # Get statistics counts
-        total_leaves = leaves.count()
-        pending_count = leaves.filter(status='pending').count()
-        approved_count = leaves.filter(status='approved').count()
-        rejected_count = leaves.filter(status='rejected').count()
-        cancelled_count = leaves.filter(status='cancelled').count()
-        
-        # Count active leaves (approved and currently within date range)
-        today = date.today()
-        active_count = leaves.filter(
-            status='approved',
-            start_date__lte=today,
-            end_date__gte=today
-        ).count()
-        
-        # Count upcoming leaves (approved and start date in future)
-        upcoming_count = leaves.filter(
-            status='approved',
-            start_date__gt=today
-        ).count()
+        # Get statistics counts in one conditional aggregate; active leaves
+        # are approved and cover today, upcoming ones start after today
+        today = timezone.localdate()
+        stats = leaves.order_by().aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status='pending')),
+            approved=Count('id', filter=Q(status='approved')),
+            rejected=Count('id', filter=Q(status='rejected')),
+            cancelled=Count('id', filter=Q(status='cancelled')),
+            active=Count('id', filter=Q(status='approved') & Leave.objects.covering_q(today)),
+            upcoming=Count('id', filter=Q(status='approved') & Leave.objects.starting_after_q(today)),
+        )
+        
+        # Order by latest first, with the days left in each leave's balance
+        leaves = leaves.annotate(
+            days_left=self._days_left(
+                employee=OuterRef('employee'),
+                category=OuterRef('category'),
+                year=ExtractYear(OuterRef('starts_on')),
+            )
+        ).order_by('-created_at', '-id')
+        
+        # Pagination; the aggregate above already counted the rows
+        paginator = Paginator(leaves, self.paginate_by)
+        paginator.count = stats['total']
+        page_obj = paginator.get_page(request.GET.get('page'))
         
         # Get all employees for filter dropdown
         if request.user.is_staff or request.user.is_superuser or request.user.role in ['super_admin', 'admin']:
@@ -1337,10 +1286,15 @@ class LeaveListView(LoginRequiredMixin, View):
         else:
             # Regular employees can only see themselves in the dropdown
             employees = Employee.objects.filter(id=request.user.id)
+        # Everyone's annual balance comes with the dropdown's query
+        employees = employees.annotate(
+            annual_days_left=self._days_left(employee=OuterRef('pk'), category='annual', year=current_year)
+        )
         
         # Prepare context
         context = {
-            'leaves': leaves,
+            'leaves': page_obj,
+            'page_obj': page_obj,
             'employees': employees,
             'status_choices': Leave.STATUS_CHOICES,
             'category_choices': Leave.LEAVE_CATEGORY_CHOICES,
@@ -1354,13 +1308,13 @@ class LeaveListView(LoginRequiredMixin, View):
             'to_date': to_date,
             
             # Statistics
-            'total_leaves': total_leaves,
-            'pending_count': pending_count,
-            'approved_count': approved_count,
-            'rejected_count': rejected_count,
-            'cancelled_count': cancelled_count,
-            'active_count': active_count,
-            'upcoming_count': upcoming_count,
+            'total_leaves': stats['total'],
+            'pending_count': stats['pending'],
+            'approved_count': stats['approved'],
+            'rejected_count': stats['rejected'],
+            'cancelled_count': stats['cancelled'],
+            'active_count': stats['active'],
+            'upcoming_count': stats['upcoming'],
             
             # Monthly leave counts
             'employees_monthly_leaves': employees_monthly_leaves,
@@ -1374,6 +1328,14 @@ class LeaveListView(LoginRequiredMixin, View):
         
         return render(request, 'leave_list.html', context)
 
+    def _days_left(self, **lookup):
+        # Categories with no entitlement (sick, unpaid, ...) have no days left to show
+        return Subquery(
+            LeaveBalance.objects.filter(entitled_days__gt=0, **lookup).annotate(
+                days_left=F('entitled_days') - F('used_days')
+            ).values('days_left')[:1]
+        )
+
 
 class LeaveDetailView(LoginRequiredMixin, View):
     login_url = '/admin-login/'
@@ -1395,10 +1357,8 @@ class LeaveDetailView(LoginRequiredMixin, View):
             
             monthly_leave_count = Leave.objects.filter(
                 employee=leave.employee,
-                start_date__month=current_month,
-                start_date__year=current_year,
                 status='approved'
-            ).count()
+            ).starting_in_month(current_year, current_month).count()
             
             context = {
                 'leave': leave,
@@ -1424,16 +1384,17 @@ class ApproveLeaveView(LoginRequiredMixin, View):
             return redirect('leave-detail', pk=pk)
         
         try:
-            leave = Leave.objects.get(pk=pk)
-            
-            if leave.status != 'pending':
-                messages.error(request, 'Leave is not in pending status.')
-                return redirect('leave-detail', pk=pk)
-            
-            leave.status = 'approved'
-            leave.approved_by = request.user
-            leave.approved_at = timezone.now()
-            leave.save()
+            with transaction.atomic():
+                leave = Leave.objects.select_for_update().get(pk=pk)
+                
+                if leave.status != 'pending':
+                    messages.error(request, 'Leave is not in pending status.')
+                    return redirect('leave-detail', pk=pk)
+                
+                leave.status = 'approved'
+                leave.approved_by = request.user
+                leave.approved_at = timezone.now()
+                leave.save()
             
             messages.success(request, 'Leave approved successfully.')
             return redirect('leave-detail', pk=pk)
@@ -1456,22 +1417,24 @@ class RejectLeaveView(LoginRequiredMixin, View):
             return redirect('leave-detail', pk=pk)
         
         try:
-            leave = Leave.objects.get(pk=pk)
-            
-            if leave.status != 'pending':
-                messages.error(request, 'Leave is not in pending status.')
-                return redirect('leave-detail', pk=pk)
-            
             rejection_reason = request.POST.get('rejection_reason', '').strip()
-            if not rejection_reason:
-                messages.error(request, 'Rejection reason is required.')
-                return redirect('leave-detail', pk=pk)
             
-            leave.status = 'rejected'
-            leave.rejection_reason = rejection_reason
-            leave.approved_by = request.user
-            leave.approved_at = timezone.now()
-            leave.save()
+            with transaction.atomic():
+                leave = Leave.objects.select_for_update().get(pk=pk)
+                
+                if leave.status != 'pending':
+                    messages.error(request, 'Leave is not in pending status.')
+                    return redirect('leave-detail', pk=pk)
+                
+                if not rejection_reason:
+                    messages.error(request, 'Rejection reason is required.')
+                    return redirect('leave-detail', pk=pk)
+                
+                leave.status = 'rejected'
+                leave.rejection_reason = rejection_reason
+                leave.approved_by = request.user
+                leave.approved_at = timezone.now()
+                leave.save()
             
             messages.success(request, 'Leave rejected successfully.')
             return redirect('leave-detail', pk=pk)
@@ -1489,19 +1452,20 @@ class CancelLeaveView(LoginRequiredMixin, View):
     
     def post(self, request, pk):
         try:
-            leave = Leave.objects.get(pk=pk)
-            
-            # Only the employee can cancel their own leave
-            if leave.employee != request.user:
-                messages.error(request, 'You can only cancel your own leaves.')
-                return redirect('leave-detail', pk=pk)
-            
-            if leave.status != 'pending':
-                messages.error(request, 'Only pending leaves can be cancelled.')
-                return redirect('leave-detail', pk=pk)
-            
-            leave.status = 'cancelled'
-            leave.save()
+            with transaction.atomic():
+                leave = Leave.objects.select_for_update().get(pk=pk)
+                
+                # Only the employee can cancel their own leave
+                if leave.employee_id != request.user.id:
+                    messages.error(request, 'You can only cancel your own leaves.')
+                    return redirect('leave-detail', pk=pk)
+                
+                if leave.status != 'pending':
+                    messages.error(request, 'Only pending leaves can be cancelled.')
+                    return redirect('leave-detail', pk=pk)
+                
+                leave.status = 'cancelled'
+                leave.save()
             
             messages.success(request, 'Leave cancelled successfully.')
             return redirect('leave-detail', pk=pk)
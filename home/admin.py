@@ -8,4 +8,7 @@ admin.site.register(AttendanceCheck)
 admin.site.register(BreakTimer)
 admin.site.register(BreakHistory)
 admin.site.register(Leave)
-admin.site.register(CompanyAnnouncement)
\ No newline at end of file
+admin.site.register(LeaveBalance)
+admin.site.register(CompanyAnnouncement)
+admin.site.register(SyncOperation)
+admin.site.register(EmployeeDayState)
@@ -0,0 +1,61 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import CompanyAnnouncement
+
+
+ANNOUNCEMENT_CACHE_TIMEOUT = getattr(settings, 'ANNOUNCEMENT_CACHE_TIMEOUT', 600)
+ANNOUNCEMENT_VERSION_KEY = 'announcements:version'
+
+
+def announcement_version():
+    """Current version of the active announcement list"""
+    return cache.get(ANNOUNCEMENT_VERSION_KEY, 0)
+
+
+def _announcements_key(version):
+    return f"announcements:active:{version}"
+
+
+def _build_entry():
+    from .serializers import CompanyAnnouncementSerializer
+
+    announcements = CompanyAnnouncement.objects.filter(is_active=True).order_by('-date')
+    body = json.dumps(
+        CompanyAnnouncementSerializer(announcements, many=True).data,
+        cls=DjangoJSONEncoder,
+        sort_keys=True
+    )
+    return {
+        'etag': '"%s"' % hashlib.md5(body.encode(), usedforsecurity=False).hexdigest(),
+        'announcements': json.loads(body),
+    }
+
+
+def active_announcements():
+    """
+    Serialized active announcements, newest first, plus an ETag for the list.
+    Served from the cache; built from the database only on a miss.
+    """
+    key = _announcements_key(announcement_version())
+    entry = cache.get(key)
+    if entry is None:
+        entry = _build_entry()
+        cache.set(key, entry, ANNOUNCEMENT_CACHE_TIMEOUT)
+    return entry
+
+
+def rebuild_announcement_cache():
+    """Move to a new version and repopulate it, retiring every cached copy"""
+    try:
+        version = cache.incr(ANNOUNCEMENT_VERSION_KEY)
+    except ValueError:
+        version = 1
+        cache.set(ANNOUNCEMENT_VERSION_KEY, version, None)
+    entry = _build_entry()
+    cache.set(_announcements_key(version), entry, ANNOUNCEMENT_CACHE_TIMEOUT)
+    return entry
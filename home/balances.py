@@ -0,0 +1,152 @@
+"""
+LeaveBalance upkeep.
+
+A balance row is created the first time it is needed, from the employee's
+leaves for that category and year and the LEAVE_ENTITLEMENTS setting.
+After that, every write to a leave moves its days between the row's
+pending and used totals with an F() update: home.signals snapshots the
+leave before it is saved and calls record_change() after it is saved or
+deleted, inside the same transaction, so the ledger changes together with
+the leave or not at all. Status changes made anywhere (the endpoints, the
+dashboard, the admin) are counted, as are edits to a leave's days,
+category or dates, and deletions.
+
+A leave counts toward the year its start date falls in (Leave.starts_on,
+or its start_date string until backfill_temporal_columns has filled
+starts_on in).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import Leave, LeaveBalance
+from .utils import parse_date
+
+# Which ledger column each status's days are held in
+STATUS_COLUMNS = {
+    'pending': 'pending_days',
+    'approved': 'used_days',
+}
+
+# The fields that decide which balance a leave's days are held in, and how many
+LEDGER_FIELDS = {'employee', 'employee_id', 'category', 'status', 'total_days', 'starts_on', 'start_date'}
+
+
+def entitlement(category):
+    """Days granted per year for a category, 0 when none are configured"""
+    return Decimal(str(settings.LEAVE_ENTITLEMENTS.get(category, 0)))
+
+
+def leave_year(leave):
+    """The year a leave counts toward, or None when its start date can't be read"""
+    start = leave.starts_on or parse_date(leave.start_date)
+    return start.year if start else None
+
+
+def leave_totals(leaves, year):
+    """
+    Approved and pending days of the leaves starting in year. Leaves whose
+    starts_on isn't filled in yet are counted by their start_date string,
+    as leave_year() does, so balances are right before the backfill too.
+    """
+    totals = leaves.filter(starts_on__year=year).aggregate(
+        used=Sum('total_days', filter=Q(status='approved')),
+        pending=Sum('total_days', filter=Q(status='pending')),
+    )
+    used, pending = totals['used'] or 0, totals['pending'] or 0
+    unfilled = leaves.filter(starts_on__isnull=True, status__in=STATUS_COLUMNS)
+    for status, days, start_date in unfilled.values_list('status', 'total_days', 'start_date'):
+        start = parse_date(start_date)
+        if start and start.year == year:
+            if status == 'approved':
+                used += days
+            else:
+                pending += days
+    return used, pending
+
+
+def _create_balance(employee_id, category, year):
+    used, pending = leave_totals(Leave.objects.filter(employee_id=employee_id, category=category), year)
+    return LeaveBalance.objects.create(
+        employee_id=employee_id,
+        category=category,
+        year=year,
+        entitled_days=entitlement(category),
+        used_days=used,
+        pending_days=pending,
+    )
+
+
+def get_balance(employee_id, category, year):
+    """The employee's balance for a category and year, created from their leaves on first use"""
+    lookup = {'employee_id': employee_id, 'category': category, 'year': year}
+    balance = LeaveBalance.objects.filter(**lookup).first()
+    if balance is None:
+        try:
+            with transaction.atomic():
+                balance = _create_balance(employee_id, category, year)
+        except IntegrityError:
+            balance = LeaveBalance.objects.get(**lookup)
+    return balance
+
+
+def _adjust(lookup, changes):
+    return LeaveBalance.objects.filter(**lookup).update(
+        updated_at=timezone.now(),
+        **{column: F(column) + days for column, days in changes.items()}
+    )
+
+
+def _entry(leave):
+    """((employee_id, category, year), column, days) a leave holds in the ledger, or None"""
+    column = STATUS_COLUMNS.get(leave.status)
+    year = leave_year(leave)
+    if column is None or year is None or not leave.total_days:
+        return None
+    return (leave.employee_id, leave.category, year), column, leave.total_days
+
+
+def ledger_snapshot(pk):
+    """
+    The stored state of a leave about to be saved, for record_change().
+    Locked when inside a transaction, so two writes to one leave can't both
+    move its days from the same state.
+    """
+    leaves = Leave.objects.only('employee_id', 'category', 'status', 'total_days', 'starts_on', 'start_date')
+    if transaction.get_connection().in_atomic_block:
+        leaves = leaves.select_for_update()
+    return leaves.filter(pk=pk).first()
+
+
+def record_change(before, after):
+    """
+    Move a leave's days from the ledger entry it held before a write (None
+    for a new application) to the one it holds after it (None once it is
+    deleted). Called from home.signals inside the transaction of the write.
+    """
+    changes = defaultdict(lambda: defaultdict(Decimal))
+    for leave, sign in ((before, -1), (after, 1)):
+        entry = _entry(leave) if leave is not None else None
+        if entry is not None:
+            key, column, days = entry
+            changes[key][column] += sign * days
+
+    for (employee_id, category, year), columns in changes.items():
+        columns = {column: days for column, days in columns.items() if days}
+        if not columns:
+            continue
+        lookup = {'employee_id': employee_id, 'category': category, 'year': year}
+        # A deleted leave has nothing to take back from a balance not yet made
+        if _adjust(lookup, columns) or after is None:
+            continue
+        try:
+            # Built from the leaves as saved, so this change is already counted
+            with transaction.atomic():
+                _create_balance(**lookup)
+        except IntegrityError:
+            # Another transaction created the row without seeing this change
+            _adjust(lookup, columns)
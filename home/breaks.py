@@ -0,0 +1,23 @@
+"""
+Break accounting for the end-break endpoints.
+
+Each ended break is added to its day's BreakHistory once, when it ends, so
+the home screen and the dashboards read a stored daily total instead of
+re-parsing every BreakTimer's time strings.
+"""
+from django.db import transaction
+
+from .models import BreakHistory
+from .payload import invalidate_home_payload
+
+
+def record_break(ended_break):
+    """Add a just-ended break to its day's BreakHistory; returns its length in seconds"""
+    if not (ended_break.break_date and ended_break.started_at and ended_break.ended_at):
+        return 0
+    duration = ended_break.ended_at - ended_break.started_at
+    BreakHistory.objects.add_break(ended_break.employee_id, ended_break.break_date, duration)
+    # update() sends no post_save, so drop the cached home payload here
+    employee_id = ended_break.employee_id
+    transaction.on_commit(lambda: invalidate_home_payload(employee_id))
+    return int(duration.total_seconds())
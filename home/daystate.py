@@ -0,0 +1,120 @@
+"""
+EmployeeDayState upkeep for the attendance and break endpoints.
+
+Writers (the endpoints and the /api/sync/ replay) lock the employee's row
+with select_for_update for the length of their transaction, check it with
+the shared guards below, write the AttendanceCheck or BreakTimer and point
+the row at it. Readers fetch it by primary key. A row
+left over from another day is rebuilt from AttendanceCheck and BreakTimer
+before use, and writes made anywhere else (admin, dashboard, sync) mark it
+stale through home.signals.
+
+Rows are keyed by a date: the client's check_date / date string parsed
+with home.utils.parse_date on the endpoints, timezone.localdate() on the
+server-side reads. A string would make each spelling of the same day look
+like another day and force a rebuild.
+"""
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import AttendanceCheck, BreakTimer, EmployeeDayState
+
+RELATED_FIELDS = ('check_in', 'check_out', 'active_break')
+
+
+def track(instance):
+    """Mark a check or break as written through the day state, so its save doesn't mark the row stale"""
+    instance._day_state_tracked = True
+    return instance
+
+
+def _is_current(state, day):
+    if state.day != day:
+        return False
+    # A break closed outside the endpoints leaves the row pointing at it
+    return not (state.active_break_id and state.active_break.break_end_time is not None)
+
+
+def _rebuild(state, day):
+    # Matched on the typed columns, which hold the same date however the
+    # client spelt it
+    employee_id = state.employee_id
+    checks = {
+        check.check_type: check
+        for check in AttendanceCheck.objects.filter(employee_id=employee_id, checked_on=day)
+    }
+    breaks = BreakTimer.objects.filter(employee_id=employee_id, break_date=day)
+    taken = breaks.filter(started_at__isnull=False, ended_at__isnull=False).aggregate(
+        total=Sum(F('ended_at') - F('started_at'))
+    )['total']
+
+    state.day = day
+    state.check_in = checks.get('in')
+    state.check_out = checks.get('out')
+    state.active_break = breaks.filter(break_end_time__isnull=True).order_by('pk').first()
+    state.break_seconds = int(taken.total_seconds()) if taken else 0
+    state.save()
+
+
+def lock_day_state(employee, day):
+    """The employee's state for day (a date), locked until the surrounding transaction ends"""
+    locked = EmployeeDayState.objects.select_for_update(of=('self',)).select_related(*RELATED_FIELDS)
+    state = locked.filter(pk=employee.pk).first()
+    if state is None:
+        EmployeeDayState.objects.get_or_create(employee=employee)
+        state = locked.get(pk=employee.pk)
+    if not _is_current(state, day):
+        _rebuild(state, day)
+    return state
+
+
+def get_day_state(employee, day):
+    """The employee's state for day (a date), for guards that only read it"""
+    state = EmployeeDayState.objects.select_related(*RELATED_FIELDS).filter(pk=employee.pk).first()
+    if state is None or not _is_current(state, day):
+        with transaction.atomic():
+            state = lock_day_state(employee, day)
+    return state
+
+
+def mark_stale(employee_id):
+    """Force a rebuild on next use, after a write that bypassed the day state"""
+    EmployeeDayState.objects.filter(pk=employee_id, day__isnull=False).update(day=None)
+
+
+# The guards shared by the endpoints and the sync replay. Each returns the
+# error to report, or None when the write may go ahead.
+
+def check_in_error(state):
+    if state.check_in_id:
+        return "Already checked in today"
+    return None
+
+
+def check_out_error(state):
+    if not state.check_in_id:
+        return "You need to check in first"
+    if state.check_out_id:
+        return "Already checked out today"
+    if state.active_break_id:
+        return "Please end your break before checking out"
+    return None
+
+
+def start_break_error(state):
+    if not state.check_in_id:
+        return "You need to check in first"
+    if state.check_out_id:
+        return "You have already checked out for today"
+    if state.active_break_id:
+        return "You already have an active break"
+    return None
+
+
+def end_break_error(state):
+    if state.check_out_id:
+        return "You have already checked out"
+    if not state.active_break_id:
+        return "No active break found"
+    return None
+
@@ -0,0 +1,88 @@
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Min, Sum
+
+from authapp.models import Employee
+from home.models import BreakHistory, BreakTimer
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild BreakHistory from the ended BreakTimer rows over a date range "
+        "(migration 0016 only adds the days that had no row). "
+        "Run backfill_temporal_columns --model breaks first so every break has its typed columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day to rebuild (YYYY-MM-DD), defaults to the earliest break")
+        parser.add_argument('--end', help="Last day to rebuild (YYYY-MM-DD), defaults to today")
+        parser.add_argument('--employee', help="Only rebuild rows for this employeeId")
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=31,
+            help="Number of days rebuilt per transaction"
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_days'] < 1:
+            raise CommandError("--chunk-days must be at least 1")
+
+        employee_filter = {}
+        if options['employee']:
+            try:
+                employee_filter['employee_id'] = Employee.objects.get(employeeId=options['employee']).id
+            except Employee.DoesNotExist:
+                raise CommandError(f"Employee {options['employee']} not found")
+
+        if options['start']:
+            start = self._parse_date(options['start'])
+        else:
+            start = BreakTimer.objects.filter(**employee_filter).aggregate(first=Min('break_date'))['first']
+            if start is None:
+                self.stdout.write("No breaks to backfill")
+                return
+        end = self._parse_date(options['end']) if options['end'] else date.today()
+        if end < start:
+            raise CommandError("--end must not be before --start")
+
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), end)
+            rows = self._rebuild(chunk_start, chunk_end, employee_filter)
+            self.stdout.write(f"Rebuilt {chunk_start} to {chunk_end}: {rows} days with breaks")
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS("Break history backfill complete"))
+
+    def _rebuild(self, start, end, employee_filter):
+        totals = BreakTimer.objects.filter(
+            break_date__range=(start, end),
+            started_at__isnull=False,
+            ended_at__isnull=False,
+            **employee_filter
+        ).values('employee_id', 'break_date').annotate(
+            breaks=Count('id'),
+            total=Sum(F('ended_at') - F('started_at')),
+        ).order_by()
+
+        with transaction.atomic():
+            BreakHistory.objects.filter(date__range=(start, end), **employee_filter).delete()
+            created = BreakHistory.objects.bulk_create([
+                BreakHistory(
+                    employee_id=row['employee_id'],
+                    date=row['break_date'],
+                    total_break_time=row['total'],
+                    number_of_scheduled_breaks=row['breaks'],
+                )
+                for row in totals
+            ])
+        return len(created)
+
+    def _parse_date(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.models import AttendanceCheck, BreakTimer, Leave
+
+
+TEMPORAL_MODELS = {
+    'attendance': (
+        AttendanceCheck,
+        ['check_date', 'check_time'],
+        ['checked_on', 'checked_at'],
+    ),
+    'breaks': (
+        BreakTimer,
+        ['date', 'break_start_time', 'break_end_time'],
+        ['break_date', 'started_at', 'ended_at'],
+    ),
+    'leaves': (
+        Leave,
+        ['start_date', 'end_date'],
+        ['starts_on', 'ends_on'],
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = "Populate the typed temporal columns from the legacy string columns in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=list(TEMPORAL_MODELS),
+            action='append',
+            help="Limit to one table (repeatable), defaults to all"
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help="Seconds to pause between batches to reduce load on a live database"
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only report rows whose typed columns are still empty"
+        )
+
+    def handle(self, *args, **options):
+        for name in options['model'] or list(TEMPORAL_MODELS):
+            model, source_fields, typed_fields = TEMPORAL_MODELS[name]
+            if options['verify']:
+                self._verify(name, model, source_fields, typed_fields)
+            else:
+                self._backfill(name, model, source_fields, typed_fields, options)
+
+    def _backfill(self, name, model, source_fields, typed_fields, options):
+        queryset = model.objects.only('pk', *source_fields).order_by('pk')
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            for obj in batch:
+                obj.sync_temporal_fields()
+            model.objects.bulk_update(batch, typed_fields)
+            updated += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"{name}: {updated} rows up to id {last_pk}")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f"{name}: backfilled {updated} rows"))
+
+    def _verify(self, name, model, source_fields, typed_fields):
+        # The first typed column is derived from the first source column
+        missing = model.objects.filter(
+            **{f'{typed_fields[0]}__isnull': True}
+        ).exclude(**{f'{source_fields[0]}__isnull': True}).exclude(**{source_fields[0]: ''})
+        count = missing.count()
+        if count:
+            sample = list(missing.values_list('pk', source_fields[0])[:5])
+            self.stdout.write(self.style.WARNING(
+                f"{name}: {count} rows could not be parsed, e.g. {sample}"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{name}: all rows populated"))
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from authapp.models import Employee
+from home.balances import STATUS_COLUMNS, entitlement
+from home.models import Leave, LeaveBalance
+from home.utils import parse_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the used and pending days of every LeaveBalance for a year from the leaves, "
+        "creating rows for employees who have none. Entitlements already set are kept. "
+        "Leaves whose starts_on isn't backfilled yet are counted by their start_date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help="Year to rebuild, defaults to the current year")
+        parser.add_argument('--employee', help="Only rebuild balances for this employeeId")
+
+    def handle(self, *args, **options):
+        year = options['year'] or timezone.localdate().year
+
+        employees = Employee.objects.filter(is_superuser=False)
+        if options['employee']:
+            employees = employees.filter(employeeId=options['employee'])
+            if not employees.exists():
+                raise CommandError(f"Employee {options['employee']} not found")
+        employee_ids = list(employees.values_list('id', flat=True))
+
+        with transaction.atomic():
+            # Hold the rows so approvals made meanwhile wait for the rebuild
+            existing = {
+                (balance.employee_id, balance.category): balance
+                for balance in LeaveBalance.objects.select_for_update().filter(
+                    year=year, employee_id__in=employee_ids
+                )
+            }
+            totals = {
+                (row['employee_id'], row['category']): row
+                for row in Leave.objects.filter(
+                    starts_on__year=year, employee_id__in=employee_ids
+                ).values('employee_id', 'category').annotate(
+                    used=Sum('total_days', filter=Q(status='approved')),
+                    pending=Sum('total_days', filter=Q(status='pending')),
+                ).order_by()
+            }
+            # Leaves without starts_on yet count by their start_date string
+            unfilled = Leave.objects.filter(
+                starts_on__isnull=True, status__in=STATUS_COLUMNS, employee_id__in=employee_ids
+            ).values_list('employee_id', 'category', 'status', 'total_days', 'start_date')
+            for employee_id, category, status, days, start_date in unfilled:
+                start = parse_date(start_date)
+                if start and start.year == year:
+                    row = totals.setdefault((employee_id, category), {})
+                    key = 'used' if status == 'approved' else 'pending'
+                    row[key] = (row.get(key) or 0) + days
+
+            keys = set(existing) | set(totals)
+            keys.update(
+                (employee_id, category)
+                for employee_id in employee_ids
+                for category in settings.LEAVE_ENTITLEMENTS
+            )
+
+            now = timezone.now()
+            changed, created = [], []
+            for employee_id, category in keys:
+                row = totals.get((employee_id, category), {})
+                balance = existing.get((employee_id, category))
+                if balance is None:
+                    balance = LeaveBalance(
+                        employee_id=employee_id,
+                        category=category,
+                        year=year,
+                        entitled_days=entitlement(category),
+                    )
+                    created.append(balance)
+                else:
+                    changed.append(balance)
+                balance.used_days = row.get('used') or 0
+                balance.pending_days = row.get('pending') or 0
+                balance.updated_at = now
+
+            LeaveBalance.objects.bulk_update(changed, ['used_days', 'pending_days', 'updated_at'], batch_size=500)
+            LeaveBalance.objects.bulk_create(created, batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{year}: rebuilt {len(changed)} balances, created {len(created)}"
+        ))
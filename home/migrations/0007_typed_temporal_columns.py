@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_alter_leave_passport_required_from_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancecheck',
+            name='checked_at',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancecheck',
+            name='checked_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='breaktimer',
+            name='break_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='breaktimer',
+            name='ended_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='breaktimer',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='leave',
+            name='ends_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='leave',
+            name='starts_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
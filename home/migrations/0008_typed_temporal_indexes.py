@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:47
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('home', '0007_typed_temporal_columns'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='attendancecheck',
+            index=models.Index(fields=['checked_on'], name='attendance_checked_on_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='breaktimer',
+            index=models.Index(fields=['break_date'], name='break_break_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='leave',
+            index=models.Index(fields=['starts_on', 'ends_on'], name='leave_starts_ends_on_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:49
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('home', '0008_typed_temporal_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='attendancecheck',
+            index=models.Index(fields=['employee', 'check_date', 'check_type'], name='attendance_emp_date_type_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='breaktimer',
+            index=models.Index(fields=['employee', 'date'], name='break_emp_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='breaktimer',
+            index=models.Index(condition=models.Q(('break_end_time__isnull', True)), fields=['employee', 'date'], name='break_open_emp_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='leave',
+            index=models.Index(fields=['employee', 'status', 'category'], name='leave_emp_status_cat_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='leave',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-created_at'], name='leave_pending_created_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:20
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('home', '0009_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='leave',
+            index=models.Index(fields=['employee', '-created_at', '-id'], name='leave_emp_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='companyannouncement',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-date', '-id'], name='announcement_active_date_idx'),
+        ),
+    ]
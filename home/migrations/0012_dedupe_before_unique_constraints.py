@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:07
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def _duplicates(queryset, fields):
+    """(lookup, lowest id) for every group of rows sharing the given fields"""
+    groups = (
+        queryset.values(*fields)
+        .annotate(rows=Count('id'), keep=Min('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in groups:
+        keep = group.pop('keep')
+        group.pop('rows')
+        yield group, keep
+
+
+def dedupe(apps, schema_editor):
+    """
+    Retried requests left duplicate rows behind. Keep the first of each
+    group so the unique constraints in the next migration can be built.
+    """
+    AttendanceCheck = apps.get_model('home', 'AttendanceCheck')
+    BreakTimer = apps.get_model('home', 'BreakTimer')
+    Leave = apps.get_model('home', 'Leave')
+
+    for lookup, keep in _duplicates(AttendanceCheck.objects.all(), ['employee', 'check_date', 'check_type']):
+        AttendanceCheck.objects.filter(**lookup).exclude(id=keep).delete()
+
+    open_breaks = BreakTimer.objects.filter(break_end_time__isnull=True)
+    for lookup, keep in _duplicates(open_breaks, ['employee', 'date']):
+        open_breaks.filter(**lookup).exclude(id=keep).delete()
+
+    # Leave applications are cancelled rather than deleted, keeping attachments
+    pending = Leave.objects.filter(status='pending')
+    for lookup, keep in _duplicates(pending, ['employee', 'category', 'start_date', 'end_date']):
+        pending.filter(**lookup).exclude(id=keep).update(status='cancelled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0011_sync_operation'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:08
+
+from django.conf import settings
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('home', '0012_dedupe_before_unique_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE UNIQUE INDEX CONCURRENTLY "attendance_emp_date_type_uniq" '
+                    'ON "home_attendancecheck" ("employee_id", "check_date", "check_type")',
+                    'DROP INDEX CONCURRENTLY IF EXISTS "attendance_emp_date_type_uniq"',
+                ),
+                migrations.RunSQL(
+                    'ALTER TABLE "home_attendancecheck" ADD CONSTRAINT "attendance_emp_date_type_uniq" '
+                    'UNIQUE USING INDEX "attendance_emp_date_type_uniq"',
+                    'ALTER TABLE "home_attendancecheck" DROP CONSTRAINT "attendance_emp_date_type_uniq"',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='attendancecheck',
+                    constraint=models.UniqueConstraint(fields=('employee', 'check_date', 'check_type'), name='attendance_emp_date_type_uniq'),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE UNIQUE INDEX CONCURRENTLY "break_open_emp_date_uniq" '
+                    'ON "home_breaktimer" ("employee_id", "date") WHERE "break_end_time" IS NULL',
+                    'DROP INDEX CONCURRENTLY IF EXISTS "break_open_emp_date_uniq"',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='breaktimer',
+                    constraint=models.UniqueConstraint(condition=models.Q(('break_end_time__isnull', True)), fields=('employee', 'date'), name='break_open_emp_date_uniq'),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE UNIQUE INDEX CONCURRENTLY "leave_pending_application_uniq" '
+                    'ON "home_leave" ("employee_id", "category", "start_date", "end_date") WHERE "status" = \'pending\'',
+                    'DROP INDEX CONCURRENTLY IF EXISTS "leave_pending_application_uniq"',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='leave',
+                    constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('employee', 'category', 'start_date', 'end_date'), name='leave_pending_application_uniq'),
+                ),
+            ],
+        ),
+        # The unique indexes above replace these
+        RemoveIndexConcurrently(
+            model_name='attendancecheck',
+            name='attendance_emp_date_type_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='breaktimer',
+            name='break_open_emp_date_idx',
+        ),
+    ]
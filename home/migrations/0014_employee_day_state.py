@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0005_employee_emergency_contact_name_and_more'),
+        ('home', '0013_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeDayState',
+            fields=[
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='day_state', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('day', models.CharField(blank=True, max_length=100)),
+                ('break_seconds', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('active_break', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='home.breaktimer')),
+                ('check_in', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='home.attendancecheck')),
+                ('check_out', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='home.attendancecheck')),
+            ],
+        ),
+    ]
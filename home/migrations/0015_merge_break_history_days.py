@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:12
+
+from django.db import migrations
+from django.db.models import Count, Min, Sum
+
+
+def merge(apps, schema_editor):
+    """
+    Fold any duplicate (employee, date) rows into the first one so the
+    unique constraint in the next migration can be built.
+    """
+    BreakHistory = apps.get_model('home', 'BreakHistory')
+
+    groups = (
+        BreakHistory.objects.values('employee', 'date')
+        .annotate(
+            rows=Count('id'),
+            keep=Min('id'),
+            total=Sum('total_break_time'),
+            breaks=Sum('number_of_scheduled_breaks'),
+        )
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in groups:
+        days = BreakHistory.objects.filter(employee=group['employee'], date=group['date'])
+        days.filter(id=group['keep']).update(
+            total_break_time=group['total'],
+            number_of_scheduled_breaks=group['breaks'],
+        )
+        days.exclude(id=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0014_employee_day_state'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge, migrations.RunPython.noop),
+    ]
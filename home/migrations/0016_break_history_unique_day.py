@@ -0,0 +1,138 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:13
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copies of the home.utils parsers as they were when this was written
+DATE_FORMATS = ['%Y-%m-%d', '%d %B %Y', '%d-%b-%Y', '%B %d, %Y', '%d %b %Y', '%Y/%m/%d']
+SLASH_DATE_FORMATS = ['%d/%m/%Y', '%m/%d/%Y']
+TIME_FORMATS = ['%H:%M:%S', '%H:%M:%S.%f', '%H:%M', '%I:%M %p', '%I:%M:%S %p']
+
+
+def _strptime(value, formats):
+    readings = []
+    for fmt in formats:
+        try:
+            readings.append(datetime.strptime(value, fmt))
+        except ValueError:
+            continue
+    return readings
+
+
+def parse_date(value):
+    if not value:
+        return None
+    value = str(value).strip()
+    readings = _strptime(value, DATE_FORMATS)
+    if readings:
+        return readings[0].date()
+    # A slash date whose day and month could be swapped isn't guessed at
+    readings = {reading.date() for reading in _strptime(value, SLASH_DATE_FORMATS)}
+    if readings:
+        return readings.pop() if len(readings) == 1 else None
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def combine_datetime(day, value):
+    if not value:
+        return None
+    text = str(value).strip()
+    if len(text) > 10 and text[4:5] == '-':
+        try:
+            parsed = datetime.fromisoformat(text)
+            return parsed if parsed.tzinfo else timezone.make_aware(parsed)
+        except ValueError:
+            pass
+    day = parse_date(day)
+    readings = _strptime(text, TIME_FORMATS)
+    if readings:
+        clock = readings[0].time()
+    else:
+        try:
+            clock = datetime.fromisoformat(text).time()
+        except ValueError:
+            return None
+    if not day:
+        return None
+    return timezone.make_aware(datetime.combine(day, clock))
+
+
+def add_missing_days(apps, schema_editor):
+    """
+    Give every day with ended breaks but no BreakHistory row one, so past
+    days don't read as breakless. Existing rows are left alone, and rows
+    created meanwhile by ending a break win over the insert, so no live
+    increment is lost; backfill_break_history does full rebuilds.
+    """
+    BreakTimer = apps.get_model('home', 'BreakTimer')
+    BreakHistory = apps.get_model('home', 'BreakHistory')
+
+    existing = set(BreakHistory.objects.values_list('employee_id', 'date'))
+    days = defaultdict(lambda: [timedelta(0), 0])
+    breaks = BreakTimer.objects.exclude(break_end_time__isnull=True).exclude(break_end_time='').values_list(
+        'employee_id', 'date', 'break_start_time', 'break_end_time', 'break_date', 'started_at', 'ended_at'
+    )
+    for employee_id, day_text, start_text, end_text, day, started_at, ended_at in breaks.iterator(chunk_size=2000):
+        day = day or parse_date(day_text)
+        if started_at is None or ended_at is None:
+            started_at = combine_datetime(day_text, start_text)
+            ended_at = combine_datetime(day_text, end_text)
+            # Breaks that run past midnight end on the following day
+            if started_at and ended_at and ended_at < started_at:
+                ended_at += timedelta(days=1)
+        if day is None or started_at is None or ended_at is None or (employee_id, day) in existing:
+            continue
+        totals = days[(employee_id, day)]
+        totals[0] += ended_at - started_at
+        totals[1] += 1
+
+    BreakHistory.objects.bulk_create(
+        [
+            BreakHistory(employee_id=employee_id, date=day, total_break_time=total, number_of_scheduled_breaks=count)
+            for (employee_id, day), (total, count) in days.items()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('home', '0015_merge_break_history_days'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE UNIQUE INDEX CONCURRENTLY "break_history_emp_date_uniq" '
+                    'ON "home_breakhistory" ("employee_id", "date")',
+                    'DROP INDEX CONCURRENTLY IF EXISTS "break_history_emp_date_uniq"',
+                ),
+                migrations.RunSQL(
+                    'ALTER TABLE "home_breakhistory" ADD CONSTRAINT "break_history_emp_date_uniq" '
+                    'UNIQUE USING INDEX "break_history_emp_date_uniq"',
+                    'ALTER TABLE "home_breakhistory" DROP CONSTRAINT "break_history_emp_date_uniq"',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='breakhistory',
+                    constraint=models.UniqueConstraint(fields=('employee', 'date'), name='break_history_emp_date_uniq'),
+                ),
+            ],
+        ),
+        # After the index, so a day's row created meanwhile is kept over the insert
+        migrations.RunPython(add_missing_days, migrations.RunPython.noop),
+    ]
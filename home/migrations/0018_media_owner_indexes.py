@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:40
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('home', '0017_leave_balance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='leave',
+            index=models.Index(fields=['attachment', 'employee'], name='leave_attachment_emp_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='leave',
+            index=models.Index(fields=['signature', 'employee'], name='leave_signature_emp_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0018_media_owner_indexes'),
+    ]
+
+    operations = [
+        # The row is a cache: dropping the string column leaves every row
+        # stale, and each is rebuilt on its employee's next request
+        migrations.RemoveField(
+            model_name='employeedaystate',
+            name='day',
+        ),
+        migrations.AddField(
+            model_name='employeedaystate',
+            name='day',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -1,12 +1,106 @@
 from datetime import timezone
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 from authapp.models import Employee
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from datetime import timedelta
+from .utils import combine_datetime, parse_date, parse_time
+
+
+
+class TemporalQuerySet(models.QuerySet):
+    """
+    Keeps the typed shadow columns in sync on writes that skip save(): an
+    update() or bulk_update() that writes a legacy string column re-derives
+    the typed columns from it. Filters by day go through on_date() and
+    on_dates(), which pick the column TEMPORAL_CUTOVER says to read.
+    """
+
+    def on_date(self, day):
+        """Rows dated day (a date)"""
+        return self.filter(**{self.model.date_field(): day if settings.TEMPORAL_CUTOVER else day.isoformat()})
+
+    def on_dates(self, days):
+        """Rows dated any of the given dates"""
+        if settings.TEMPORAL_CUTOVER:
+            return self.filter(**{f'{self.model.date_field()}__in': days})
+        return self.filter(**{f'{self.model.date_field()}__in': [day.isoformat() for day in days]})
+
+    def update(self, **kwargs):
+        typed_fields = self.model.typed_fields_for(kwargs)
+        if not typed_fields:
+            return super().update(**kwargs)
+        rows = self.model._base_manager.using(self.db)
+        with transaction.atomic(using=self.db):
+            pks = list(self.select_for_update().values_list('pk', flat=True))
+            updated = rows.filter(pk__in=pks).update(**kwargs)
+            changed = list(rows.filter(pk__in=pks).only('pk', *self.model.TEMPORAL_FIELDS))
+            for obj in changed:
+                obj.sync_temporal_fields()
+            rows.bulk_update(changed, typed_fields, batch_size=1000)
+        return updated
+
+    update.alters_data = True
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        typed_fields = self.model.typed_fields_for(fields)
+        if typed_fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.sync_temporal_fields()
+            fields = [*fields, *(field for field in typed_fields if field not in fields)]
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+    bulk_update.alters_data = True
+
+
+class TemporalModel(models.Model):
+    """
+    A model with typed shadows of legacy date/time string columns. Every
+    save re-derives the shadows, and a save(update_fields=...) naming a
+    string column writes its shadows with it.
+    """
+    # {legacy string column: typed columns derived from it}
+    TEMPORAL_FIELDS = {}
+    # (typed column, string column) a row's day is read from, for on_date()
+    DATE_FIELDS = None
 
-
-
-class AttendanceCheck(models.Model):
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def typed_fields_for(cls, fields):
+        """The typed columns to write alongside a write of the given fields"""
+        typed_fields = []
+        for field in fields:
+            for typed_field in cls.TEMPORAL_FIELDS.get(field, ()):
+                if typed_field not in typed_fields:
+                    typed_fields.append(typed_field)
+        return typed_fields
+
+    @classmethod
+    def date_field(cls):
+        """The column holding a row's day, typed once TEMPORAL_CUTOVER is on"""
+        typed_field, string_field = cls.DATE_FIELDS
+        return typed_field if settings.TEMPORAL_CUTOVER else string_field
+
+    def sync_temporal_fields(self):
+        """
+        Set the typed columns from the string columns. Abstract: each model
+        parses its own columns, as some typed values need several of them.
+        """
+        raise NotImplementedError
+
+    def save(self, *args, **kwargs):
+        self.sync_temporal_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields).union(self.typed_fields_for(update_fields))
+        super().save(*args, **kwargs)
+
+
+class AttendanceCheck(TemporalModel):
     CHECK_TYPE_CHOICES = [
         ('in', 'Check In'),
         ('out', 'Check Out'),
@@ -20,16 +114,42 @@ class AttendanceCheck(models.Model):
     location = models.CharField(max_length=255, blank=True, null=True)
     reason = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True,blank=True,null=True)
+
+    # Typed shadows of check_date/check_time, kept in sync on save
+    checked_on = models.DateField(blank=True, null=True)
+    checked_at = models.TimeField(blank=True, null=True)
+    TEMPORAL_FIELDS = {
+        'check_date': ['checked_on'],
+        'check_time': ['checked_at'],
+    }
+    DATE_FIELDS = ('checked_on', 'check_date')
+
+    objects = TemporalQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['checked_on'], name='attendance_checked_on_idx'),
+        ]
+        constraints = [
+            # One check-in and one check-out per employee per day; its index
+            # also serves the (employee, check_date, check_type) lookups
+            models.UniqueConstraint(
+                fields=['employee', 'check_date', 'check_type'],
+                name='attendance_emp_date_type_uniq'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.employee.employeeId} - {self.check_type} - {self.check_date}"
 
+    def sync_temporal_fields(self):
+        self.checked_on = parse_date(self.check_date)
+        self.checked_at = parse_time(self.check_time)
+
     
 
-class BreakTimer(models.Model):
+class BreakTimer(TemporalModel):
     BREAK_TYPE_CHOICES = [
         ('lunch', 'Lunch Break'),
         ('coffee', 'Coffee Break'),
@@ -47,9 +167,47 @@ class BreakTimer(models.Model):
     location = models.CharField(max_length=255, blank=True, null=True)
     end_reason = models.TextField(blank=True, null=True) 
 
+    # Typed shadows of date/break_start_time/break_end_time, kept in sync on save
+    break_date = models.DateField(blank=True, null=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    ended_at = models.DateTimeField(blank=True, null=True)
+    TEMPORAL_FIELDS = {
+        'date': ['break_date', 'started_at', 'ended_at'],
+        # ended_at moves a day on when the break runs past midnight
+        'break_start_time': ['started_at', 'ended_at'],
+        'break_end_time': ['ended_at'],
+    }
+    DATE_FIELDS = ('break_date', 'date')
+
+    objects = TemporalQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['break_date'], name='break_break_date_idx'),
+            models.Index(fields=['employee', 'date'], name='break_emp_date_idx'),
+        ]
+        constraints = [
+            # At most one open break per employee per day; being partial, its
+            # index only holds the open breaks the check-out and start-break
+            # guards look for
+            models.UniqueConstraint(
+                fields=['employee', 'date'],
+                condition=models.Q(break_end_time__isnull=True),
+                name='break_open_emp_date_uniq'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.employee.employeeId} - {self.get_break_type_display()}"
 
+    def sync_temporal_fields(self):
+        self.break_date = parse_date(self.date)
+        self.started_at = combine_datetime(self.date, self.break_start_time)
+        self.ended_at = combine_datetime(self.date, self.break_end_time)
+        # Breaks that run past midnight end on the following day
+        if self.started_at and self.ended_at and self.ended_at < self.started_at:
+            self.ended_at += timedelta(days=1)
+
     @property
     def display_break_type(self):
         if self.break_type == 'other' and self.custom_break_type:
@@ -57,11 +215,43 @@ class BreakTimer(models.Model):
         return self.get_break_type_display()
     
 
+class BreakHistoryQuerySet(models.QuerySet):
+    def add_break(self, employee_id, day, duration):
+        """
+        Add one finished break to the employee's total for day. The row is
+        incremented in the database, so concurrent break ends both count.
+        """
+        updated = self.filter(employee_id=employee_id, date=day).update(
+            total_break_time=models.F('total_break_time') + duration,
+            number_of_scheduled_breaks=models.F('number_of_scheduled_breaks') + 1,
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                self.create(
+                    employee_id=employee_id,
+                    date=day,
+                    total_break_time=duration,
+                    number_of_scheduled_breaks=1,
+                )
+        except IntegrityError:
+            # Another request created the day's row first
+            self.add_break(employee_id, day, duration)
+
+
 class BreakHistory(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='break_histories')
     total_break_time = models.DurationField()
     number_of_scheduled_breaks = models.IntegerField(default=0)
     date = models.DateField()
+
+    objects = BreakHistoryQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'date'], name='break_history_emp_date_uniq'),
+        ]
     
     def __str__(self):
         return f"{self.employee.employeeId} - {self.date}"
@@ -82,6 +272,13 @@ class CompanyAnnouncement(models.Model):
         ordering = ['-date']
         verbose_name = 'Company Announcement'
         verbose_name_plural = 'Company Announcements'
+        indexes = [
+            models.Index(
+                fields=['-date', '-id'],
+                condition=models.Q(is_active=True),
+                name='announcement_active_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.heading
@@ -90,7 +287,45 @@ class CompanyAnnouncement(models.Model):
 
 
 
-class Leave(models.Model):
+class LeaveQuerySet(TemporalQuerySet):
+    def overlapping(self, start, end):
+        """Leaves covering any day between start and end (typed columns only)"""
+        return self.filter(starts_on__lte=end, ends_on__gte=start)
+
+    @staticmethod
+    def covering_q(day):
+        """Condition for leaves covering day, for aggregate filters"""
+        if settings.TEMPORAL_CUTOVER:
+            return models.Q(starts_on__lte=day, ends_on__gte=day)
+        return models.Q(start_date__lte=day.isoformat(), end_date__gte=day.isoformat())
+
+    @staticmethod
+    def starting_after_q(day):
+        """Condition for leaves starting after day, for aggregate filters"""
+        if settings.TEMPORAL_CUTOVER:
+            return models.Q(starts_on__gt=day)
+        return models.Q(start_date__gt=day.isoformat())
+
+    def starting_from(self, day):
+        """Leaves starting on or after day"""
+        if settings.TEMPORAL_CUTOVER:
+            return self.filter(starts_on__gte=day)
+        return self.filter(start_date__gte=day.isoformat())
+
+    def ending_by(self, day):
+        """Leaves ending on or before day"""
+        if settings.TEMPORAL_CUTOVER:
+            return self.filter(ends_on__lte=day)
+        return self.filter(end_date__lte=day.isoformat())
+
+    def starting_in_month(self, year, month):
+        """Leaves whose start date falls in the given month"""
+        if settings.TEMPORAL_CUTOVER:
+            return self.filter(starts_on__year=year, starts_on__month=month)
+        return self.filter(start_date__startswith=f'{year:04d}-{month:02d}-')
+
+
+class Leave(TemporalModel):
 
     LEAVE_CATEGORY_CHOICES = [
         ('annual', 'Annual Leave'),
@@ -209,14 +444,53 @@ class Leave(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # Typed shadows of start_date/end_date, kept in sync on save
+    starts_on = models.DateField(blank=True, null=True)
+    ends_on = models.DateField(blank=True, null=True)
+    TEMPORAL_FIELDS = {
+        'start_date': ['starts_on'],
+        'end_date': ['ends_on'],
+    }
+
+    objects = LeaveQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Leave Application"
         verbose_name_plural = "Leave Applications"
+        indexes = [
+            models.Index(fields=['starts_on', 'ends_on'], name='leave_starts_ends_on_idx'),
+            models.Index(
+                fields=['employee', 'status', 'category'],
+                name='leave_emp_status_cat_idx'
+            ),
+            models.Index(fields=['employee', '-created_at', '-id'], name='leave_emp_created_idx'),
+            # Only pending leaves, which the approval queues list newest first
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(status='pending'),
+                name='leave_pending_created_idx'
+            ),
+            # Who a served attachment or signature belongs to (backend/media.py)
+            models.Index(fields=['attachment', 'employee'], name='leave_attachment_emp_idx'),
+            models.Index(fields=['signature', 'employee'], name='leave_signature_emp_idx'),
+        ]
+        constraints = [
+            # A resubmitted application can't sit in the queue twice
+            models.UniqueConstraint(
+                fields=['employee', 'category', 'start_date', 'end_date'],
+                condition=models.Q(status='pending'),
+                name='leave_pending_application_uniq'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.employee.employeeId} - {self.category} ({self.start_date} to {self.end_date})"
+
+    def sync_temporal_fields(self):
+        self.starts_on = parse_date(self.start_date)
+        self.ends_on = parse_date(self.end_date)
     
 
 
@@ -225,3 +499,93 @@ class Leave(models.Model):
 
 
 
+class LeaveBalance(models.Model):
+    """
+    An employee's leave ledger for one category and year: the days they are
+    entitled to, the approved days taken and the days still awaiting a
+    decision. Kept current by home.balances as leaves are applied for,
+    approved, rejected and cancelled, so a balance is one row lookup.
+    """
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_balances')
+    category = models.CharField(max_length=20, choices=Leave.LEAVE_CATEGORY_CHOICES)
+    year = models.PositiveSmallIntegerField()
+    entitled_days = models.DecimalField(max_digits=5, decimal_places=1, default=0)
+    used_days = models.DecimalField(max_digits=5, decimal_places=1, default=0)
+    pending_days = models.DecimalField(max_digits=5, decimal_places=1, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'category', 'year'], name='leave_balance_emp_cat_year_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.employeeId} - {self.category} {self.year}"
+
+    @property
+    def remaining_days(self):
+        return self.entitled_days - self.used_days
+
+
+class SyncOperation(models.Model):
+    """
+    An operation from the mobile app's offline journal, recorded once applied
+    (or rejected as a conflict) so that replaying its key returns the same
+    result instead of running it again.
+    """
+    STATUS_CHOICES = [
+        ('applied', 'Applied'),
+        ('conflict', 'Conflict'),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='sync_operations')
+    key = models.CharField(max_length=64)
+    operation = models.CharField(max_length=30)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    result = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'key'], name='sync_operation_emp_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.employeeId} - {self.operation} ({self.key})"
+
+
+class EmployeeDayState(models.Model):
+    """
+    An employee's attendance for the current day in one row, keyed by the
+    employee, so the check-in/out and break guards read a single primary
+    key instead of querying AttendanceCheck and BreakTimer. Kept current by
+    home.daystate; rebuilt from those tables whenever it is for another day.
+    """
+    STATE_CHOICES = [
+        ('off', 'Not Checked In'),
+        ('checked_in', 'Checked In'),
+        ('on_break', 'On Break'),
+        ('checked_out', 'Checked Out'),
+    ]
+
+    employee = models.OneToOneField(Employee, on_delete=models.CASCADE, primary_key=True, related_name='day_state')
+    # Null when the row is stale
+    day = models.DateField(blank=True, null=True)
+    check_in = models.ForeignKey(AttendanceCheck, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    check_out = models.ForeignKey(AttendanceCheck, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    active_break = models.ForeignKey(BreakTimer, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    break_seconds = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.employee.employeeId} - {self.day} ({self.state})"
+
+    @property
+    def state(self):
+        if self.check_out_id:
+            return 'checked_out'
+        if self.active_break_id:
+            return 'on_break'
+        if self.check_in_id:
+            return 'checked_in'
+        return 'off'
@@ -0,0 +1,121 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from backend.conditional import make_etag
+from task.models import Task
+from .announcements import announcement_version
+from .daystate import get_day_state
+
+
+ONGOING_TASK_STATUSES = ['paused', 'in_progress']
+
+HOME_PAYLOAD_TIMEOUT = getattr(settings, 'HOME_PAYLOAD_CACHE_TIMEOUT', 300)
+
+
+class HomePayload:
+    """
+    Loads everything the home screen needs for one employee in a handful of
+    batched queries. Each group is fetched on first access and reused by
+    every HomeAPISerializer field that needs it.
+    """
+
+    def __init__(self, employee, today=None):
+        self.employee = employee
+        self.today = today or timezone.localdate()
+        self._tasks = None
+        self._day_state = None
+        self._break_timer = None
+        self._break_history = None
+
+    def _load_tasks(self):
+        """Ongoing tasks and today's tasks in one query"""
+        if self._tasks is None:
+            tasks = list(
+                Task.objects.filter(employee=self.employee).filter(
+                    Q(status__in=ONGOING_TASK_STATUSES) | Q(task_assign_time__date=self.today)
+                ).annotate(assigned_day=TruncDate('task_assign_time')).order_by('id')
+            )
+            self._tasks = {
+                'ongoing': [task for task in tasks if task.status in ONGOING_TASK_STATUSES],
+                'today': [task for task in tasks if task.assigned_day == self.today],
+            }
+        return self._tasks
+
+    @property
+    def ongoing_tasks(self):
+        return self._load_tasks()['ongoing']
+
+    @property
+    def today_tasks(self):
+        return self._load_tasks()['today']
+
+    @property
+    def day_state(self):
+        """Today's check-in and check-out, read from the employee's day state row"""
+        if self._day_state is None:
+            self._day_state = get_day_state(self.employee, self.today)
+        return self._day_state
+
+    @property
+    def last_check(self):
+        return self.check_out or self.check_in
+
+    @property
+    def check_in(self):
+        return self.day_state.check_in
+
+    @property
+    def check_out(self):
+        return self.day_state.check_out
+
+    @property
+    def break_timer(self):
+        if self._break_timer is None:
+            self._break_timer = self.employee.break_timers.filter(
+                date=self.today,
+                break_start_time__isnull=False
+            ).order_by('-id').first() or False
+        return self._break_timer or None
+
+    @property
+    def break_history(self):
+        if self._break_history is None:
+            self._break_history = self.employee.break_histories.filter(
+                date=self.today
+            ).order_by('id').first() or False
+        return self._break_history or None
+
+
+def home_payload_key(employee_id, today=None, version=None):
+    # Announcements appear on every home screen, so their version is part of the key
+    today = today or timezone.localdate()
+    if version is None:
+        version = announcement_version()
+    return f"home_payload:{employee_id}:{today.isoformat()}:{version}"
+
+
+def get_cached_home_payload(employee_id):
+    """Cached /api/home/ entry ({'etag', 'data'}) for an employee, or None"""
+    return cache.get(home_payload_key(employee_id))
+
+
+def cache_home_payload(employee_id, data):
+    """Cache a freshly built payload with an ETag hashed from its content"""
+    entry = {
+        'etag': make_etag(json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)),
+        'data': dict(data),
+    }
+    cache.set(home_payload_key(employee_id), entry, HOME_PAYLOAD_TIMEOUT)
+    return entry
+
+
+def invalidate_home_payload(employee_id):
+    """Drop an employee's cached home payload"""
+    if employee_id:
+        cache.delete(home_payload_key(employee_id))
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from task.models import Task
 from .models import *
+from .announcements import active_announcements
+from .payload import HomePayload
+from .utils import parse_date
 from django.utils import timezone
 
 
@@ -21,6 +24,8 @@ class CheckInOutSerializer(serializers.Serializer):
     def validate_check_date(self, value):
         if not value or value.strip() == '':
             raise serializers.ValidationError("Check date is required")
+        if parse_date(value) is None:
+            raise serializers.ValidationError("Enter the check date as YYYY-MM-DD")
         return value
 
     def validate_check_time(self, value):
@@ -57,6 +62,11 @@ class BreakSerializer(serializers.Serializer):
     location = serializers.CharField(required=True)
     date = serializers.CharField(required=True)
 
+    def validate_date(self, value):
+        if parse_date(value) is None:
+            raise serializers.ValidationError("Enter the date as YYYY-MM-DD")
+        return value
+
     def validate(self, data):
         # If break_type is 'other', custom_break_type is required
         if data.get('break_type') == 'other' and not data.get('custom_break_type'):
@@ -73,6 +83,11 @@ class EndBreakSerializer(serializers.Serializer):
     date = serializers.CharField(required=True)
     end_reason = serializers.CharField(required=False, allow_blank=True)    
 
+    def validate_date(self, value):
+        if parse_date(value) is None:
+            raise serializers.ValidationError("Enter the date as YYYY-MM-DD")
+        return value
+
 
 
 
@@ -114,8 +129,9 @@ class LeaveDashboardSerializer(serializers.Serializer):
 
     leave_requests = LeaveHistorySerializer(many=True)
 
-    # Leave history (all leaves)
+    # Leave history (one page, follow leave_history_next for more)
     leave_history = LeaveHistorySerializer(many=True)
+    leave_history_next = serializers.CharField(allow_null=True)
     
     class Meta:
         fields = [
@@ -125,7 +141,8 @@ class LeaveDashboardSerializer(serializers.Serializer):
             'leave_taken_this_month',
             'annual_leave_taken',
             'leave_requests',
-            'leave_history'
+            'leave_history',
+            'leave_history_next'
         ]
 
 
@@ -283,6 +300,24 @@ class TaskSerializer(serializers.ModelSerializer):
 
 
 
+class BreakTimerSerializer(serializers.ModelSerializer):
+    break_type_display = serializers.CharField(source='display_break_type', read_only=True)
+
+    class Meta:
+        model = BreakTimer
+        fields = [
+            'id',
+            'break_type',
+            'break_type_display',
+            'duration',
+            'break_start_time',
+            'break_end_time',
+            'date',
+            'location'
+        ]
+
+
+
 class BreakHistorySerializer(serializers.ModelSerializer):
     number_of_extended_breaks = serializers.IntegerField(source='number_of_scheduled_breaks')
     
@@ -325,6 +360,12 @@ class HomeAPISerializer(serializers.ModelSerializer):
             'company_announcement_details'
         ]
 
+    def _payload(self, obj):
+        """Batched loader shared by every field below"""
+        if getattr(self, '_home_payload', None) is None:
+            self._home_payload = HomePayload(obj)
+        return self._home_payload
+
     def get_notification_count(self, obj):
         if hasattr(obj, 'notifications'):
             return obj.notifications.filter(is_read=False).count()
@@ -332,48 +373,27 @@ class HomeAPISerializer(serializers.ModelSerializer):
 
     def get_ongoing_task(self, obj):
         """Returns True if there are any ongoing tasks, False otherwise"""
-        ongoing_tasks = obj.tasks.filter(
-            status__in=['paused', 'in_progress']
-        )
-        return ongoing_tasks.exists()
+        return bool(self._payload(obj).ongoing_tasks)
 
     def get_ongoing_tasks(self, obj):
-        ongoing_tasks = obj.tasks.filter(
-            status__in=['paused', 'in_progress']
-        )
-        return TaskSerializer(ongoing_tasks, many=True).data
+        return TaskSerializer(self._payload(obj).ongoing_tasks, many=True).data
 
     def get_break_timer(self, obj):
-        today = timezone.now().date()
-        current_break = obj.break_timers.filter(
-            date=today,
-            break_start_time__isnull=False
-        ).last()
+        current_break = self._payload(obj).break_timer
         return BreakTimerSerializer(current_break).data if current_break else None
 
     def get_break_history(self, obj):
-        today = timezone.now().date()
-        break_history = obj.break_histories.filter(date=today).first()
+        break_history = self._payload(obj).break_history
         return BreakHistorySerializer(break_history).data if break_history else None
 
     def get_status_of_check(self, obj):
-        today = timezone.now().date()
-        # Updated to use check_date field instead of check_time__date
-        last_check = obj.attendance_checks.filter(
-            check_date=today
-        ).order_by('-created_at').first()  # Using created_at for ordering
-        
+        last_check = self._payload(obj).last_check
         return last_check.check_type if last_check else "out"
 
     def get_check_in_out_time(self, obj):
-        today = timezone.now().date()
-        # Updated to use check_date field
-        today_checks = obj.attendance_checks.filter(
-            check_date=today
-        ).order_by('created_at')  # Using created_at for ordering
-        
-        check_in = today_checks.filter(check_type='in').first()
-        check_out = today_checks.filter(check_type='out').last()
+        payload = self._payload(obj)
+        check_in = payload.check_in
+        check_out = payload.check_out
         
         return {
             'check_in': {
@@ -390,15 +410,11 @@ class HomeAPISerializer(serializers.ModelSerializer):
         }
 
     def get_total_no_of_tasks_today(self, obj):
-        today = timezone.now().date()
-        return obj.tasks.filter(task_assign_time__date=today).count()
+        return len(self._payload(obj).today_tasks)
 
     def get_tasks(self, obj):
-        today = timezone.now().date()
-        today_tasks = obj.tasks.filter(task_assign_time__date=today)
-        
         tasks_data = []
-        for task in today_tasks:
+        for task in self._payload(obj).today_tasks:
             task_data = {
                 'type_of_task': task.task_type,
                 'heading': task.heading,
@@ -410,14 +426,20 @@ class HomeAPISerializer(serializers.ModelSerializer):
         return tasks_data
 
     def get_company_announcement_details(self, obj):
-        announcements = CompanyAnnouncement.objects.filter(
-            is_active=True
-        ).order_by('-date')[:3]
-        return CompanyAnnouncementSerializer(announcements, many=True).data
+        return active_announcements()['announcements'][:3]
 
 
     
 
 
 
+class SyncOperationSerializer(serializers.Serializer):
+    key = serializers.CharField(max_length=64)
+    op = serializers.ChoiceField(choices=[
+        'check_in', 'check_out', 'start_break', 'end_break', 'start_task', 'save_progress',
+    ])
+    data = serializers.DictField()
+
 
+class SyncJournalSerializer(serializers.Serializer):
+    operations = SyncOperationSerializer(many=True, allow_empty=False, max_length=200)
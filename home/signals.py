@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from authapp.models import Employee
+from task.models import Task
+from .models import AttendanceCheck, BreakHistory, BreakTimer, CompanyAnnouncement, Leave
+from .announcements import rebuild_announcement_cache
+from .payload import invalidate_home_payload
+from .daystate import mark_stale
+from .balances import LEDGER_FIELDS, ledger_snapshot, record_change
+
+
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=AttendanceCheck)
+@receiver([post_save, post_delete], sender=BreakTimer)
+@receiver([post_save, post_delete], sender=BreakHistory)
+def invalidate_employee_home(sender, instance, **kwargs):
+    employee_id = instance.employee_id
+    transaction.on_commit(lambda: invalidate_home_payload(employee_id))
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_profile_home(sender, instance, **kwargs):
+    employee_id = instance.pk
+    transaction.on_commit(lambda: invalidate_home_payload(employee_id))
+
+
+@receiver([post_save, post_delete], sender=CompanyAnnouncement)
+def refresh_announcements(sender, instance, **kwargs):
+    transaction.on_commit(rebuild_announcement_cache)
+
+
+@receiver([post_save, post_delete], sender=AttendanceCheck)
+@receiver([post_save, post_delete], sender=BreakTimer)
+def mark_day_state_stale(sender, instance, **kwargs):
+    # Writes through home.daystate keep the row current themselves
+    if not getattr(instance, '_day_state_tracked', False):
+        mark_stale(instance.employee_id)
+
+
+@receiver(pre_save, sender=Leave)
+def snapshot_leave(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Saves that can't change the leave's ledger entry skip the lookup
+    instance._ledger_tracked = not raw and (update_fields is None or bool(LEDGER_FIELDS & set(update_fields)))
+    instance._ledger_before = None
+    if instance._ledger_tracked and not instance._state.adding:
+        instance._ledger_before = ledger_snapshot(instance.pk)
+
+
+@receiver(post_save, sender=Leave)
+def record_leave_saved(sender, instance, **kwargs):
+    if getattr(instance, '_ledger_tracked', False):
+        record_change(instance._ledger_before, instance)
+        instance._ledger_before = None
+
+
+@receiver(post_delete, sender=Leave)
+def record_leave_deleted(sender, instance, **kwargs):
+    record_change(instance, None)
@@ -0,0 +1,247 @@
+"""
+Replay of the mobile app's offline journal.
+
+Technicians queue check-ins, breaks, task starts and progress saves while
+out of coverage and send them to /api/sync/ in order once back online. The
+journal is applied in one transaction. Attendance and break operations go
+through the same EmployeeDayState lock and guards as the endpoints
+(home.daystate), so a replay and a live check-in are serialised on the
+employee's row and can't both pass the guard. The row stays locked until
+the journal commits.
+
+Each operation carries a client-generated key. Applied operations and
+conflicts are recorded under that key, so a journal resent after a dropped
+response reports the earlier results instead of applying anything twice.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from task.models import Task
+from task.progress import save_progress
+from task.serializers import SaveProgressBatchItemSerializer, StartTaskSyncSerializer
+from .breaks import record_break
+from .daystate import check_in_error, check_out_error, end_break_error, lock_day_state, start_break_error, track
+from .models import AttendanceCheck, BreakTimer, SyncOperation
+from .serializers import BreakSerializer, CheckInOutSerializer, EndBreakSerializer
+from .utils import parse_date
+
+
+class SyncConflict(Exception):
+    """The operation no longer fits the employee's state, e.g. a second check-in"""
+
+
+class JournalState:
+    """The employee and the tasks touched by one journal"""
+
+    def __init__(self, employee, payloads):
+        self.employee = employee
+        task_ids = {data['task_id'] for data in payloads if 'task_id' in data}
+        self.tasks = Task.objects.filter(employee=employee, id__in=task_ids).in_bulk() if task_ids else {}
+
+    def day_state(self, day):
+        """The employee's EmployeeDayState for day (a date string), locked"""
+        return lock_day_state(self.employee, parse_date(day))
+
+    def task(self, task_id):
+        try:
+            return self.tasks[task_id]
+        except KeyError:
+            raise SyncConflict("Task not found")
+
+
+def _guard(error):
+    if error:
+        raise SyncConflict(error)
+
+
+def _check_in(state, data):
+    check_date = data['check_date']
+    day_state = state.day_state(check_date)
+    _guard(check_in_error(day_state))
+
+    reason = data.get('reason')
+    reason_to_store = reason if reason and str(reason).strip() != '' else None
+    checkin = track(AttendanceCheck(
+        employee=state.employee,
+        check_type='in',
+        check_date=check_date,
+        check_time=data['check_time'],
+        time_zone=data['time_zone'],
+        location=data['location'],
+        reason=reason_to_store,
+    ))
+    checkin.save()
+    day_state.check_in = checkin
+    day_state.save(update_fields=['check_in', 'updated_at'])
+    return {
+        "message": "Checked in successfully",
+        "check_id": checkin.id,
+        "check_date": checkin.check_date,
+        "check_time": checkin.check_time,
+        "reason_provided": reason_to_store is not None,
+    }
+
+
+def _check_out(state, data):
+    check_date = data['check_date']
+    day_state = state.day_state(check_date)
+    _guard(check_out_error(day_state))
+
+    checkout = track(AttendanceCheck(
+        employee=state.employee,
+        check_type='out',
+        check_date=check_date,
+        check_time=data['check_time'],
+        time_zone=data['time_zone'],
+        location=data['location'],
+        reason=data['reason'],
+    ))
+    checkout.save()
+    day_state.check_out = checkout
+    day_state.save(update_fields=['check_out', 'updated_at'])
+    return {
+        "message": "Checked out successfully",
+        "check_id": checkout.id,
+        "check_date": checkout.check_date,
+        "check_time": checkout.check_time,
+    }
+
+
+def _start_break(state, data):
+    today = data['date']
+    day_state = state.day_state(today)
+    _guard(start_break_error(day_state))
+
+    active_break = track(BreakTimer(
+        employee=state.employee,
+        break_type=data['break_type'],
+        custom_break_type=data.get('custom_break_type') if data['break_type'] == 'other' else None,
+        duration=data['duration'],
+        break_start_time=data['break_start_time'],
+        date=today,
+        location=data['location'],
+    ))
+    active_break.save()
+    day_state.active_break = active_break
+    day_state.save(update_fields=['active_break', 'updated_at'])
+    return {"message": "Break started successfully", "break_id": active_break.id}
+
+
+def _end_break(state, data):
+    day_state = state.day_state(data['date'])
+    _guard(end_break_error(day_state))
+
+    active_break = day_state.active_break
+    reason = data.get('end_reason')
+    active_break.break_end_time = data['break_end_time']
+    active_break.end_reason = reason.strip() if reason and reason.strip() else None
+    active_break.location = data['location']
+    track(active_break).save()
+
+    day_state.active_break = None
+    day_state.break_seconds += record_break(active_break)
+    day_state.save(update_fields=['active_break', 'break_seconds', 'updated_at'])
+    return {"message": "Break ended successfully", "break_id": active_break.id}
+
+
+def _start_task(state, data):
+    task = state.task(data['task_id'])
+    if task.status == 'in_progress':
+        raise SyncConflict("Task is already in progress")
+    if task.status in ['completed', 'delivered']:
+        raise SyncConflict(f"Cannot start task that is already {task.status}")
+
+    task.status = 'in_progress'
+    # Keep the time the technician actually started, not the time of the sync
+    task.task_start_time = data.get('task_start_time') or timezone.now()
+    task.save()
+    return {"message": "task started", "task_id": task.id}
+
+
+def _save_progress(state, data):
+    task = state.task(data['task_id'])
+    completed = save_progress(task, data)
+    return {"message": "task completed" if completed else "saved progress", "task_id": task.id}
+
+
+# op name -> (serializer class, serializer context, handler)
+OPERATIONS = {
+    'check_in': (CheckInOutSerializer, {'is_checkout': False}, _check_in),
+    'check_out': (CheckInOutSerializer, {'is_checkout': True}, _check_out),
+    'start_break': (BreakSerializer, {}, _start_break),
+    'end_break': (EndBreakSerializer, {}, _end_break),
+    'start_task': (StartTaskSyncSerializer, {}, _start_task),
+    'save_progress': (SaveProgressBatchItemSerializer, {}, _save_progress),
+}
+
+
+def _result(operation, status, **extra):
+    return {"key": operation['key'], "op": operation['op'], "status": status, **extra}
+
+
+def apply_journal(employee, operations):
+    """
+    Apply a validated journal (SyncJournalSerializer data) in order, in one
+    transaction. Returns one result per operation:
+
+    applied   -- done; "data" holds what the matching endpoint reports
+    conflict  -- skipped because it no longer fits, with the endpoint's "error"
+    invalid   -- skipped because its data failed validation, with "errors"
+    duplicate -- the key was seen before; the earlier result is returned
+
+    Conflicts and invalid operations don't stop the rest of the journal.
+    """
+    keys = [operation['key'] for operation in operations]
+    seen = {
+        entry.key: entry
+        for entry in SyncOperation.objects.filter(employee=employee, key__in=keys)
+    }
+
+    # Validate everything first so the tasks are loaded from parsed values
+    prepared = []
+    for operation in operations:
+        if operation['key'] in seen:
+            prepared.append((operation, None, None))
+            continue
+        serializer_class, context, _ = OPERATIONS[operation['op']]
+        serializer = serializer_class(data=operation['data'], context=context)
+        if serializer.is_valid():
+            prepared.append((operation, serializer.validated_data, None))
+        else:
+            prepared.append((operation, None, serializer.errors))
+
+    results, records = [], []
+    with transaction.atomic():
+        state = JournalState(employee, [data for _, data, _ in prepared if data is not None])
+        for operation, data, errors in prepared:
+            previous = seen.get(operation['key'])
+            if previous is not None:
+                results.append(_result(operation, 'duplicate', original=previous.result))
+                continue
+            if errors is not None:
+                results.append(_result(operation, 'invalid', errors=errors))
+                continue
+
+            handler = OPERATIONS[operation['op']][2]
+            try:
+                with transaction.atomic():
+                    result = _result(operation, 'applied', data=handler(state, data))
+            except SyncConflict as e:
+                result = _result(operation, 'conflict', error=str(e))
+            except IntegrityError:
+                # A unique constraint caught a concurrent request the state didn't see
+                result = _result(operation, 'conflict', error="Conflicts with a change made at the same time")
+
+            results.append(result)
+            entry = SyncOperation(
+                employee=employee,
+                key=operation['key'],
+                operation=operation['op'],
+                status=result['status'],
+                result=result,
+            )
+            seen[operation['key']] = entry
+            records.append(entry)
+
+        SyncOperation.objects.bulk_create(records)
+    return results
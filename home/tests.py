@@ -1,3 +1,466 @@
-from django.test import TestCase
+import importlib
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from authapp.models import Employee
+from .daystate import get_day_state, lock_day_state, track
+from .models import AttendanceCheck, BreakTimer, EmployeeDayState, Leave, LeaveBalance, SyncOperation
+
+DAY = date(2031, 3, 4)
+
+
+class DayStateTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(employeeId='DAY1', email='day1@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def check(self, name, **data):
+        body = {
+            'check_date': DAY.isoformat(),
+            'check_time': '09:00',
+            'time_zone': 'Asia/Dubai',
+            'location': 'Office',
+            'reason': 'Done',
+            **data,
+        }
+        return self.client.post(reverse(name), body, format='json')
+
+    def start_break(self, **data):
+        body = {
+            'break_type': 'lunch',
+            'duration': '30',
+            'break_start_time': '12:00',
+            'location': 'Office',
+            'date': DAY.isoformat(),
+            **data,
+        }
+        return self.client.post(reverse('start-break'), body, format='json')
+
+
+class CheckInOutTests(DayStateTestCase):
+
+    def test_double_check_in(self):
+        self.assertEqual(self.check('checkin').status_code, 201)
+        response = self.check('checkin', check_time='09:05')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "Already checked in today"})
+        self.assertEqual(AttendanceCheck.objects.filter(employee=self.employee, check_type='in').count(), 1)
+
+    def test_double_check_in_spelt_another_way(self):
+        self.assertEqual(self.check('checkin').status_code, 201)
+        response = self.check('checkin', check_date='04 Mar 2031')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "Already checked in today"})
+
+    def test_check_out_without_check_in(self):
+        response = self.check('checkout')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "You need to check in first"})
+        self.assertFalse(AttendanceCheck.objects.filter(employee=self.employee).exists())
+
+    def test_check_out_with_an_open_break(self):
+        self.check('checkin')
+        self.start_break()
+        response = self.check('checkout')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "Please end your break before checking out"})
+
+
+class BreakTests(DayStateTestCase):
+
+    def test_break_needs_a_check_in(self):
+        response = self.start_break()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "You need to check in first"})
+
+    def test_break_with_one_already_open(self):
+        self.check('checkin')
+        self.assertEqual(self.start_break().status_code, 201)
+        response = self.start_break(break_type='coffee', break_start_time='12:10')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "You already have an active break"})
+        self.assertEqual(BreakTimer.objects.filter(employee=self.employee).count(), 1)
+
+    def test_end_break_adds_its_time(self):
+        self.check('checkin')
+        self.start_break()
+        body = {'break_end_time': '12:30', 'location': 'Office', 'date': DAY.isoformat()}
+        self.assertEqual(self.client.post(reverse('end-break'), body, format='json').status_code, 200)
+        state = get_day_state(self.employee, DAY)
+        self.assertIsNone(state.active_break)
+        self.assertEqual(state.break_seconds, 30 * 60)
+
+
+class StaleDayStateTests(DayStateTestCase):
+
+    def make_rows(self):
+        # Written outside the endpoints, as the admin or a sync would
+        check_in = AttendanceCheck.objects.create(
+            employee=self.employee, check_type='in', check_date=DAY.isoformat(),
+            check_time='09:00', time_zone='Asia/Dubai',
+        )
+        BreakTimer.objects.create(
+            employee=self.employee, break_type='coffee', date=DAY.isoformat(),
+            break_start_time='10:00', break_end_time='10:15',
+        )
+        open_break = BreakTimer.objects.create(
+            employee=self.employee, break_type='lunch', date=DAY.isoformat(), break_start_time='12:00',
+        )
+        return check_in, open_break
+
+    def test_outside_writes_mark_the_row_stale(self):
+        lock_day_state(self.employee, DAY)
+        self.make_rows()
+        self.assertIsNone(EmployeeDayState.objects.get(pk=self.employee.pk).day)
+
+    def test_stale_row_is_rebuilt_from_the_rows(self):
+        check_in, open_break = self.make_rows()
+        EmployeeDayState.objects.filter(pk=self.employee.pk).update(day=None)
+
+        state = get_day_state(self.employee, DAY)
+        self.assertEqual(state.day, DAY)
+        self.assertEqual(state.check_in, check_in)
+        self.assertIsNone(state.check_out)
+        self.assertEqual(state.active_break, open_break)
+        self.assertEqual(state.break_seconds, 15 * 60)
+
+    def test_row_from_another_day_is_rebuilt(self):
+        self.make_rows()
+        lock_day_state(self.employee, DAY - timedelta(days=1))
+
+        state = get_day_state(self.employee, DAY)
+        self.assertEqual(state.day, DAY)
+        self.assertIsNotNone(state.check_in)
+
+    def test_current_row_is_read_without_a_rebuild(self):
+        self.make_rows()
+        get_day_state(self.employee, DAY)
+        with self.assertNumQueries(1):
+            get_day_state(self.employee, DAY)
+
+    def test_break_closed_outside_the_endpoints(self):
+        _, open_break = self.make_rows()
+        get_day_state(self.employee, DAY)
+        BreakTimer.objects.filter(pk=open_break.pk).update(break_end_time='12:30')
+
+        state = get_day_state(self.employee, DAY)
+        self.assertIsNone(state.active_break)
+        self.assertEqual(state.break_seconds, 45 * 60)
+
+
+class UniqueConstraintTests(DayStateTestCase):
+    """A write the day state guard let through because of a race still gets a 400"""
+
+    def current_state(self):
+        with transaction.atomic():
+            lock_day_state(self.employee, DAY)
+
+    def test_check_in_race(self):
+        self.current_state()
+        # Saved by a racing request after this one read the day state
+        track(AttendanceCheck(
+            employee=self.employee, check_type='in', check_date=DAY.isoformat(),
+            check_time='09:00', time_zone='Asia/Dubai',
+        )).save()
+        response = self.check('checkin')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "Already checked in today"})
+
+    def test_open_break_race(self):
+        self.check('checkin')
+        track(BreakTimer(
+            employee=self.employee, break_type='coffee', date=DAY.isoformat(), break_start_time='10:00',
+        )).save()
+        response = self.start_break()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "You already have an active break"})
+
+    def test_same_leave_application_twice(self):
+        data = {'category': 'annual', 'start_date': '2031-04-01', 'end_date': '2031-04-02', 'total_days': '2'}
+        self.assertEqual(self.client.post(reverse('leave-apply'), data).status_code, 201)
+        response = self.client.post(reverse('leave-apply'), data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], "You already have a pending application for these dates")
+        self.assertEqual(Leave.objects.filter(employee=self.employee).count(), 1)
+
+
+class DedupeMigrationTests(TestCase):
+    """The duplicates 0012 clears before 0013 builds the unique constraints"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(employeeId='DUP1', email='dup1@example.com')
+
+    def setUp(self):
+        # Back to the schema 0012 ran against; rolled back with the test
+        with connection.cursor() as cursor:
+            cursor.execute('ALTER TABLE "home_attendancecheck" DROP CONSTRAINT "attendance_emp_date_type_uniq"')
+            cursor.execute('DROP INDEX "break_open_emp_date_uniq"')
+            cursor.execute('DROP INDEX "leave_pending_application_uniq"')
+
+    def dedupe(self):
+        migration = importlib.import_module('home.migrations.0012_dedupe_before_unique_constraints')
+        migration.dedupe(apps, connection.schema_editor())
+
+    def test_first_check_of_each_type_is_kept(self):
+        checks = AttendanceCheck.objects.bulk_create([
+            AttendanceCheck(employee=self.employee, check_type=check_type, check_date='2031-03-04',
+                            check_time=check_time, time_zone='Asia/Dubai')
+            for check_type, check_time in [('in', '09:00'), ('in', '09:01'), ('out', '17:00'), ('out', '17:01')]
+        ])
+        other_day = AttendanceCheck.objects.create(
+            employee=self.employee, check_type='in', check_date='2031-03-05', check_time='09:00', time_zone='Asia/Dubai',
+        )
+        self.dedupe()
+        self.assertCountEqual(
+            AttendanceCheck.objects.values_list('pk', flat=True),
+            [checks[0].pk, checks[2].pk, other_day.pk],
+        )
+
+    def test_first_open_break_is_kept(self):
+        breaks = BreakTimer.objects.bulk_create([
+            BreakTimer(employee=self.employee, break_type='lunch', date='2031-03-04', break_start_time=start)
+            for start in ['12:00', '12:01']
+        ])
+        ended = BreakTimer.objects.create(
+            employee=self.employee, break_type='coffee', date='2031-03-04',
+            break_start_time='10:00', break_end_time='10:15',
+        )
+        self.dedupe()
+        self.assertCountEqual(BreakTimer.objects.values_list('pk', flat=True), [breaks[0].pk, ended.pk])
+
+    def test_later_pending_applications_are_cancelled(self):
+        leaves = Leave.objects.bulk_create([
+            Leave(employee=self.employee, category='annual', start_date='2031-04-01', end_date='2031-04-02',
+                  total_days=2, status=leave_status)
+            for leave_status in ['pending', 'pending', 'pending', 'approved']
+        ])
+        self.dedupe()
+        self.assertEqual(
+            dict(Leave.objects.values_list('pk', 'status')),
+            {leaves[0].pk: 'pending', leaves[1].pk: 'cancelled', leaves[2].pk: 'cancelled', leaves[3].pk: 'approved'},
+        )
+
+
+class LeaveLedgerTests(TestCase):
+    """Balances follow every write to a leave, wherever it is made"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(employeeId='BAL1', email='bal1@example.com')
+
+    def apply(self, **fields):
+        return Leave.objects.create(**{
+            'employee': self.employee,
+            'category': 'annual',
+            'start_date': '2031-04-01',
+            'end_date': '2031-04-03',
+            'total_days': 3,
+            'status': 'pending',
+            **fields,
+        })
+
+    def totals(self, category='annual', year=2031):
+        balance = LeaveBalance.objects.filter(employee=self.employee, category=category, year=year).first()
+        return (balance.used_days, balance.pending_days) if balance else None
+
+    def set_status(self, leave, status):
+        leave.status = status
+        leave.save()
+
+    def test_pending_to_approved(self):
+        leave = self.apply()
+        self.assertEqual(self.totals(), (0, 3))
+        self.set_status(leave, 'approved')
+        self.assertEqual(self.totals(), (3, 0))
+
+    def test_approved_to_cancelled(self):
+        leave = self.apply(status='approved')
+        self.set_status(leave, 'cancelled')
+        self.assertEqual(self.totals(), (0, 0))
+
+    def test_approved_to_rejected(self):
+        leave = self.apply()
+        self.set_status(leave, 'approved')
+        self.set_status(leave, 'rejected')
+        self.assertEqual(self.totals(), (0, 0))
+
+    def test_category_edit_on_an_approved_leave(self):
+        leave = self.apply(status='approved')
+        leave.category = 'sick'
+        leave.save()
+        self.assertEqual(self.totals(), (0, 0))
+        self.assertEqual(self.totals('sick'), (3, 0))
+
+    def test_date_edit_into_another_year(self):
+        leave = self.apply(status='approved')
+        leave.start_date, leave.end_date = '2032-01-05', '2032-01-07'
+        leave.save(update_fields=['start_date', 'end_date'])
+        self.assertEqual(self.totals(), (0, 0))
+        self.assertEqual(self.totals(year=2032), (3, 0))
+
+    def test_days_edit(self):
+        leave = self.apply(status='approved')
+        leave.total_days = 2
+        leave.save()
+        self.assertEqual(self.totals(), (2, 0))
+
+    def test_delete(self):
+        self.apply(status='approved').delete()
+        self.assertEqual(self.totals(), (0, 0))
+
+    def test_saves_that_leave_the_entry_alone(self):
+        leave = self.apply(status='approved')
+        leave.reason = 'Family'
+        leave.save(update_fields=['reason'])
+        leave.save()
+        self.assertEqual(self.totals(), (3, 0))
+
+    def test_rebuild_agrees_with_the_ledger(self):
+        kept = self.apply(status='approved')
+        moved = self.apply(start_date='2031-05-01', end_date='2031-05-02', total_days=2)
+        self.apply(category='sick', start_date='2031-06-01', end_date='2031-06-01', total_days=1)
+        self.set_status(moved, 'approved')
+        kept.category = 'casual'
+        kept.save()
+        self.apply(start_date='2031-07-01', end_date='2031-07-01', total_days=1).delete()
+
+        maintained = set(LeaveBalance.objects.filter(employee=self.employee).values_list(
+            'category', 'year', 'used_days', 'pending_days'
+        ))
+        call_command('rebuild_leave_balances', year=2031, employee='BAL1', stdout=StringIO())
+        rebuilt = set(LeaveBalance.objects.filter(employee=self.employee).values_list(
+            'category', 'year', 'used_days', 'pending_days'
+        ))
+        # The rebuild also makes rows for every configured category; those hold nothing
+        self.assertEqual({row for row in rebuilt if row[2] or row[3]}, {row for row in maintained if row[2] or row[3]})
+        self.assertTrue(maintained <= rebuilt)
+
+    def test_balance_created_before_the_backfill(self):
+        leave = self.apply(status='approved')
+        Leave.objects.filter(pk=leave.pk).update(starts_on=None, ends_on=None)
+        LeaveBalance.objects.all().delete()
+        self.apply(start_date='2031-08-01', end_date='2031-08-01', total_days=1)
+        self.assertEqual(self.totals(), (3, 1))
+
+
+class SyncTests(DayStateTestCase):
+    """The /api/sync/ replay goes through the same day state as the endpoints"""
+
+    CHECK = {'check_date': DAY.isoformat(), 'check_time': '09:00', 'time_zone': 'Asia/Dubai', 'location': 'Office'}
+    BREAK = {'break_type': 'lunch', 'duration': '30', 'break_start_time': '12:00', 'location': 'Office', 'date': DAY.isoformat()}
+    END_BREAK = {'break_end_time': '12:30', 'location': 'Office', 'date': DAY.isoformat()}
+
+    def sync(self, *operations):
+        body = {'operations': [{'key': key, 'op': op, 'data': data} for key, op, data in operations]}
+        response = self.client.post(reverse('sync'), body, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [(result['status'], result.get('error')) for result in response.data['results']]
+
+    def test_replay_of_a_day(self):
+        results = self.sync(
+            ('k1', 'check_in', self.CHECK),
+            ('k2', 'start_break', self.BREAK),
+            ('k3', 'end_break', self.END_BREAK),
+            ('k4', 'check_out', {**self.CHECK, 'check_time': '17:00', 'reason': 'Done'}),
+        )
+        self.assertEqual(results, [('applied', None)] * 4)
+        state = EmployeeDayState.objects.get(pk=self.employee.pk)
+        self.assertEqual(state.day, DAY)
+        self.assertIsNotNone(state.check_out_id)
+        self.assertEqual(state.break_seconds, 30 * 60)
+
+    def test_conflict_with_a_live_check_in(self):
+        self.check('checkin')
+        self.assertEqual(self.sync(('k1', 'check_in', self.CHECK)), [('conflict', "Already checked in today")])
+        self.assertEqual(AttendanceCheck.objects.filter(employee=self.employee).count(), 1)
+
+    def test_live_check_in_after_a_replayed_one(self):
+        self.sync(('k1', 'check_in', self.CHECK))
+        response = self.check('checkin')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "Already checked in today"})
+
+    def test_conflicts_within_a_journal(self):
+        results = self.sync(
+            ('k1', 'start_break', self.BREAK),
+            ('k2', 'check_in', self.CHECK),
+            ('k3', 'check_in', {**self.CHECK, 'check_date': '04 Mar 2031'}),
+            ('k4', 'start_break', self.BREAK),
+            ('k5', 'start_break', self.BREAK),
+            ('k6', 'check_out', {**self.CHECK, 'reason': 'Done'}),
+        )
+        self.assertEqual(results, [
+            ('conflict', "You need to check in first"),
+            ('applied', None),
+            ('conflict', "Already checked in today"),
+            ('applied', None),
+            ('conflict', "You already have an active break"),
+            ('conflict', "Please end your break before checking out"),
+        ])
+
+    def test_duplicate_operations_are_not_applied_again(self):
+        journal = [('k1', 'check_in', self.CHECK), ('k2', 'start_break', self.BREAK)]
+        self.sync(*journal)
+        self.assertEqual(self.sync(*journal), [('duplicate', None), ('duplicate', None)])
+        self.assertEqual(AttendanceCheck.objects.filter(employee=self.employee).count(), 1)
+        self.assertEqual(BreakTimer.objects.filter(employee=self.employee).count(), 1)
+        self.assertEqual(SyncOperation.objects.filter(employee=self.employee).count(), 2)
+
+    def test_duplicate_reports_the_earlier_result(self):
+        self.sync(('k1', 'check_out', {**self.CHECK, 'reason': 'Done'}))
+        response = self.client.post(reverse('sync'), {'operations': [
+            {'key': 'k1', 'op': 'check_out', 'data': {**self.CHECK, 'reason': 'Done'}},
+        ]}, format='json')
+        result = response.data['results'][0]
+        self.assertEqual(result['status'], 'duplicate')
+        self.assertEqual(result['original']['error'], "You need to check in first")
+
+
+class TemporalColumnTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(employeeId='TMP1', email='tmp1@example.com')
+
+    def make_check(self, check_date, check_type='in'):
+        return AttendanceCheck.objects.create(
+            employee=self.employee, check_type=check_type, check_date=check_date,
+            check_time='09:00', time_zone='Asia/Dubai',
+        )
+
+    def test_writes_that_skip_save_keep_the_shadows(self):
+        check = self.make_check(DAY.isoformat())
+        AttendanceCheck.objects.filter(pk=check.pk).update(check_date='05 Mar 2031')
+        check.refresh_from_db()
+        self.assertEqual(check.checked_on, DAY + timedelta(days=1))
+
+        check.check_time = '10:15'
+        check.save(update_fields=['check_time'])
+        check.refresh_from_db()
+        self.assertEqual(check.checked_at.isoformat(), '10:15:00')
+
+    def test_on_date_reads_the_typed_column_after_the_cutover(self):
+        iso = self.make_check(DAY.isoformat())
+        spelt = self.make_check('04 Mar 2031', check_type='out')
+        with override_settings(TEMPORAL_CUTOVER=True):
+            self.assertCountEqual(AttendanceCheck.objects.on_date(DAY), [iso, spelt])
+            self.assertCountEqual(AttendanceCheck.objects.on_dates([DAY]), [iso, spelt])
+        with override_settings(TEMPORAL_CUTOVER=False):
+            self.assertCountEqual(AttendanceCheck.objects.on_date(DAY), [iso])
+
+    def test_ambiguous_slash_dates_are_not_guessed(self):
+        self.assertIsNone(self.make_check('04/03/2031').checked_on)
+        self.assertEqual(self.make_check('25/03/2031', check_type='out').checked_on, date(2031, 3, 25))
@@ -0,0 +1,101 @@
+from datetime import date, datetime, time
+
+from django.utils import timezone
+
+
+DATE_FORMATS = [
+    '%Y-%m-%d',      # "2025-11-10"
+    '%d %B %Y',      # "10 November 2025"
+    '%d-%b-%Y',      # "10-Nov-2025"
+    '%B %d, %Y',     # "November 10, 2025"
+    '%d %b %Y',      # "10 Nov 2025"
+    '%Y/%m/%d',      # "2025/11/10"
+]
+
+# Both readings of a slash date; one that could be either is not guessed at
+SLASH_DATE_FORMATS = [
+    '%d/%m/%Y',      # "25/11/2025"
+    '%m/%d/%Y',      # "11/25/2025"
+]
+
+TIME_FORMATS = [
+    '%H:%M:%S',      # "14:05:09"
+    '%H:%M:%S.%f',   # "14:05:09.123"
+    '%H:%M',         # "14:05"
+    '%I:%M %p',      # "02:05 PM"
+    '%I:%M:%S %p',   # "02:05:09 PM"
+]
+
+
+def parse_date(value):
+    """
+    Parse a stored date string into a date, or None. A slash date whose day
+    and month could be swapped ("04/03/2025") is None rather than a guess.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    readings = set()
+    for date_format in SLASH_DATE_FORMATS:
+        try:
+            readings.add(datetime.strptime(value, date_format).date())
+        except ValueError:
+            continue
+    if readings:
+        return readings.pop() if len(readings) == 1 else None
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def parse_time(value):
+    """Parse a stored time string (or ISO datetime string) into a time, or None"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    value = str(value).strip()
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format).time()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(value).time()
+    except ValueError:
+        return None
+
+
+def combine_datetime(day, value):
+    """
+    Build an aware datetime from a date and a stored time string.
+    Full ISO datetime strings are used as-is.
+    """
+    if not value:
+        return None
+    text = str(value).strip()
+    if len(text) > 10 and text[4:5] == '-':
+        try:
+            parsed = datetime.fromisoformat(text)
+            if parsed.tzinfo is None:
+                parsed = timezone.make_aware(parsed)
+            return parsed
+        except ValueError:
+            pass
+    day = parse_date(day)
+    clock = parse_time(value)
+    if not day or not clock:
+        return None
+    return timezone.make_aware(datetime.combine(day, clock))
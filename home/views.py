@@ -4,8 +4,19 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import AttendanceCheck, BreakHistory, BreakTimer, CompanyAnnouncement, Employee, Leave
+from .models import AttendanceCheck, BreakHistory, BreakTimer, CompanyAnnouncement, Employee, Leave, LeaveBalance
 from .serializers import BreakSerializer, CheckInOutSerializer, CompanyAnnouncementSerializer, DetailedLeaveSerializer, EndBreakSerializer, HomeAPISerializer, LeaveCreateSerializer, LeaveDashboardSerializer, LeaveHistorySerializer
+from .announcements import active_announcements
+from .payload import cache_home_payload, get_cached_home_payload
+from backend.conditional import conditional_get, make_etag, not_modified, queryset_fingerprint, with_etag
+from backend.idempotency import idempotent
+from .balances import get_balance
+from .breaks import record_break
+from .daystate import check_in_error, check_out_error, end_break_error, lock_day_state, start_break_error, track
+from .utils import parse_date
+from django.db import IntegrityError, transaction
+from backend.pagination import KeysetPagination
+from rest_framework.exceptions import NotFound
 from django.shortcuts import get_object_or_404
 
 class HomeAPIView(APIView):
@@ -14,8 +25,14 @@ class HomeAPIView(APIView):
     def get(self, request):
         try:
             employee = request.user
-            serializer = HomeAPISerializer(employee)
-            return Response(serializer.data)
+            cached = get_cached_home_payload(employee.id)
+            if cached is None:
+                cached = cache_home_payload(employee.id, HomeAPISerializer(employee).data)
+
+            response = not_modified(request, cached['etag'])
+            if response is not None:
+                return response
+            return with_etag(Response(cached['data']), cached['etag'])
         except Exception as e:
             return Response(
                 {"error": str(e)}, 
@@ -26,6 +43,7 @@ class HomeAPIView(APIView):
 class CheckInAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         try:
             serializer = CheckInOutSerializer(data=request.data, context={'is_checkout': False})
@@ -37,32 +55,39 @@ class CheckInAPIView(APIView):
             
             employee = request.user
             check_date = serializer.validated_data['check_date']
-
-            existing_checkin = AttendanceCheck.objects.filter(
-                employee=employee,
-                check_type='in',
-                check_date=check_date
-            ).exists()
-            
-            if existing_checkin:
-                return Response(
-                    {"error": "Already checked in today"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
             
             reason = serializer.validated_data.get('reason')
             
             reason_to_store = reason if reason and str(reason).strip() != '' else None
             
-            checkin = AttendanceCheck.objects.create(
-                employee=employee,
-                check_type='in',
-                check_date=check_date,                 
-                check_time=serializer.validated_data['check_time'],
-                time_zone=serializer.validated_data['time_zone'],
-                location=serializer.validated_data['location'],
-                reason=reason_to_store,
-            )
+            # attendance_emp_date_type_uniq backs up the day state guard
+            try:
+                with transaction.atomic():
+                    day_state = lock_day_state(employee, parse_date(check_date))
+                    error = check_in_error(day_state)
+                    if error:
+                        return Response(
+                            {"error": error}, 
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+
+                    checkin = track(AttendanceCheck(
+                        employee=employee,
+                        check_type='in',
+                        check_date=check_date,                 
+                        check_time=serializer.validated_data['check_time'],
+                        time_zone=serializer.validated_data['time_zone'],
+                        location=serializer.validated_data['location'],
+                        reason=reason_to_store,
+                    ))
+                    checkin.save()
+                    day_state.check_in = checkin
+                    day_state.save(update_fields=['check_in', 'updated_at'])
+            except IntegrityError:
+                return Response(
+                    {"error": "Already checked in today"}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
             return Response({
                 "status": "success",
@@ -87,6 +112,7 @@ class CheckInAPIView(APIView):
 class CheckOutAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         try:
             serializer = CheckInOutSerializer(data=request.data, context={'is_checkout': True})
@@ -99,52 +125,35 @@ class CheckOutAPIView(APIView):
             employee = request.user
             check_date = serializer.validated_data['check_date']
 
-            checkin_today = AttendanceCheck.objects.filter(
-                employee=employee,
-                check_type='in',
-                check_date=check_date
-            ).exists()
-            
-            if not checkin_today:
-                return Response(
-                    {"error": "You need to check in first"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            existing_checkout = AttendanceCheck.objects.filter(
-                employee=employee,
-                check_type='out',
-                check_date=check_date
-            ).exists()
-            
-            if existing_checkout:
+            try:
+                with transaction.atomic():
+                    day_state = lock_day_state(employee, parse_date(check_date))
+                    error = check_out_error(day_state)
+                    if error:
+                        return Response(
+                            {"error": error}, 
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+
+                    # Create check-out record WITH reason (mandatory)
+                    checkout = track(AttendanceCheck(
+                        employee=employee,
+                        check_type='out',
+                        check_date=serializer.validated_data['check_date'],
+                        check_time=serializer.validated_data['check_time'],
+                        time_zone=serializer.validated_data['time_zone'],
+                        location=serializer.validated_data['location'],
+                        reason=serializer.validated_data['reason']  
+                    ))
+                    checkout.save()
+                    day_state.check_out = checkout
+                    day_state.save(update_fields=['check_out', 'updated_at'])
+            except IntegrityError:
                 return Response(
                     {"error": "Already checked out today"}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            active_break = BreakTimer.objects.filter(
-                employee=employee,
-                break_end_time__isnull=True
-            ).exists()
-            
-            if active_break:
-                return Response(
-                    {"error": "Please end your break before checking out"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Create check-out record WITH reason (mandatory)
-            checkout = AttendanceCheck.objects.create(
-                employee=employee,
-                check_type='out',
-                check_date=serializer.validated_data['check_date'],
-                check_time=serializer.validated_data['check_time'],
-                time_zone=serializer.validated_data['time_zone'],
-                location=serializer.validated_data['location'],
-                reason=serializer.validated_data['reason']  
-            )
-            
             return Response({
                 "status": "success",
                 "message": "Checked out successfully",
@@ -166,6 +175,7 @@ class CheckOutAPIView(APIView):
 class StartBreakAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         serializer = BreakSerializer(data=request.data)
         if not serializer.is_valid():
@@ -177,36 +187,6 @@ class StartBreakAPIView(APIView):
         employee = request.user
         today = serializer.validated_data['date']
 
-        if not AttendanceCheck.objects.filter(
-            employee=employee,
-            check_date=today,
-            check_type='in'
-        ).exists():
-            return Response(
-                {"error": "You need to check in first"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if AttendanceCheck.objects.filter(
-            employee=employee,
-            check_date=today,
-            check_type='out'
-        ).exists():
-            return Response(
-                {"error": "You have already checked out for today"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if BreakTimer.objects.filter(
-            employee=employee,
-            date=today,
-            break_end_time__isnull=True
-        ).exists():
-            return Response(
-                {"error": "You already have an active break"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
         break_data = {
             'employee': employee,
             'break_type': serializer.validated_data['break_type'],
@@ -219,7 +199,26 @@ class StartBreakAPIView(APIView):
         if serializer.validated_data['break_type'] == 'other':
             break_data['custom_break_type'] = serializer.validated_data.get('custom_break_type')
 
-        BreakTimer.objects.create(**break_data)
+        # break_open_emp_date_uniq backs up the day state guard
+        try:
+            with transaction.atomic():
+                day_state = lock_day_state(employee, parse_date(today))
+                error = start_break_error(day_state)
+                if error:
+                    return Response(
+                        {"error": error},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                active_break = track(BreakTimer(**break_data))
+                active_break.save()
+                day_state.active_break = active_break
+                day_state.save(update_fields=['active_break', 'updated_at'])
+        except IntegrityError:
+            return Response(
+                {"error": "You already have an active break"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response({
             "status": "success",
@@ -230,6 +229,7 @@ class StartBreakAPIView(APIView):
 class EndBreakAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         serializer = EndBreakSerializer(data=request.data)
         if not serializer.is_valid():
@@ -241,33 +241,26 @@ class EndBreakAPIView(APIView):
         employee = request.user
         today = serializer.validated_data['date']
 
-        if AttendanceCheck.objects.filter(
-            employee=employee,
-            check_date=today,
-            check_type='out'
-        ).exists():
-            return Response(
-                {"error": "You have already checked out"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        with transaction.atomic():
+            day_state = lock_day_state(employee, parse_date(today))
+            error = end_break_error(day_state)
+            if error:
+                return Response(
+                    {"error": error},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        active_break = BreakTimer.objects.filter(
-            employee=employee,
-            date=today,
-            break_end_time__isnull=True
-        ).first()
+            active_break = day_state.active_break
 
-        if not active_break:
-            return Response(
-                {"error": "No active break found"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            reason = serializer.validated_data.get('end_reason')
+            active_break.break_end_time = serializer.validated_data['break_end_time']
+            active_break.end_reason = reason.strip() if reason and reason.strip() else None
+            active_break.location = serializer.validated_data['location']
+            track(active_break).save()
 
-        reason = serializer.validated_data.get('end_reason')
-        active_break.break_end_time = serializer.validated_data['break_end_time']
-        active_break.end_reason = reason.strip() if reason and reason.strip() else None
-        active_break.location = serializer.validated_data['location']
-        active_break.save()
+            day_state.active_break = None
+            day_state.break_seconds += record_break(active_break)
+            day_state.save(update_fields=['active_break', 'break_seconds', 'updated_at'])
 
         return Response({
             "status": "success",
@@ -280,18 +273,38 @@ class CompanyAnnouncementListAPIView(APIView):
     
     def get(self, request):
         try:
-            announcements = CompanyAnnouncement.objects.filter(
-                is_active=True
-            ).order_by('-date')
-            
+            cached = active_announcements()
+
+            # The cached list only changes when announcements do, so its ETag
+            # answers revalidation of every page without touching the database
+            etag = make_etag(cached['etag'], request.get_full_path())
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            paginator = KeysetPagination(ordering_field='date')
+            announcements = paginator.paginate_queryset(
+                CompanyAnnouncement.objects.filter(is_active=True),
+                request,
+                view=self
+            )
             serializer = CompanyAnnouncementSerializer(announcements, many=True)
-            
-            return Response({
+
+            return with_etag(Response({
                 'status': 'success',
-                'count': announcements.count(),
-                'announcements': serializer.data
-            })
+                'count': len(cached['announcements']),
+                'announcements': serializer.data,
+                'next': paginator.get_next_link()
+            }), etag)
             
+        except NotFound as e:
+            return Response(
+                {
+                    'status': 'error',
+                    'message': str(e.detail)
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
             return Response(
                 {
@@ -304,11 +317,19 @@ class CompanyAnnouncementListAPIView(APIView):
 
 import pytz
 from datetime import timedelta
-from django.db.models import Q, Sum
+from django.db.models import Q
 
 class LeaveDashboardView(APIView):
     permission_classes = [IsAuthenticated]
+
+    def _validator(self, request):
+        # Entitlements are edited on the balance rows without touching a leave
+        return (
+            queryset_fingerprint(Leave.objects.filter(employee=request.user)) +
+            queryset_fingerprint(LeaveBalance.objects.filter(employee=request.user))
+        )
     
+    @conditional_get(_validator)
     def get(self, request):
         try:
             # Get employee profile from authenticated user
@@ -330,21 +351,11 @@ class LeaveDashboardView(APIView):
         # Get all leaves for the employee
         all_leaves = Leave.objects.filter(employee=employee)
         
-        # 1. Calculate days left (assuming 30 days total vacation)
-        total_vacation_days = 30  # This could be configured per employee
-        
-        # Calculate used vacation days (only approved leaves)
-        approved_leaves = all_leaves.filter(
-            status='approved',
-            category='annual'  
-        )
-        print(approved_leaves, "approved")
-        used_vacation_days = approved_leaves.aggregate(
-            total=Sum('total_days')
-        )['total'] or 0
-        print(used_vacation_days, "vacation")
-        days_left = total_vacation_days - used_vacation_days
-        print(days_left, "vacation")
+        # 1. Days left this year, from the employee's annual leave balance
+        balance = get_balance(employee.id, 'annual', now_dubai.year)
+        total_vacation_days = balance.entitled_days
+        used_vacation_days = balance.used_days
+        days_left = balance.remaining_days
 
         # 2. Calculate leave taken this month (all categories, approved only)
         leave_this_month = all_leaves.filter(
@@ -366,11 +377,16 @@ class LeaveDashboardView(APIView):
             status='pending'
         ).order_by('-created_at')[:5]
         
-        # 5. Get all leave history
+        # 5. Get one page of leave history, newest first
         # Show only APPROVED, REJECTED, or CANCELLED leaves in history (not pending)
-        all_history = all_leaves.filter(
-            Q(status='approved') | Q(status='rejected') | Q(status='cancelled')
-        ).order_by('-created_at')
+        paginator = KeysetPagination()
+        all_history = paginator.paginate_queryset(
+            all_leaves.filter(
+                Q(status='approved') | Q(status='rejected') | Q(status='cancelled')
+            ),
+            request,
+            view=self
+        )
         
         # Serialize the data
         dashboard_data = {
@@ -380,7 +396,8 @@ class LeaveDashboardView(APIView):
             'leave_taken_this_month': leave_taken_this_month_count,
             'annual_leave_taken': annual_leave_taken_count,
             'leave_requests': recent_requests,  # Only pending
-            'leave_history': all_history  # Only non-pending (approved/rejected/cancelled)
+            'leave_history': all_history,  # Only non-pending (approved/rejected/cancelled)
+            'leave_history_next': paginator.get_next_link()
         }
         
         serializer = LeaveDashboardSerializer(dashboard_data)
@@ -435,6 +452,7 @@ class LeaveApplicationView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     
+    @idempotent
     def post(self, request):
         try:
             employee = request.user
@@ -467,10 +485,11 @@ class LeaveApplicationView(APIView):
         if serializer.is_valid():
             # Create the leave application
             try:
-                leave = serializer.save(
-                    employee=employee,
-                    status='pending'  # Default status
-                )
+                with transaction.atomic():
+                    serializer.save(
+                        employee=employee,
+                        status='pending'  # Default status
+                    )
                 
                 return Response({
                     "success": True,
@@ -478,6 +497,12 @@ class LeaveApplicationView(APIView):
                     "next_steps": "Your leave application is pending approval. You will be notified once it's reviewed."
                 }, status=status.HTTP_201_CREATED)
                 
+            except IntegrityError:
+                # leave_pending_application_uniq: the same application is already pending
+                return Response({
+                    "success": False,
+                    "error": "You already have a pending application for these dates"
+                }, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
                 return Response({
                     "success": False,
@@ -504,3 +529,49 @@ class LeaveApplicationView(APIView):
 
 
 
+from .serializers import SyncJournalSerializer
+from .sync import apply_journal
+
+
+class SyncAPIView(APIView):
+    """
+    Replays the mobile app's offline journal: check-ins and outs, break
+    start and end, task start and progress saves, in order and in one
+    transaction. Each operation reports applied, conflict, invalid or
+    duplicate; see home.sync.apply_journal.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = SyncJournalSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            results = apply_journal(request.user, serializer.validated_data['operations'])
+        except IntegrityError:
+            # Another sync with the same keys committed first; retrying replays its results
+            return Response(
+                {"error": "This journal is already being synced, please retry"},
+                status=status.HTTP_409_CONFLICT
+            )
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        return Response({
+            "status": "success",
+            "applied": counts.get('applied', 0),
+            "conflicts": counts.get('conflict', 0),
+            "invalid": counts.get('invalid', 0),
+            "duplicates": counts.get('duplicate', 0),
+            "results": results,
+        }, status=status.HTTP_200_OK)
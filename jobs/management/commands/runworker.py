@@ -0,0 +1,74 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from jobs.queue import claim, requeue_stale, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs until stopped. Start as many workers as needed; "
+        "SIGTERM or Ctrl-C lets the current job finish before exiting."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sleep', type=float, default=2, help="Seconds to wait between polls when no job is due")
+        parser.add_argument('--burst', action='store_true', help="Exit once no job is due instead of waiting for more")
+        parser.add_argument('--max-jobs', type=int, help="Exit after running this many jobs")
+        parser.add_argument(
+            '--requeue-interval',
+            type=float,
+            default=60,
+            help="Seconds between checks for jobs left running by dead workers"
+        )
+
+    def handle(self, *args, **options):
+        if options['sleep'] <= 0:
+            raise CommandError("--sleep must be positive")
+        if options['max_jobs'] is not None and options['max_jobs'] < 1:
+            raise CommandError("--max-jobs must be at least 1")
+        if options['requeue_interval'] <= 0:
+            raise CommandError("--requeue-interval must be positive")
+
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._stop)
+
+        self.stdout.write(f"Worker {worker} started")
+        done = failed = 0
+        next_requeue = 0
+        while not self.stopping:
+            close_old_connections()
+            # On a timer rather than only when idle, so a dead worker's jobs
+            # are picked up while the queue stays busy
+            if time.monotonic() >= next_requeue:
+                requeued = requeue_stale()
+                next_requeue = time.monotonic() + options['requeue_interval']
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} jobs left running by stopped workers")
+            job = claim(worker)
+            if job is None:
+                if options['burst']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            started = time.monotonic()
+            if run(job):
+                done += 1
+                self.stdout.write(f"{job.name} #{job.pk} done in {time.monotonic() - started:.2f}s")
+            else:
+                failed += 1
+                self.stderr.write(f"{job.name} #{job.pk} failed on attempt {job.attempts} of {job.max_attempts}")
+            if options['max_jobs'] and done + failed >= options['max_jobs']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker} stopped: {done} jobs done, {failed} failed"))
+
+    def _stop(self, signum, frame):
+        self.stopping = True
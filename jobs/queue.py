@@ -0,0 +1,144 @@
+"""
+Database-backed job queue.
+
+Work that shouldn't hold up a request (image renditions and other upload
+post-processing) is registered under a name with @job and queued with
+enqueue(). A queued job is a Job row, so it commits or rolls back with the
+transaction that queued it, and no broker is needed. `manage.py runworker`
+processes run the jobs:
+
+- A worker claims the oldest due job with SELECT ... FOR UPDATE SKIP LOCKED,
+  so any number of workers can share the table without running a job twice.
+- A job whose handler raises is retried after an exponential backoff
+  (JOB_RETRY_DELAY doubled per attempt, capped at JOB_RETRY_MAX_DELAY, with
+  jitter), up to its max_attempts, and then left as 'failed'.
+- A job still 'running' JOB_LOCK_TIMEOUT seconds after it was claimed
+  belongs to a worker that died, and is queued again (or failed, when it
+  has no attempts left). A worker that was only slow finds on finishing
+  that the job is no longer its own, and leaves it to the next claim.
+
+Handlers take the job's payload as keyword arguments, so payloads must be
+JSON: ids and names rather than model instances. A handler may run more
+than once for the same job and should be safe to repeat.
+
+With JOBS_EAGER on (local development), enqueue() runs the handler in the
+request once its transaction commits, and no worker is needed.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# {name: (handler, max_attempts)}
+HANDLERS = {}
+
+
+def job(name, max_attempts=None):
+    """Register the decorated function as the handler for jobs called name"""
+    def decorator(handler):
+        if name in HANDLERS:
+            raise ValueError(f"A job named '{name}' is already registered")
+        HANDLERS[name] = (handler, max_attempts or settings.JOB_MAX_ATTEMPTS)
+        return handler
+    return decorator
+
+
+def enqueue(name, payload=None, delay=None):
+    """
+    Queue a run of the name job with payload. Call inside the transaction
+    that writes what the job needs; the job is only seen once it commits.
+    Returns the Job, or None when JOBS_EAGER runs it in-process instead.
+    """
+    handler, max_attempts = HANDLERS[name]
+    payload = payload or {}
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: handler(**payload))
+        return None
+    run_at = timezone.now() + timedelta(seconds=delay) if delay else timezone.now()
+    return Job.objects.create(name=name, payload=payload, max_attempts=max_attempts, run_at=run_at)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying a job that has failed attempts times"""
+    delay = min(settings.JOB_RETRY_DELAY * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_DELAY)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(worker):
+    """Mark the oldest due job as running for worker and return it, or None when none is due"""
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', run_at__lte=now)
+            .order_by('run_at', 'id')
+            .first()
+        )
+        if claimed is None:
+            return None
+        claimed.status = 'running'
+        claimed.attempts += 1
+        claimed.locked_at = now
+        claimed.locked_by = worker
+        claimed.save(update_fields=['status', 'attempts', 'locked_at', 'locked_by', 'updated_at'])
+    return claimed
+
+
+def _still_claimed(claimed):
+    """The job row, as long as it is still this claim's: not requeued or claimed again since"""
+    return Job.objects.filter(
+        pk=claimed.pk, status='running', locked_by=claimed.locked_by, attempts=claimed.attempts
+    )
+
+
+def run(claimed):
+    """Run a claimed job: delete it when it succeeds, otherwise schedule a retry or fail it. Returns True on success."""
+    owned = _still_claimed(claimed)
+    try:
+        handler, _ = HANDLERS[claimed.name]
+    except KeyError:
+        handler = None
+        error = f"No handler registered for '{claimed.name}'"
+    else:
+        try:
+            handler(**claimed.payload)
+        except Exception:
+            error = traceback.format_exc()
+        else:
+            deleted, _ = owned.delete()
+            if not deleted:
+                logger.warning("Job %s finished after it was requeued; leaving it to its new claim", claimed)
+            return True
+
+    logger.warning("Job %s failed (attempt %s of %s): %s", claimed, claimed.attempts, claimed.max_attempts, error)
+    if handler is not None and claimed.attempts < claimed.max_attempts:
+        outcome = {'status': 'queued', 'run_at': timezone.now() + timedelta(seconds=retry_delay(claimed.attempts))}
+    else:
+        outcome = {'status': 'failed'}
+    if not owned.update(**outcome, locked_at=None, locked_by='', last_error=error, updated_at=timezone.now()):
+        logger.warning("Job %s failed after it was requeued; leaving it to its new claim", claimed)
+    return False
+
+
+def requeue_stale():
+    """
+    Queue again the jobs of workers that died mid-job, or fail them when
+    they have used up their attempts (a job that kills its worker would
+    otherwise loop forever). Returns how many were queued again.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT))
+    released = {'locked_at': None, 'locked_by': '', 'updated_at': now}
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', last_error="Worker stopped while running the job", **released
+    )
+    return stale.update(status='queued', run_at=now, **released)
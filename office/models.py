@@ -37,6 +37,9 @@ class Note(models.Model):
         ordering = ['-created_at']
         verbose_name = "Note"
         verbose_name_plural = "Notes"
+        indexes = [
+            models.Index(fields=['employee', '-created_at', '-id'], name='note_emp_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.employee.employee_name}"
\ No newline at end of file
@@ -6,6 +6,10 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from .models import Note
 from authapp.models import Employee
+from backend.conditional import conditional_get, queryset_fingerprint
+from backend.idempotency import idempotent
+from backend.pagination import KeysetPagination
+from rest_framework.exceptions import NotFound
 from .serializers import (
     NoteSerializer, 
     NoteCreateSerializer, 
@@ -16,14 +20,19 @@ from .serializers import (
 class NoteListView(APIView):
 
     permission_classes = [IsAuthenticated]
+
+    def _validator(self, request):
+        return queryset_fingerprint(Note.objects.filter(employee=request.user))
     
+    @conditional_get(_validator)
     def get(self, request):
         """Get all notes for the authenticated employee"""
         try:
             employee = request.user
             
-            # Get all notes for this employee
-            notes = Note.objects.filter(employee=employee).order_by('-created_at')
+            # One page of this employee's notes, newest first
+            paginator = KeysetPagination()
+            notes = paginator.paginate_queryset(Note.objects.filter(employee=employee), request, view=self)
             
             # Serialize the data
             serializer = NoteSerializer(notes, many=True)
@@ -31,9 +40,15 @@ class NoteListView(APIView):
             return Response({
                 "success": True,
                 "message": "Notes retrieved successfully",
-                "data": serializer.data
+                "data": serializer.data,
+                "next": paginator.get_next_link()
             }, status=status.HTTP_200_OK)
             
+        except NotFound as e:
+            return Response({
+                "success": False,
+                "error": str(e.detail)
+            }, status=status.HTTP_404_NOT_FOUND)
         except Employee.DoesNotExist:
             return Response({
                 "success": False,
@@ -45,6 +60,7 @@ class NoteListView(APIView):
                 "error": f"Error retrieving notes: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @idempotent
     def post(self, request):
         """Create a new note"""
         try:
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ProfileappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'profileapp'
+
+    def ready(self):
+        from backend.images import track_renditions
+        from .models import VehicleIssue
+
+        track_renditions(VehicleIssue, 'vehicle_issue_image')
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking writes on the live table
+    atomic = False
+
+    dependencies = [
+        ('profileapp', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='document',
+            index=models.Index(fields=['document_file', 'visa_details'], name='document_file_visa_idx'),
+        ),
+    ]
@@ -70,6 +70,12 @@ class Document(models.Model):
     )
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Whose document a served file is (backend/media.py)
+            models.Index(fields=['document_file', 'visa_details'], name='document_file_visa_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_document_type_display()} - {self.visa_details.employee.employeeId}"
     
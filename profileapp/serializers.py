@@ -1,6 +1,7 @@
 from datetime import timezone
 from rest_framework import serializers
 from authapp.models import Employee
+from backend.images import rendition_url
 from .models import Document, VehicleIssue, VisaDetails, Vehicle, DailyOdometerReading
 import pytz
 
@@ -21,8 +22,8 @@ class EmployeeProfileSerializer(serializers.ModelSerializer):
         if obj.profile_pic:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.profile_pic.url)
-            return obj.profile_pic.url
+                return request.build_absolute_uri(rendition_url(obj.profile_pic))
+            return rendition_url(obj.profile_pic)
         return None
 
     
@@ -80,8 +81,8 @@ class EmployeePersonalInfoSerializer(serializers.ModelSerializer):
         if obj.profile_pic:  
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.profile_pic.url)  
-            return obj.profile_pic.url  
+                return request.build_absolute_uri(rendition_url(obj.profile_pic, 'medium'))
+            return rendition_url(obj.profile_pic, 'medium')
         return None
 
     def get_emergency_contact_info(self, obj):
@@ -5,7 +5,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
-from home.models import AttendanceCheck
+from home.daystate import get_day_state
 from .models import TemporaryVehicleHistory, Vehicle, VehicleAssignment, VehicleIssue, VisaDetails
 from .serializers import CreateTemporaryVehicleSerializer, DocumentUpdateSerializer, EmployeeInformationSerializer, EmployeePersonalInfoSerializer, EmployeePersonalInfoUpdateSerializer, EmployeeProfileSerializer, ReportVehicleIssueSerializer, VehicleDetailsSerializer, VisaDetailsSerializer
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -160,6 +160,8 @@ from django.utils import timezone
 from .models import DailyOdometerReading
 from datetime import datetime
 import pytz
+from backend.conditional import make_etag, not_modified, queryset_fingerprint, with_etag
+from backend.idempotency import idempotent
 
 class VehicleDetailsAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -221,11 +223,16 @@ class VehicleDetailsAPIView(APIView):
                         defaults={'start_km': 0}
                     )
                 
+                etag = make_etag(*self._validator_parts(request, vehicle_assignment))
+                response = not_modified(request, etag)
+                if response is not None:
+                    return response
+
                 serializer = VehicleDetailsSerializer(
                     vehicle_assignment, 
                     context={'request': request, 'dubai_tz': dubai_tz}
                 )
-                return Response(serializer.data, status=status.HTTP_200_OK)
+                return with_etag(Response(serializer.data, status=status.HTTP_200_OK), etag)
                 
             except VehicleAssignment.DoesNotExist:
                 return Response({
@@ -240,6 +247,21 @@ class VehicleDetailsAPIView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
+    def _validator_parts(self, request, vehicle_assignment):
+        """Everything VehicleDetailsSerializer reads, without serializing it"""
+        parts = [request.get_host(), vehicle_assignment.pk, vehicle_assignment.updated_at]
+        vehicle = vehicle_assignment.vehicle
+        if vehicle:
+            parts.append(vehicle.updated_at)
+            parts.extend(queryset_fingerprint(VehicleIssue.objects.filter(vehicle=vehicle)))
+            parts.extend(
+                DailyOdometerReading.objects.filter(
+                    vehicle=vehicle,
+                    reading_date=timezone.localdate()
+                ).values_list('start_km', 'end_km').first() or ()
+            )
+        return parts
+
     def _save_temporary_vehicle_to_history(self, vehicle_assignment):
         """Save temporary vehicle details to history before clearing"""
         try:
@@ -300,6 +322,7 @@ class VehicleDetailsAPIView(APIView):
 class ReportVehicleIssueAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         try:
             user = request.user
@@ -330,26 +353,16 @@ class ReportVehicleIssueAPIView(APIView):
                     # Check if reported_date is today (in Dubai time)
                     if reported_date == today_dubai:
                         # Check if user has checked in TODAY (Dubai date)
-                        has_checked_in = AttendanceCheck.objects.filter(
-                            employee=user,
-                            check_date=today_dubai,  # Use Dubai date
-                            check_type='in'
-                        ).exists()
+                        day_state = get_day_state(user, today_dubai)
                         
-                        if not has_checked_in:
+                        if not day_state.check_in_id:
                             return Response(
                                 {"success": False, "error": "You need to check in first for today"},
                                 status=status.HTTP_400_BAD_REQUEST
                             )
                         
                         # Check if user has already checked out TODAY (Dubai date)
-                        has_checked_out = AttendanceCheck.objects.filter(
-                            employee=user,
-                            check_date=today_dubai,  # Use Dubai date
-                            check_type='out'
-                        ).exists()
-                        
-                        if has_checked_out:
+                        if day_state.check_out_id:
                             return Response(
                                 {"success": False, "error": "You have already checked out for today"},
                                 status=status.HTTP_400_BAD_REQUEST
@@ -425,6 +438,7 @@ class ReportVehicleDetailsIssueAPIView(APIView):
 class CreateTemporaryVehicleAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         try:
             # Validate incoming data
@@ -460,26 +474,16 @@ class CreateTemporaryVehicleAPIView(APIView):
             # Only check attendance if temporary vehicle starts TODAY
             if start_date == today_dubai:
                 # Check if user has checked in TODAY (Dubai date)
-                has_checked_in = AttendanceCheck.objects.filter(
-                    employee=user,
-                    check_date=today_dubai,  # Use Dubai date
-                    check_type='in'
-                ).exists()
+                day_state = get_day_state(user, today_dubai)
                 
-                if not has_checked_in:
+                if not day_state.check_in_id:
                     return Response(
                         {"success": False, "error": "You need to check in first for today"},
                         status=status.HTTP_400_BAD_REQUEST
                     )
                 
                 # Check if user has already checked out TODAY (Dubai date)
-                has_checked_out = AttendanceCheck.objects.filter(
-                    employee=user,
-                    check_date=today_dubai,  # Use Dubai date
-                    check_type='out'
-                ).exists()
-                
-                if has_checked_out:
+                if day_state.check_out_id:
                     return Response(
                         {"success": False, "error": "You have already checked out for today"},
                         status=status.HTTP_400_BAD_REQUEST
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class TaskConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task'
+
+    def ready(self):
+        from backend.images import track_renditions
+        from .models import ServiceTaskDax, Task, TaskProgressImage
+
+        track_renditions(Task, 'vehicle_image_before', 'vehicle_image_after')
+        track_renditions(ServiceTaskDax, 'invoice_pri_image')
+        track_renditions(TaskProgressImage, 'image')
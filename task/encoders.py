@@ -0,0 +1,272 @@
+from operator import attrgetter
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
+
+from backend.images import stored_rendition_name
+from .models import ServiceTaskDax
+
+
+def _iso(name):
+    get = attrgetter(name)
+
+    def encode(obj):
+        value = get(obj)
+        return value.isoformat() if value else None
+    return encode
+
+
+def _label(name, labels):
+    get = attrgetter(name)
+
+    def encode(obj):
+        value = get(obj)
+        return labels.get(value, value)
+    return encode
+
+
+def _str_id(obj):
+    return str(obj.id)
+
+
+def _employee_id(task):
+    return task.employee.employeeId if task.employee else None
+
+
+def _vehicle_make_model(task):
+    if task.vehicle_details:
+        return task.vehicle_details.split(',')[0].strip()
+    return None
+
+
+def _coating_layers(dax):
+    return dax.coating_layers or []
+
+
+def _coating_layers_display(dax):
+    labels = ServiceTaskDax.COATING_LAYER_LABELS
+    return [labels.get(layer, layer) for layer in dax.coating_layers or []]
+
+
+def _invoice_status_display(dax):
+    value = dax.invoice_status
+    return ServiceTaskDax.INVOICE_STATUS_LABELS.get(value, value) if value else None
+
+
+def _local_base_url(storage):
+    """
+    The MEDIA base URL of a local filesystem storage, or None for any other
+    backend. Joining it to the file name gives the same URL as storage.url()
+    without a urljoin per image.
+    """
+    if isinstance(storage, FileSystemStorage) and storage.base_url.endswith('/'):
+        return storage.base_url
+    return None
+
+
+# Columns that need the request's absolute URL builder are factories,
+# bound once per request in DaxRowEncoder.bind(). Image columns link to the
+# thumbnail rendition; *_original columns and each progress image's
+# 'original' key link to the uploaded file.
+def _invoice_image(absolute_url):
+    def encode(dax):
+        return absolute_url(dax.invoice_pri_image, 'thumb')
+    return encode
+
+
+def _invoice_image_original(absolute_url):
+    def encode(dax):
+        return absolute_url(dax.invoice_pri_image)
+    return encode
+
+
+def _progress_images(absolute_url):
+    def encode(dax):
+        return [
+            {
+                "image": absolute_url(img.image, 'thumb'),
+                "original": absolute_url(img.image),
+                "date": img.created_at.isoformat() if img.created_at else None,
+            }
+            for img in dax.task.progress_images.all()
+        ]
+    return encode
+
+
+TASK_GETTERS = {
+    'id': _str_id,
+    'task_type': attrgetter('task_type'),
+    'status': attrgetter('status'),
+    'due_date': _iso('due_date'),
+    'vehicle_details': attrgetter('vehicle_details'),
+    'vehicle_model': attrgetter('vehicle_model'),
+    'vehicle_year': attrgetter('vehicle_year'),
+    'vehicle_color': attrgetter('vehicle_color'),
+    'customer_name': attrgetter('customer_name'),
+    'address': attrgetter('address'),
+    'priority': attrgetter('priority'),
+    'location': attrgetter('location'),
+    'percentage_completed': attrgetter('percentage_completed'),
+    'heading': attrgetter('heading'),
+    'employee_id': _employee_id,
+    'task_assign_time': _iso('task_assign_time'),
+    'task_start_time': _iso('task_start_time'),
+    'task_completed_date': _iso('task_completed_date'),
+    'description': attrgetter('description'),
+    'task_notes': attrgetter('task_notes'),
+    'icon_type': attrgetter('icon_type'),
+    'is_nothing_task': attrgetter('is_nothing_task'),
+    'created_at': _iso('created_at'),
+    'updated_at': _iso('updated_at'),
+}
+
+DAX_GETTERS = {
+    'id': attrgetter('id'),
+    'id_str': _str_id,
+    'detailing_site': attrgetter('detailing_site'),
+    'detailing_site_display': _label('detailing_site', ServiceTaskDax.DET_SITE_LABELS),
+    'other_site_name': attrgetter('other_site_name'),
+    'service_type': attrgetter('service_type'),
+    'service_type_display': _label('service_type', ServiceTaskDax.SERVICE_LABELS),
+    'tinting_type': attrgetter('tinting_type'),
+    'tinting_percentage': attrgetter('tinting_percentage'),
+    'tinting_custom_text': attrgetter('tinting_custom_text'),
+    'coating_layers': _coating_layers,
+    'coating_layers_display': _coating_layers_display,
+    'ppf_type': attrgetter('ppf_type'),
+    'ppf_custom_text': attrgetter('ppf_custom_text'),
+    'remarks': attrgetter('remarks'),
+    'chassis_no': attrgetter('chassis_no'),
+    'vehicle_make_model': lambda dax: _vehicle_make_model(dax.task),
+    'invoice_status': attrgetter('invoice_status'),
+    'invoice_status_display': _invoice_status_display,
+    'work_location': attrgetter('work_location'),
+    'shared_staff_details': attrgetter('shared_staff_details'),
+    'created_at': _iso('created_at'),
+    'updated_at': _iso('updated_at'),
+}
+
+DAX_URL_GETTERS = {
+    'invoice_pri_image': _invoice_image,
+    'invoice_pri_image_original': _invoice_image_original,
+    'vehicle_progress_image': _progress_images,
+}
+
+
+def _pairs(columns):
+    for column in columns:
+        yield column if isinstance(column, tuple) else (column, column)
+
+
+class DaxRowEncoder:
+    """
+    Turns ServiceTaskDax rows (with their task and progress images) into
+    response dicts. The column layout is checked and resolved to getters
+    once, when declared; bind() adds the per-request URL prefix.
+
+    Columns are given as names, or as (output key, getter name) pairs when
+    the key is served by a different getter (e.g. a string id). The nested
+    task object is written under the 'task' column.
+    """
+
+    def __init__(self, task_columns, dax_columns):
+        self.task_columns = tuple((key, TASK_GETTERS[name]) for key, name in _pairs(task_columns))
+        self.dax_columns = tuple(_pairs(dax_columns))
+        for key, name in self.dax_columns:
+            if name != 'task' and name not in DAX_GETTERS and name not in DAX_URL_GETTERS:
+                raise KeyError(f"Unknown DAX column '{name}'")
+
+    def bind(self, request=None):
+        """An encode(service_dax) function for one request"""
+        prefix = request.build_absolute_uri('/')[:-1] if request is not None else ''
+        base_urls = {}
+
+        def absolute_url(field_file, size=None):
+            if not field_file:
+                return None
+            storage = field_file.storage
+            name = stored_rendition_name(field_file, size) if size else field_file.name
+            try:
+                base_url = base_urls[id(storage)]
+            except KeyError:
+                base_url = base_urls[id(storage)] = _local_base_url(storage)
+            if base_url is None:
+                url = storage.url(name)
+            else:
+                url = base_url + filepath_to_uri(name).lstrip('/')
+            return prefix + url if url.startswith('/') else url
+
+        task_columns = self.task_columns
+
+        def encode_task(dax):
+            task = dax.task
+            return {key: get(task) for key, get in task_columns}
+
+        columns = []
+        for key, name in self.dax_columns:
+            if name == 'task':
+                get = encode_task
+            elif name in DAX_URL_GETTERS:
+                get = DAX_URL_GETTERS[name](absolute_url)
+            else:
+                get = DAX_GETTERS[name]
+            columns.append((key, get))
+        columns = tuple(columns)
+
+        def encode(dax):
+            return {key: get(dax) for key, get in columns}
+        return encode
+
+    def encode_many(self, rows, request=None):
+        encode = self.bind(request)
+        return [encode(row) for row in rows]
+
+
+LIST_TASK_COLUMNS = [
+    'task_type', 'status', 'due_date', 'vehicle_details', 'vehicle_model',
+    'vehicle_year', 'vehicle_color', 'customer_name', 'address', 'priority',
+    'location', 'percentage_completed', 'task_assign_time', 'task_start_time',
+    'task_completed_date', 'description', 'task_notes', 'icon_type',
+    'is_nothing_task',
+]
+
+LIST_DAX_COLUMNS = [
+    'id', 'task', 'detailing_site', 'other_site_name', 'service_type',
+    'tinting_type', 'tinting_percentage', 'tinting_custom_text', 'coating_layers',
+    'ppf_type', 'ppf_custom_text', 'remarks', 'chassis_no', 'vehicle_make_model',
+    'invoice_status', 'invoice_pri_image', 'invoice_pri_image_original',
+    'vehicle_progress_image', 'work_location', 'shared_staff_details',
+    'created_at', 'updated_at',
+]
+
+# ServiceTaskDAXListView rows
+DAX_LIST_ENCODER = DaxRowEncoder(LIST_TASK_COLUMNS, LIST_DAX_COLUMNS)
+
+# ServiceTaskDAXDetailView: task audit fields and choice labels
+DAX_DETAIL_ENCODER = DaxRowEncoder(
+    LIST_TASK_COLUMNS[:12] + ['heading', 'employee_id'] + LIST_TASK_COLUMNS[12:]
+    + ['created_at', 'updated_at'],
+    [
+        'id', 'task', 'detailing_site', 'detailing_site_display', 'other_site_name',
+        'service_type', 'service_type_display', 'tinting_type', 'tinting_percentage',
+        'tinting_custom_text', 'coating_layers', 'coating_layers_display', 'ppf_type',
+        'ppf_custom_text', 'remarks', 'chassis_no', 'vehicle_make_model',
+        'invoice_status', 'invoice_pri_image', 'invoice_pri_image_original',
+        'vehicle_progress_image', 'work_location', 'shared_staff_details',
+        'created_at', 'updated_at',
+    ]
+)
+
+# TaskDetailView for DAX employees: string ids and every choice label
+DAX_TASK_DETAIL_ENCODER = DaxRowEncoder(
+    ['id'] + LIST_TASK_COLUMNS,
+    [
+        ('id', 'id_str'), 'task', 'detailing_site', 'detailing_site_display',
+        'other_site_name', 'service_type', 'service_type_display', 'tinting_type',
+        'tinting_percentage', 'tinting_custom_text', 'coating_layers',
+        'coating_layers_display', 'ppf_type', 'ppf_custom_text', 'remarks',
+        'chassis_no', 'vehicle_make_model', 'invoice_status', 'invoice_status_display',
+        'invoice_pri_image', 'invoice_pri_image_original', 'vehicle_progress_image',
+        'work_location', 'shared_staff_details', 'created_at', 'updated_at',
+    ]
+)
@@ -0,0 +1,151 @@
+"""
+Streaming exports of DAX service records for reporting.
+
+Rows are read with .iterator(chunk_size), which uses a server-side cursor
+on PostgreSQL and prefetches progress images one chunk at a time. Each row
+is encoded and written out before the next chunk is fetched, so memory
+stays flat whatever the size of the export.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from home.utils import parse_date
+from .encoders import DAX_LIST_ENCODER
+from .models import ServiceTaskDax
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Filter name -> (model field, allowed values)
+CHOICE_FILTERS = {
+    'detailing_site': ('detailing_site', ServiceTaskDax.DET_SITE_LABELS),
+    'service_type': ('service_type', ServiceTaskDax.SERVICE_LABELS),
+    'invoice_status': ('invoice_status', ServiceTaskDax.INVOICE_STATUS_LABELS),
+}
+
+
+class ExportFilterError(ValueError):
+    pass
+
+
+def _split(value):
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [v for v in value if v]
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(params):
+    """
+    ServiceTaskDax rows for an export, filtered by params (query params or
+    command options):
+
+    detailing_site, service_type, invoice_status -- comma separated values
+    date_from, date_to -- YYYY-MM-DD, inclusive, on the record's created_at
+
+    Raises ExportFilterError for unknown choices or malformed dates.
+    """
+    queryset = ServiceTaskDax.objects.select_related('task').prefetch_related('task__progress_images')
+
+    for name, (field, labels) in CHOICE_FILTERS.items():
+        values = _split(params.get(name))
+        if not values:
+            continue
+        unknown = [v for v in values if v not in labels]
+        if unknown:
+            raise ExportFilterError(f"Unknown {name}: {', '.join(unknown)}")
+        queryset = queryset.filter(**{f'{field}__in': values})
+
+    # A range on created_at itself, so the created_at index can be used
+    date_from, date_to = params.get('date_from'), params.get('date_to')
+    if date_from:
+        day = parse_date(date_from)
+        if day is None:
+            raise ExportFilterError("date_from must be YYYY-MM-DD")
+        queryset = queryset.filter(created_at__gte=_day_start(day))
+    if date_to:
+        day = parse_date(date_to)
+        if day is None:
+            raise ExportFilterError("date_to must be YYYY-MM-DD")
+        queryset = queryset.filter(created_at__lt=_day_start(day + timedelta(days=1)))
+
+    return queryset.order_by('created_at', 'id')
+
+
+def iter_rows(queryset, request=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Encoded rows, fetched chunk_size at a time"""
+    encode = DAX_LIST_ENCODER.bind(request)
+    for service_dax in queryset.iterator(chunk_size=chunk_size):
+        yield encode(service_dax)
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+# The list layout flattened for spreadsheets: task fields are prefixed
+# with "task_", and list columns are joined with "|"
+CSV_HEADER = [
+    column
+    for key, _ in DAX_LIST_ENCODER.dax_columns
+    for column in (
+        [f'task_{task_key}' for task_key, _ in DAX_LIST_ENCODER.task_columns]
+        if key == 'task' else [key]
+    )
+]
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return '|'.join(
+            _csv_value(item['image'] if isinstance(item, dict) else item) for item in value
+        )
+    return value
+
+
+def flatten_row(row):
+    flat = []
+    for key, value in row.items():
+        if key == 'task':
+            flat.extend(_csv_value(v) for v in value.values())
+        else:
+            flat.append(_csv_value(value))
+    return flat
+
+
+class _Echo:
+    """csv.writer target that hands each line back instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for row in rows:
+        yield writer.writerow(flatten_row(row))
+
+
+def iter_export(queryset, export_format, request=None, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = iter_rows(queryset, request, chunk_size)
+    if export_format == 'csv':
+        return iter_csv(rows)
+    return iter_ndjson(rows)
@@ -0,0 +1,156 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.utils import timezone
+
+from authapp.models import Employee
+from backend.images import rendition_url
+from task.encoders import DAX_LIST_ENCODER
+from task.models import ServiceTaskDax, Task, TaskProgressImage
+
+
+def legacy_list_row(request, service_dax):
+    """The hand-built ServiceTaskDAXListView row this encoder replaced, kept for comparison"""
+    task = service_dax.task
+    progress_images = []
+    for img in task.progress_images.all():
+        progress_images.append({
+            "image": request.build_absolute_uri(rendition_url(img.image)) if img.image else None,
+            "original": request.build_absolute_uri(img.image.url) if img.image else None,
+            "date": img.created_at.isoformat() if img.created_at else None
+        })
+    vehicle_make_model = None
+    if task.vehicle_details:
+        details = task.vehicle_details.split(',')
+        if len(details) >= 1:
+            vehicle_make_model = details[0].strip()
+    task_data = {
+        "task_type": task.task_type,
+        "status": task.status,
+        "due_date": task.due_date.isoformat() if task.due_date else None,
+        "vehicle_details": task.vehicle_details,
+        "vehicle_model": task.vehicle_model,
+        "vehicle_year": task.vehicle_year,
+        "vehicle_color": task.vehicle_color,
+        "customer_name": task.customer_name,
+        "address": task.address,
+        "priority": task.priority,
+        "location": task.location,
+        "percentage_completed": task.percentage_completed,
+        "task_assign_time": task.task_assign_time.isoformat() if task.task_assign_time else None,
+        "task_start_time": task.task_start_time.isoformat() if task.task_start_time else None,
+        "task_completed_date": task.task_completed_date.isoformat() if task.task_completed_date else None,
+        "description": task.description,
+        "task_notes": task.task_notes,
+        "icon_type": task.icon_type,
+        "is_nothing_task": task.is_nothing_task,
+    }
+    return {
+        "id": service_dax.id,
+        "task": task_data,
+        "detailing_site": service_dax.detailing_site,
+        "other_site_name": service_dax.other_site_name,
+        "service_type": service_dax.service_type,
+        "tinting_type": service_dax.tinting_type,
+        "tinting_percentage": service_dax.tinting_percentage,
+        "tinting_custom_text": service_dax.tinting_custom_text,
+        "coating_layers": service_dax.coating_layers or [],
+        "ppf_type": service_dax.ppf_type,
+        "ppf_custom_text": service_dax.ppf_custom_text,
+        "remarks": service_dax.remarks,
+        "chassis_no": service_dax.chassis_no,
+        "vehicle_make_model": vehicle_make_model,
+        "invoice_status": service_dax.invoice_status,
+        "invoice_pri_image": request.build_absolute_uri(rendition_url(service_dax.invoice_pri_image)) if service_dax.invoice_pri_image else None,
+        "invoice_pri_image_original": request.build_absolute_uri(service_dax.invoice_pri_image.url) if service_dax.invoice_pri_image else None,
+        "vehicle_progress_image": progress_images,
+        "work_location": service_dax.work_location,
+        "shared_staff_details": service_dax.shared_staff_details,
+        "created_at": service_dax.created_at.isoformat() if service_dax.created_at else None,
+        "updated_at": service_dax.updated_at.isoformat() if service_dax.updated_at else None
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare rows/sec of the DAX row encoder against the old hand-built dicts on in-memory fixtures"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Number of fixture rows")
+        parser.add_argument('--images', type=int, default=2, help="Progress images per row")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per encoder; the best is reported")
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError("--rows and --repeat must be at least 1")
+
+        rows = self._fixtures(options['rows'], options['images'])
+        request = RequestFactory().get('/api/task/service-task-dax/', SERVER_NAME='localhost')
+
+        legacy = [legacy_list_row(request, row) for row in rows[:50]]
+        if legacy != DAX_LIST_ENCODER.encode_many(rows[:50], request):
+            raise CommandError("Encoder output differs from the legacy rows")
+
+        before = self._best(lambda: [legacy_list_row(request, row) for row in rows], options['repeat'])
+        after = self._best(lambda: DAX_LIST_ENCODER.encode_many(rows, request), options['repeat'])
+
+        count = len(rows)
+        self.stdout.write(f"rows:    {count}")
+        self.stdout.write(f"before:  {count / before:,.0f} rows/sec ({before:.3f}s)")
+        self.stdout.write(f"after:   {count / after:,.0f} rows/sec ({after:.3f}s)")
+        self.stdout.write(self.style.SUCCESS(f"speedup: {before / after:.2f}x"))
+
+    def _best(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def _fixtures(self, count, images):
+        """Unsaved rows with prefetched images, so only encoding is measured"""
+        now = timezone.now()
+        employee = Employee(id=1, employeeId='BENCH')
+        sites = [value for value, _ in ServiceTaskDax.DET_SITES_CHOICES]
+        services = [value for value, _ in ServiceTaskDax.SERVICES_CHOICES]
+        rows = []
+        for i in range(count):
+            task = Task(
+                id=i + 1,
+                employee=employee,
+                task_type='service',
+                heading=f'Service {i}',
+                status='in_progress',
+                vehicle_details='Nissan Patrol, 2022, White',
+                vehicle_model='Patrol',
+                vehicle_year=2022,
+                vehicle_color='White',
+                customer_name='Customer',
+                address='Dubai',
+                location='Al Quoz',
+                due_date=now + timedelta(days=1),
+                task_assign_time=now,
+                task_start_time=now,
+                icon_type='service',
+            )
+            task._prefetched_objects_cache = {
+                'progress_images': [
+                    TaskProgressImage(id=i * images + n, task=task, image=f'task_progress_images/{i}_{n}.jpg', created_at=now)
+                    for n in range(images)
+                ]
+            }
+            rows.append(ServiceTaskDax(
+                id=i + 1,
+                task=task,
+                detailing_site=sites[i % len(sites)],
+                service_type=services[i % len(services)],
+                coating_layers=['1_layer', '2_layer'],
+                invoice_status='invoice_received',
+                invoice_pri_image=f'invoice_pri_images/{i}.jpg',
+                work_location='Workshop',
+                created_at=now,
+                updated_at=now,
+            ))
+        return rows
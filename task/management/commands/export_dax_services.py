@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from task.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, ExportFilterError, export_queryset, iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream DAX service records to a file or stdout as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson', dest='export_format')
+        parser.add_argument('--output', '-o', help="File to write; stdout when omitted")
+        parser.add_argument('--detailing-site', dest='detailing_site', help="Comma separated site codes")
+        parser.add_argument('--service-type', dest='service_type', help="Comma separated service codes")
+        parser.add_argument('--invoice-status', dest='invoice_status', help="Comma separated invoice statuses")
+        parser.add_argument('--date-from', dest='date_from', help="YYYY-MM-DD, inclusive, on created_at")
+        parser.add_argument('--date-to', dest='date_to', help="YYYY-MM-DD, inclusive, on created_at")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per round trip")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        try:
+            queryset = export_queryset(options)
+        except ExportFilterError as e:
+            raise CommandError(str(e))
+
+        export_format = options['export_format']
+        chunks = iter_export(queryset, export_format, chunk_size=options['chunk_size'])
+        if options['output']:
+            # newline='' keeps the csv module's \r\n line endings as written
+            with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+                lines = 0
+                for chunk in chunks:
+                    out.write(chunk)
+                    lines += 1
+            rows = lines - 1 if export_format == 'csv' else lines
+            self.stderr.write(self.style.SUCCESS(f"Wrote {rows} rows to {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
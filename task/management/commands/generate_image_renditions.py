@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from backend.images import TRACKED_FIELDS, generate_renditions, has_renditions
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the thumbnail and medium renditions of images already uploaded to the "
+        "tracked image fields. Files whose renditions all exist are skipped unless --force is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', help="Only this model, as app_label.ModelName (e.g. task.TaskProgressImage)")
+        parser.add_argument('--force', action='store_true', help="Regenerate renditions that already exist")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows read per query")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        tracked = TRACKED_FIELDS
+        if options['model']:
+            tracked = {
+                model: fields for model, fields in TRACKED_FIELDS.items()
+                if model._meta.label_lower == options['model'].lower()
+            }
+            if not tracked:
+                labels = ', '.join(sorted(model._meta.label for model in TRACKED_FIELDS))
+                raise CommandError(f"{options['model']} has no tracked image fields (choose from {labels})")
+
+        for model, fields in tracked.items():
+            generated = skipped = 0
+            has_image = Q()
+            for field in fields:
+                has_image |= Q(**{f'{field}__gt': ''})
+            rows = model.objects.filter(has_image).only('pk', *fields).order_by('pk')
+            for row in rows.iterator(chunk_size=options['batch_size']):
+                for field in fields:
+                    field_file = getattr(row, field)
+                    if not field_file:
+                        continue
+                    if not options['force'] and has_renditions(field_file):
+                        skipped += 1
+                    elif generate_renditions(field_file):
+                        generated += 1
+                    else:
+                        self.stderr.write(f"{model._meta.label} {row.pk}: cannot read {field_file.name}")
+            self.stdout.write(f"{model._meta.label}: {generated} images processed, {skipped} already done")
+
+        self.stdout.write(self.style.SUCCESS("Image renditions complete"))
+
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:49
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('task', '0002_remove_servicetaskdax_vehicle_make_model'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['employee', 'task_assign_time'], name='task_emp_assign_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['employee', 'status'], name='task_emp_status_idx'),
+        ),
+    ]
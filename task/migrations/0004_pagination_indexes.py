@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('task', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='servicetaskdax',
+            index=models.Index(fields=['-created_at', '-id'], name='servicetaskdax_created_idx'),
+        ),
+    ]
@@ -61,6 +61,12 @@ class Task(models.Model):
     is_nothing_task = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee', 'task_assign_time'], name='task_emp_assign_time_idx'),
+            models.Index(fields=['employee', 'status'], name='task_emp_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.employeeId} - {self.heading}"
@@ -204,6 +210,12 @@ class ServiceTaskDax(models.Model):
         ('no', 'No'),
     ]
 
+    # Label lookups built once rather than on every *_display call
+    DET_SITE_LABELS = dict(DET_SITES_CHOICES)
+    SERVICE_LABELS = dict(SERVICES_CHOICES)
+    COATING_LAYER_LABELS = dict(COATING_LAYER_CHOICES)
+    INVOICE_STATUS_LABELS = dict(INVOICE_STATUS_CHOICES)
+
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='service_dax_tasks')
     detailing_site = models.CharField(max_length=50, choices=DET_SITES_CHOICES)
     other_site_name = models.CharField(max_length=255, blank=True, null=True)
@@ -227,20 +239,24 @@ class ServiceTaskDax(models.Model):
     shared_staff_details = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='servicetaskdax_created_idx'),
+        ]
     
     def __str__(self):
         return f"DAX Service - {self.get_service_type_display()} at {self.work_location}"
     
     def get_detailing_site_display(self):
         """Get display name for detailing site"""
-        return dict(self.DET_SITES_CHOICES).get(self.detailing_site, self.detailing_site)
+        return self.DET_SITE_LABELS.get(self.detailing_site, self.detailing_site)
     
     def get_coating_layers_display(self):
         """Get display names for coating layers"""
         if not self.coating_layers:
             return []
-        choices_dict = dict(self.COATING_LAYER_CHOICES)
-        return [choices_dict.get(layer, layer) for layer in self.coating_layers]
+        return [self.COATING_LAYER_LABELS.get(layer, layer) for layer in self.coating_layers]
     
 
 
@@ -0,0 +1,144 @@
+"""
+Progress-save pipeline for SaveTaskProgressAPIView and its batch variant.
+
+All duties referenced by a request are loaded in one query and written back
+with one bulk_update; the task, its duties and any progress image are
+committed together or not at all.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.rollups import schedule_refresh
+from home.payload import invalidate_home_payload
+from .models import Task, TaskDuty, TaskProgressImage
+
+DUTY_UPDATE_FIELDS = ['is_completed', 'completed_at', 'updated_at']
+TASK_UPDATE_FIELDS = ['percentage_completed', 'task_notes', 'status', 'task_completed_date', 'updated_at']
+
+
+def _duty_id(duty_data):
+    """The duty id as an int, None when absent, or False when malformed"""
+    duty_id = duty_data.get('id')
+    if not duty_id:
+        return None
+    try:
+        return int(duty_id)
+    except (TypeError, ValueError):
+        return False
+
+
+def _local_day(value):
+    return timezone.localdate(value) if value else None
+
+
+def load_duties(task_ids, duty_lists):
+    """{(task_id, duty_id): TaskDuty} for every duty referenced by the requests, in one query"""
+    duty_ids = {
+        duty_id
+        for duty_list in duty_lists
+        for duty_id in map(_duty_id, duty_list)
+        if duty_id
+    }
+    if not duty_ids:
+        return {}
+    duties = TaskDuty.objects.filter(task_id__in=task_ids, id__in=duty_ids)
+    return {(duty.task_id, duty.id): duty for duty in duties}
+
+
+def apply_duties(task, duty_list, duties, now):
+    """
+    Set completion on the task's listed duties. Returns the changed duties and
+    whether every listed duty is now complete; unknown duties are skipped.
+    """
+    changed = []
+    all_completed = True
+    for duty_data in duty_list:
+        duty_id = _duty_id(duty_data)
+        if duty_id is None:
+            continue
+        if duty_id is False:
+            all_completed = False
+            continue
+        task_duty = duties.get((task.id, duty_id))
+        if task_duty is None:
+            continue
+
+        is_completed = bool(duty_data.get('is_completed', False))
+        task_duty.is_completed = is_completed
+        # Set completion time if duty is being marked as completed
+        if is_completed and not task_duty.completed_at:
+            task_duty.completed_at = now
+        elif not is_completed:
+            task_duty.completed_at = None
+            all_completed = False
+        task_duty.updated_at = now
+        changed.append(task_duty)
+    return changed, all_completed
+
+
+def apply_progress(task, data, all_completed, now):
+    """Copy the progress fields onto the task; returns True when it is now completed"""
+    task.percentage_completed = data['percentage']
+    task.task_notes = data.get('progress_notes', '') or task.task_notes
+    if all_completed:
+        task.status = 'completed'
+        task.task_completed_date = now
+        task.task_notes = data.get('final_notes', '') or task.task_notes
+    task.updated_at = now
+    return all_completed
+
+
+def save_progress(task, data):
+    """Save one task's progress; returns True when the task was completed"""
+    now = timezone.now()
+    duties = load_duties([task.id], [data['duty_list']])
+    changed, all_completed = apply_duties(task, data['duty_list'], duties, now)
+    completed = apply_progress(task, data, all_completed, now)
+
+    with transaction.atomic():
+        if changed:
+            TaskDuty.objects.bulk_update(changed, DUTY_UPDATE_FIELDS)
+        if data.get('image'):
+            TaskProgressImage.objects.create(task=task, image=data['image'])
+        task.save(update_fields=TASK_UPDATE_FIELDS)
+    return completed
+
+
+def save_progress_batch(employee, items):
+    """
+    Save several tasks' progress in one transaction. items are validated
+    SaveProgressBatchItemSerializer data; every task must belong to employee.
+
+    Returns [(task_id, completed)] in request order, or raises
+    Task.DoesNotExist naming the ids that are missing.
+    """
+    task_ids = [item['task_id'] for item in items]
+    tasks = Task.objects.filter(employee=employee, id__in=task_ids).in_bulk()
+    missing = [task_id for task_id in task_ids if task_id not in tasks]
+    if missing:
+        raise Task.DoesNotExist(f"Tasks not found: {', '.join(map(str, missing))}")
+
+    now = timezone.now()
+    duties = load_duties(task_ids, [item['duty_list'] for item in items])
+    results, changed_duties, images = [], [], []
+    stats_days = {_local_day(task.task_completed_date) for task in tasks.values()}
+    for item in items:
+        task = tasks[item['task_id']]
+        changed, all_completed = apply_duties(task, item['duty_list'], duties, now)
+        changed_duties.extend(changed)
+        results.append((task.id, apply_progress(task, item, all_completed, now)))
+        if item.get('image'):
+            images.append(TaskProgressImage(task=task, image=item['image']))
+
+    with transaction.atomic():
+        if changed_duties:
+            TaskDuty.objects.bulk_update(changed_duties, DUTY_UPDATE_FIELDS)
+        if images:
+            TaskProgressImage.objects.bulk_create(images)
+        Task.objects.bulk_update(tasks.values(), TASK_UPDATE_FIELDS)
+        # bulk_update sends no post_save, so do the signal handlers' work here
+        for task in tasks.values():
+            stats_days.update((_local_day(task.task_assign_time), _local_day(task.task_completed_date)))
+        schedule_refresh(employee.id, stats_days)
+        transaction.on_commit(lambda: invalidate_home_payload(employee.id))
+    return results
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from backend.images import rendition_url
 from .models import ServiceTask, Task, TaskDuty, TaskProgressImage
 
 class TaskListSerializer(serializers.ModelSerializer):
@@ -80,12 +82,20 @@ class DutyListSerializer(serializers.ModelSerializer):
 
 class ProgressImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    original_image_url = serializers.SerializerMethodField()
+    percentage_completed = serializers.IntegerField(source='task.percentage_completed', read_only=True)
     
     class Meta:
         model = TaskProgressImage
-        fields = ['image_url', 'percentage_completed', 'created_at']
+        fields = ['image_url', 'original_image_url', 'percentage_completed', 'created_at']
     
     def get_image_url(self, obj):
+        request = self.context.get('request')
+        if obj.image and request:
+            return request.build_absolute_uri(rendition_url(obj.image))
+        return None
+
+    def get_original_image_url(self, obj):
         request = self.context.get('request')
         if obj.image and request:
             return request.build_absolute_uri(obj.image.url)
@@ -119,6 +129,19 @@ class SaveProgressSerializer(serializers.Serializer):
     final_notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)    
 
 
+class SaveProgressBatchItemSerializer(SaveProgressSerializer):
+    task_id = serializers.IntegerField()
+
+
+class StartTaskSyncSerializer(serializers.Serializer):
+    task_id = serializers.IntegerField()
+    task_start_time = serializers.DateTimeField(required=False)
+
+
+class SaveProgressBatchSerializer(serializers.Serializer):
+    tasks = SaveProgressBatchItemSerializer(many=True, allow_empty=False, max_length=50)
+
+
 
 class PendingTaskSerializer(serializers.ModelSerializer):
     title = serializers.CharField(source='heading')
@@ -1,6 +1,6 @@
 # urls.py
 from django.urls import path
-from .views import PendingTasksAPIView, SaveTaskProgressAPIView, TaskDetailView, TaskListView,StartTaskAPIView,StartTaskDetailsAPIView,ServiceTaskDAXListView
+from .views import PendingTasksAPIView, SaveTaskProgressAPIView, TaskDetailView, TaskListView,StartTaskAPIView,StartTaskDetailsAPIView,ServiceTaskDAXListView,ServiceTaskDAXExportView,SaveTaskProgressBatchAPIView
 
 urlpatterns = [
     path('', TaskListView.as_view(), name='task-list'),
@@ -8,7 +8,9 @@ urlpatterns = [
     path('<int:task_id>/start/', StartTaskAPIView.as_view(), name='start-task'),
     path('<int:task_id>/start-details/', StartTaskDetailsAPIView.as_view(), name='start-task-details'),
     path('<int:task_id>/save-progress/', SaveTaskProgressAPIView.as_view(), name='save-task-progress'),
+    path('save-progress/', SaveTaskProgressBatchAPIView.as_view(), name='save-task-progress-batch'),
     path('pending/', PendingTasksAPIView.as_view(), name='pending-tasks'),
     path('service-task-dax/', ServiceTaskDAXListView.as_view(), name='service-task-dax'),
+    path('service-task-dax/export/', ServiceTaskDAXExportView.as_view(), name='service-task-dax-export'),
 
 ]
\ No newline at end of file
@@ -3,39 +3,47 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.utils import timezone
 from django.db.models import Q
-from .models import Task, TaskDuty, TaskProgressImage
-from .serializers import PendingQueueSerializer, PendingTaskSerializer, SaveProgressSerializer, TaskDetailSerializer, TaskDetailsResponseSerializer, TaskListSerializer
+from .models import Task
+from .serializers import PendingQueueSerializer, PendingTaskSerializer, SaveProgressBatchSerializer, SaveProgressSerializer, TaskDetailSerializer, TaskDetailsResponseSerializer, TaskListSerializer
 from django.shortcuts import get_object_or_404
+from backend.conditional import conditional_get, queryset_fingerprint
+from backend.idempotency import idempotent
+from backend.pagination import KeysetPagination
+from .encoders import DAX_DETAIL_ENCODER, DAX_LIST_ENCODER, DAX_TASK_DETAIL_ENCODER
+from .progress import save_progress, save_progress_batch
+from rest_framework.exceptions import NotFound
 
 class TaskListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+
+    def _get_tasks(self, request):
+        """Today's tasks for the user with the query param filters applied"""
+        today = timezone.now().date()
+        tasks = Task.objects.filter(
+            employee=request.user,
+            task_assign_time__date=today 
+        )
+        
+        status_filter = request.query_params.get('status')
+        task_type_filter = request.query_params.get('task_type')
+        icon_type_filter = request.query_params.get('icon_type')
+        
+        if status_filter:
+            tasks = tasks.filter(status=status_filter)
+        if task_type_filter:
+            tasks = tasks.filter(task_type=task_type_filter)
+        if icon_type_filter:
+            tasks = tasks.filter(icon_type=icon_type_filter)
+        
+        return tasks.order_by('task_assign_time')
+
+    def _validator(self, request):
+        return queryset_fingerprint(self._get_tasks(request))
     
+    @conditional_get(_validator)
     def get(self, request):
         try:
-            today = timezone.now().date()    
-            try:
-                user = request.user
-                tasks = Task.objects.filter(
-                    employee=user,
-                    task_assign_time__date=today 
-                )
-            except AttributeError:
-                return Response({
-                    'tasks': []
-                }, status=status.HTTP_200_OK)
-            
-            status_filter = request.query_params.get('status')
-            task_type_filter = request.query_params.get('task_type')
-            icon_type_filter = request.query_params.get('icon_type')
-            
-            if status_filter:
-                tasks = tasks.filter(status=status_filter)
-            if task_type_filter:
-                tasks = tasks.filter(task_type=task_type_filter)
-            if icon_type_filter:
-                tasks = tasks.filter(icon_type=icon_type_filter)
-            
-            tasks = tasks.order_by('task_assign_time')
+            tasks = self._get_tasks(request)
             
             serializer = TaskListSerializer(tasks, many=True)
             
@@ -93,7 +101,11 @@ class TaskDetailView(APIView):
         """Get task details for DAX company"""
         try:
             # Get related ServiceTaskDax object for this task
-            service_dax = ServiceTaskDax.objects.filter(task=task).first()
+            service_dax = ServiceTaskDax.objects.filter(task=task).select_related(
+                'task'
+            ).prefetch_related(
+                'task__progress_images'
+            ).first()
             print(service_dax,"checking")
             if not service_dax:
                 return Response({
@@ -101,87 +113,7 @@ class TaskDetailView(APIView):
                     'error': 'No DAX service task found for this task'
                 }, status=status.HTTP_404_NOT_FOUND)
             
-            # Get progress images for this task
-            progress_images = []
-            for img in task.progress_images.all():
-                progress_images.append({
-                    "image": request.build_absolute_uri(img.image.url) if img.image else None,
-                    "date": img.created_at.isoformat() if img.created_at else None
-                })
-            
-            # Get vehicle make/model from vehicle_details if available
-            vehicle_make_model = None
-            if task.vehicle_details:
-                try:
-                    details = task.vehicle_details.split(',')
-                    if len(details) >= 1:
-                        vehicle_make_model = details[0].strip()
-                except:
-                    pass
-            
-            # Format dates properly
-            def format_datetime(dt):
-                if dt:
-                    return dt.isoformat()
-                return None
-            
-            def format_date(d):
-                if d:
-                    return d.isoformat()
-                return None
-            
-            # Prepare task object with all fields properly serialized
-            task_data = {
-                "id": str(task.id),
-                "task_type": task.task_type,
-                "status": task.status,
-                "due_date": format_datetime(task.due_date),
-                "vehicle_details": task.vehicle_details,
-                "vehicle_model": task.vehicle_model,
-                "vehicle_year": task.vehicle_year,
-                "vehicle_color": task.vehicle_color,
-                "customer_name": task.customer_name,
-                "address": task.address,
-                "priority": task.priority,
-                "location": task.location,
-                "percentage_completed": task.percentage_completed,
-                "task_assign_time": format_datetime(task.task_assign_time),
-                "task_start_time": format_datetime(task.task_start_time),
-                "task_completed_date": format_datetime(task.task_completed_date),
-                "description": task.description,
-                "task_notes": task.task_notes,
-                "icon_type": task.icon_type,
-                "is_nothing_task": task.is_nothing_task,
-            }
-            
-            # Prepare service dax object with all fields properly serialized
-            service_dax_data = {
-                "id": str(service_dax.id),
-                "task": task_data,
-                "detailing_site": service_dax.detailing_site,
-                "detailing_site_display": service_dax.get_detailing_site_display(),
-                "other_site_name": service_dax.other_site_name,
-                "service_type": service_dax.service_type,
-                "service_type_display": service_dax.get_service_type_display(),
-                "tinting_type": service_dax.tinting_type,
-                "tinting_percentage": service_dax.tinting_percentage,
-                "tinting_custom_text": service_dax.tinting_custom_text,
-                "coating_layers": service_dax.coating_layers or [],
-                "coating_layers_display": service_dax.get_coating_layers_display(),
-                "ppf_type": service_dax.ppf_type,
-                "ppf_custom_text": service_dax.ppf_custom_text,
-                "remarks": service_dax.remarks,
-                "chassis_no": service_dax.chassis_no,
-                "vehicle_make_model": vehicle_make_model,
-                "invoice_status": service_dax.invoice_status,
-                "invoice_status_display": service_dax.get_invoice_status_display() if service_dax.invoice_status else None,
-                "invoice_pri_image": request.build_absolute_uri(service_dax.invoice_pri_image.url) if service_dax.invoice_pri_image else None,
-                "vehicle_progress_image": progress_images,
-                "work_location": service_dax.work_location,
-                "shared_staff_details": service_dax.shared_staff_details,
-                "created_at": format_datetime(service_dax.created_at),
-                "updated_at": format_datetime(service_dax.updated_at)
-            }
+            service_dax_data = DAX_TASK_DETAIL_ENCODER.bind(request)(service_dax)
             
             return Response({
                 'success': True,
@@ -244,6 +176,7 @@ class TaskDetailView(APIView):
         
 
 class StartTaskAPIView(APIView):
+    @idempotent
     def post(self, request, task_id):
         try:
             task = Task.objects.get(id=task_id)
@@ -310,6 +243,7 @@ class StartTaskDetailsAPIView(APIView):
 
 
 class SaveTaskProgressAPIView(APIView):
+    @idempotent
     def post(self, request, task_id):
         try:
             task = Task.objects.get(id=task_id)
@@ -323,39 +257,16 @@ class SaveTaskProgressAPIView(APIView):
             
             data = serializer.validated_data
             
-            # Update duty completion status
-            all_duties_completed = self._update_duties(task, data['duty_list'])
-            
-            # Save progress image if provided
-            if data.get('image'):
-                TaskProgressImage.objects.create(
-                    task=task,
-                    image=data['image'],
-                    percentage_completed=data['percentage']
-                )
-            
-            # Update task progress
-            task.percentage_completed = data['percentage']
-            task.task_notes = data.get('progress_notes', '') or task.task_notes
-            
-            # Check if all duties are completed
-            if all_duties_completed:
-                task.status = 'completed'
-                task.task_completed_date = timezone.now()
-                task.task_notes = data.get('final_notes', '') or task.task_notes
-                task.save()
-                
+            # Duties, progress image and task are committed together
+            if save_progress(task, data):
                 return Response(
                     {"message": "task completed"},
                     status=status.HTTP_200_OK
                 )
-            else:
-                task.save()
-                
-                return Response(
-                    {"message": "saved progress"},
-                    status=status.HTTP_200_OK
-                )
+            return Response(
+                {"message": "saved progress"},
+                status=status.HTTP_200_OK
+            )
             
         except Task.DoesNotExist:
             return Response(
@@ -367,74 +278,108 @@ class SaveTaskProgressAPIView(APIView):
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _update_duties(self, task, duty_list):
-        """
-        Update duty completion status and return True if all duties are completed
-        """
-        all_completed = True
-        
-        for duty_data in duty_list:
-            try:
-                duty_id = duty_data.get('id')
-                is_completed = duty_data.get('is_completed', False)
-                
-                if duty_id:
-                    task_duty = TaskDuty.objects.get(id=duty_id, task=task)
-                    task_duty.is_completed = is_completed
-                    
-                    # Set completion time if duty is being marked as completed
-                    if is_completed and not task_duty.completed_at:
-                        task_duty.completed_at = timezone.now()
-                    elif not is_completed:
-                        task_duty.completed_at = None
-                    
-                    task_duty.save()
-                    
-                    # Check if this duty is completed
-                    if not is_completed:
-                        all_completed = False
-                        
-            except TaskDuty.DoesNotExist:
-                continue
-            except Exception as e:
-                # Log error but continue with other duties
-                print(f"Error updating duty {duty_id}: {str(e)}")
-                all_completed = False
-        
-        return all_completed
-    
 
 
+class SaveTaskProgressBatchAPIView(APIView):
+    """
+    Progress for several of the user's tasks in one request, for technicians
+    syncing after being offline. All tasks are saved or none are.
+
+    JSON body: {"tasks": [{"task_id": 1, "duty_list": [...], "percentage": 50, ...}]}
+    Multipart: "tasks" holds that list as a JSON string, and each task's
+    progress image is sent as the file "image_<task_id>".
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @idempotent
+    def post(self, request):
+        try:
+            items = self._items(request)
+        except ValueError:
+            return Response(
+                {"error": {"tasks": ["Must be a JSON list."]}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = SaveProgressBatchSerializer(data={"tasks": items})
+        if not serializer.is_valid():
+            return Response(
+                {"error": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            results = save_progress_batch(request.user, serializer.validated_data['tasks'])
+        except Task.DoesNotExist as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response({
+            "message": "saved progress",
+            "results": [
+                {"task_id": task_id, "message": "task completed" if completed else "saved progress"}
+                for task_id, completed in results
+            ]
+        }, status=status.HTTP_200_OK)
+
+    def _items(self, request):
+        # A top-level list (or any other non-object body) has no "tasks" key
+        if not isinstance(request.data, dict):
+            raise ValueError("body must be an object")
+        items = request.data.get('tasks')
+        if isinstance(items, str):
+            items = json.loads(items)
+        if not isinstance(items, list):
+            raise ValueError("tasks must be a list")
+        for item in items:
+            if isinstance(item, dict):
+                image = request.FILES.get(f"image_{item.get('task_id')}")
+                if image:
+                    item['image'] = image
+        return items
+
 
 class PendingTasksAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+
+    def _get_pending_tasks(self, request):
+        """Unfinished tasks assigned up to today with the query param filters applied"""
+        today = timezone.now().date()
+        pending_tasks = Task.objects.filter(
+            employee=request.user,
+            status__in=['not_started', 'paused', 'in_progress', 'on_hold'],
+            task_assign_time__date__lte=today  
+        ).exclude(
+            status__in=['completed', 'delivered', 'returned']
+        ).order_by('task_assign_time')
+
+        status_filter = request.query_params.get('status')
+        task_type_filter = request.query_params.get('task_type')
+        icon_type_filter = request.query_params.get('icon_type')
+        
+        if status_filter:
+            pending_tasks = pending_tasks.filter(status=status_filter)
+        if task_type_filter:
+            pending_tasks = pending_tasks.filter(task_type=task_type_filter)
+        if icon_type_filter:
+            pending_tasks = pending_tasks.filter(icon_type=icon_type_filter)
+
+        return pending_tasks
+
+    def _validator(self, request):
+        return queryset_fingerprint(self._get_pending_tasks(request))
     
+    @conditional_get(_validator)
     def get(self, request):
         try:
-            user = request.user
-            today = timezone.now().date()
-            
-           
-            pending_tasks = Task.objects.filter(
-                employee=user,
-                status__in=['not_started', 'paused', 'in_progress', 'on_hold'],
-                task_assign_time__date__lte=today  
-            ).exclude(
-                status__in=['completed', 'delivered', 'returned']
-            ).order_by('task_assign_time')
-
-
-            status_filter = request.query_params.get('status')
-            task_type_filter = request.query_params.get('task_type')
-            icon_type_filter = request.query_params.get('icon_type')
-            
-            if status_filter:
-                pending_tasks = pending_tasks.filter(status=status_filter)
-            if task_type_filter:
-                pending_tasks = pending_tasks.filter(task_type=task_type_filter)
-            if icon_type_filter:
-                pending_tasks = pending_tasks.filter(icon_type=icon_type_filter)
+            pending_tasks = self._get_pending_tasks(request)
             
             pending_task_list = pending_tasks.filter(
                 Q(status='in_progress') | Q(percentage_completed__gt=0)
@@ -507,100 +452,31 @@ class ServiceTaskDAXListView(APIView):
                 # Assuming date_filter is in YYYY-MM-DD format
                 queryset = queryset.filter(task__due_date__date=date_filter)
             
-            # Order by creation date (newest first)
-            queryset = queryset.order_by('-created_at')
+            # One page, ordered by creation date (newest first)
+            paginator = KeysetPagination()
+            queryset = paginator.paginate_queryset(queryset, request, view=self)
             
             # Prepare response data
-            data = []
-            for service_dax in queryset:
-                task = service_dax.task
-                
-                # Get progress images for this task
-                progress_images = []
-                for img in task.progress_images.all():
-                    progress_images.append({
-                        "image": request.build_absolute_uri(img.image.url) if img.image else None,
-                        "date": img.created_at.isoformat() if img.created_at else None
-                    })
-                
-                # Get vehicle make/model from vehicle_details if available
-                vehicle_make_model = None
-                if task.vehicle_details:
-                    try:
-                        # Assuming vehicle_details might contain make/model info
-                        # You might need to parse this differently based on your actual data structure
-                        details = task.vehicle_details.split(',')
-                        if len(details) >= 1:
-                            vehicle_make_model = details[0].strip()
-                    except:
-                        pass
-                
-                # Format due_date if exists
-                due_date = None
-                if task.due_date:
-                    due_date = task.due_date.isoformat()
-                
-                # Prepare task object
-                task_data = {
-                    "task_type": task.task_type,
-                    "status": task.status,
-                    "due_date": due_date,
-                    "vehicle_details": task.vehicle_details,
-                    "vehicle_model": task.vehicle_model,
-                    "vehicle_year": task.vehicle_year,
-                    "vehicle_color": task.vehicle_color,
-                    "customer_name": task.customer_name,
-                    "address": task.address,
-                    "priority": task.priority,
-                    "location": task.location,
-                    "percentage_completed": task.percentage_completed,
-                    "task_assign_time": task.task_assign_time.isoformat() if task.task_assign_time else None,
-                    "task_start_time": task.task_start_time.isoformat() if task.task_start_time else None,
-                    "task_completed_date": task.task_completed_date.isoformat() if task.task_completed_date else None,
-                    "description": task.description,
-                    "task_notes": task.task_notes,
-                    "icon_type": task.icon_type,
-                    "is_nothing_task": task.is_nothing_task,
-                }
-                
-                
-                # Prepare service dax object
-                service_dax_data = {
-                    "id": service_dax.id,
-                    "task": task_data,
-                    "detailing_site": service_dax.detailing_site,
-                    "other_site_name": service_dax.other_site_name,
-                    "service_type": service_dax.service_type,
-                    "tinting_type": service_dax.tinting_type,
-                    "tinting_percentage": service_dax.tinting_percentage,
-                    "tinting_custom_text": service_dax.tinting_custom_text,
-                    "coating_layers": service_dax.coating_layers or [],
-                    "ppf_type": service_dax.ppf_type,
-                    "ppf_custom_text": service_dax.ppf_custom_text,
-                    "remarks": service_dax.remarks,
-                    "chassis_no": service_dax.chassis_no,
-                    "vehicle_make_model": vehicle_make_model,
-                    "invoice_status": service_dax.invoice_status,
-                    "invoice_pri_image": request.build_absolute_uri(service_dax.invoice_pri_image.url) if service_dax.invoice_pri_image else None,
-                    "vehicle_progress_image": progress_images,
-                    "work_location": service_dax.work_location,
-                    "shared_staff_details": service_dax.shared_staff_details,
-                    "created_at": service_dax.created_at.isoformat() if service_dax.created_at else None,
-                    "updated_at": service_dax.updated_at.isoformat() if service_dax.updated_at else None
-                }
-                
-                data.append(service_dax_data)
+            data = DAX_LIST_ENCODER.encode_many(queryset, request)
             
             # Prepare final response
             response = {
                 "status": "success",
                 "data": data,
                 "count": len(data),
+                "next": paginator.get_next_link(),
                 "message": "Service tasks retrieved successfully"
             }
             
             return Response(response, status=status.HTTP_200_OK)
             
+        except NotFound as e:
+            return Response({
+                "status": "error",
+                "message": str(e.detail),
+                "data": [],
+                "count": 0
+            }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({
                 "status": "error",
@@ -623,89 +499,7 @@ class ServiceTaskDAXDetailView(APIView):
                 'task__progress_images'
             ).get(id=pk)
             
-            task = service_dax.task
-            
-            # Get progress images for this task
-            progress_images = []
-            for img in task.progress_images.all():
-                progress_images.append({
-                    "image": request.build_absolute_uri(img.image.url) if img.image else None,
-                    "date": img.created_at.isoformat() if img.created_at else None
-                })
-            
-            vehicle_make_model = None
-            if task.vehicle_details:
-                try:
-                    details = task.vehicle_details.split(',')
-                    if len(details) >= 1:
-                        vehicle_make_model = details[0].strip()
-                except:
-                    pass
-            
-            # Format due_date if exists
-            due_date = None
-            if task.due_date:
-                due_date = task.due_date.isoformat()
-            
-            # Prepare task object
-            task_data = {
-                "task_type": task.task_type,
-                "status": task.status,
-                "due_date": due_date,
-                "vehicle_details": task.vehicle_details,
-                "vehicle_model": task.vehicle_model,
-                "vehicle_year": task.vehicle_year,
-                "vehicle_color": task.vehicle_color,
-                "customer_name": task.customer_name,
-                "address": task.address,
-                "priority": task.priority,
-                "location": task.location,
-                "percentage_completed": task.percentage_completed,
-                "heading": task.heading,
-                "employee_id": task.employee.employeeId if task.employee else None,
-                "task_assign_time": task.task_assign_time.isoformat() if task.task_assign_time else None,
-                "task_start_time": task.task_start_time.isoformat() if task.task_start_time else None,
-                "task_completed_date": task.task_completed_date.isoformat() if task.task_completed_date else None,
-                "description": task.description,
-                "task_notes": task.task_notes,
-                "icon_type": task.icon_type,
-                "is_nothing_task": task.is_nothing_task,
-                "created_at": task.created_at.isoformat() if task.created_at else None,
-                "updated_at": task.updated_at.isoformat() if task.updated_at else None
-            }
-            
-            # Get display values for choices
-            detailing_site_display = service_dax.get_detailing_site_display()
-            service_type_display = dict(ServiceTaskDax.SERVICES_CHOICES).get(service_dax.service_type, service_dax.service_type)
-            coating_layers_display = service_dax.get_coating_layers_display()
-            
-            # Prepare service dax object
-            data = {
-                "id": service_dax.id,
-                "task": task_data,
-                "detailing_site": service_dax.detailing_site,
-                "detailing_site_display": detailing_site_display,
-                "other_site_name": service_dax.other_site_name,
-                "service_type": service_dax.service_type,
-                "service_type_display": service_type_display,
-                "tinting_type": service_dax.tinting_type,
-                "tinting_percentage": service_dax.tinting_percentage,
-                "tinting_custom_text": service_dax.tinting_custom_text,
-                "coating_layers": service_dax.coating_layers or [],
-                "coating_layers_display": coating_layers_display,
-                "ppf_type": service_dax.ppf_type,
-                "ppf_custom_text": service_dax.ppf_custom_text,
-                "remarks": service_dax.remarks,
-                "chassis_no": service_dax.chassis_no,
-                "vehicle_make_model": vehicle_make_model,
-                "invoice_status": service_dax.invoice_status,
-                "invoice_pri_image": request.build_absolute_uri(service_dax.invoice_pri_image.url) if service_dax.invoice_pri_image else None,
-                "vehicle_progress_image": progress_images,
-                "work_location": service_dax.work_location,
-                "shared_staff_details": service_dax.shared_staff_details,
-                "created_at": service_dax.created_at.isoformat() if service_dax.created_at else None,
-                "updated_at": service_dax.updated_at.isoformat() if service_dax.updated_at else None
-            }
+            data = DAX_DETAIL_ENCODER.bind(request)(service_dax)
             
             response = {
                 "status": "success",
@@ -728,3 +522,41 @@ class ServiceTaskDAXDetailView(APIView):
                 "message": str(e),
                 "data": {}
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+from django.http import StreamingHttpResponse
+from .exports import EXPORT_CONTENT_TYPES, EXPORT_FORMATS, ExportFilterError, export_queryset, iter_export
+
+
+class ServiceTaskDAXExportView(APIView):
+    """
+    Streams every DAX service record matching the filters as NDJSON (default)
+    or CSV. ?output=csv picks the format; DRF reserves ?format= for renderers.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                "status": "error",
+                "message": f"output must be one of: {', '.join(EXPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            queryset = export_queryset(request.query_params)
+        except ExportFilterError as e:
+            return Response({
+                "status": "error",
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            iter_export(queryset, export_format, request),
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
+        filename = f"dax-services-{timezone.localdate().isoformat()}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # Tell nginx not to buffer the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,17 @@
+import os
+
+from jobs.queue import job
+from .models import UploadSession
+
+
+@job('uploads.expire')
+def expire_session(session_id):
+    """Drop a session UPLOAD_SESSION_TTL after it was created, with any part file left behind"""
+    session = UploadSession.objects.filter(pk=session_id).first()
+    if session is None:
+        return
+    try:
+        os.remove(session.part_path)
+    except FileNotFoundError:
+        pass
+    session.delete()
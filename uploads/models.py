@@ -0,0 +1,45 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+from authapp.models import Employee
+
+
+class UploadSession(models.Model):
+    """
+    A file being uploaded in chunks (see uploads.views). The bytes received
+    so far are kept in a part file under UPLOAD_SESSION_ROOT; offset counts
+    them. Completing the session turns the part file into the target's file.
+    """
+    TARGET_CHOICES = [
+        ('document', 'Visa Document'),
+        ('leave_attachment', 'Leave Attachment'),
+        ('progress_image', 'Task Progress Image'),
+    ]
+
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('complete', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='upload_sessions')
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    # Where the file goes: document_type, leave_id or task_id
+    params = models.JSONField(default=dict)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    result = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.employee.employeeId} - {self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def part_path(self):
+        return os.path.join(settings.UPLOAD_SESSION_ROOT, f'{self.id}.part')
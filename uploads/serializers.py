@@ -0,0 +1,24 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from .models import UploadSession
+from .targets import TARGETS
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    target = serializers.ChoiceField(choices=UploadSession.TARGET_CHOICES)
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1, max_value=settings.UPLOAD_SESSION_MAX_SIZE)
+    document_type = serializers.CharField(required=False)
+    leave_id = serializers.IntegerField(required=False)
+    task_id = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        attrs['params'] = TARGETS[attrs['target']].prepare(self.context['employee'], attrs)
+        return attrs
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'target', 'filename', 'size', 'offset', 'status', 'result', 'created_at']
@@ -0,0 +1,110 @@
+"""
+What a completed upload session becomes.
+
+Each target checks the session's parameters when it is created, so a
+client learns about a wrong task or an oversized attachment before sending
+any bytes, and turns the assembled file into its record on completion
+with the same serializer validation as the multipart endpoints.
+"""
+import mimetypes
+from types import SimpleNamespace
+
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework import serializers
+
+from home.models import Leave
+from home.serializers import LeaveCreateSerializer
+from profileapp.models import Document, VisaDetails
+from profileapp.serializers import DocumentUpdateSerializer
+from task.models import Task, TaskProgressImage
+
+
+class SessionFile(UploadedFile):
+    """
+    A session's assembled part file. Having a temporary_file_path lets the
+    storage move it into place instead of copying it.
+    """
+
+    def __init__(self, session):
+        super().__init__(
+            file=open(session.part_path, 'rb'),
+            name=session.filename,
+            content_type=mimetypes.guess_type(session.filename)[0],
+            size=session.size,
+        )
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def _declared(data):
+    # Stands in for the file in size and extension checks made before upload
+    return SimpleNamespace(name=data['filename'], size=data['size'])
+
+
+class DocumentTarget:
+    """Replaces the employee's visa document of document_type"""
+
+    def prepare(self, employee, data):
+        document_types = dict(Document.DOCUMENT_TYPES)
+        if data.get('document_type') not in document_types:
+            raise serializers.ValidationError({'document_type': ["Choose one of: " + ', '.join(document_types)]})
+        return {'document_type': data['document_type']}
+
+    def finalize(self, session, file):
+        visa_details, _ = VisaDetails.objects.get_or_create(employee=session.employee)
+        serializer = DocumentUpdateSerializer(
+            data={'document_type': session.params['document_type'], 'document_file': file},
+            context={'visa_details': visa_details}
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+
+class LeaveAttachmentTarget:
+    """The attachment of one of the employee's pending leave applications"""
+
+    def prepare(self, employee, data):
+        if not Leave.objects.filter(id=data.get('leave_id'), employee=employee, status='pending').exists():
+            raise serializers.ValidationError({'leave_id': ["No pending leave application with this id"]})
+        try:
+            LeaveCreateSerializer().validate_attachment(_declared(data))
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError({'filename': e.detail})
+        return {'leave_id': data['leave_id']}
+
+    def finalize(self, session, file):
+        leave = Leave.objects.select_for_update().filter(
+            id=session.params['leave_id'], employee=session.employee, status='pending'
+        ).first()
+        if leave is None:
+            raise serializers.ValidationError({'leave_id': ["The leave application is no longer pending"]})
+        serializer = LeaveCreateSerializer(leave, data={'attachment': file}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        leave = serializer.save()
+        return {'leave_id': leave.id, 'attachment': leave.attachment.url}
+
+
+class ProgressImageFileSerializer(serializers.Serializer):
+    image = serializers.ImageField()
+
+
+class ProgressImageTarget:
+    """A progress photo on one of the employee's tasks"""
+
+    def prepare(self, employee, data):
+        if not Task.objects.filter(id=data.get('task_id'), employee=employee).exists():
+            raise serializers.ValidationError({'task_id': ["Task not found"]})
+        return {'task_id': data['task_id']}
+
+    def finalize(self, session, file):
+        ProgressImageFileSerializer(data={'image': file}).is_valid(raise_exception=True)
+        image = TaskProgressImage.objects.create(task_id=session.params['task_id'], image=file)
+        return {'id': image.id, 'task_id': image.task_id, 'image': image.image.url}
+
+
+TARGETS = {
+    'document': DocumentTarget(),
+    'leave_attachment': LeaveAttachmentTarget(),
+    'progress_image': ProgressImageTarget(),
+}
@@ -0,0 +1,176 @@
+"""
+Resumable uploads for large attachments over weak mobile links.
+
+    POST   /api/uploads/                 {"target", "filename", "size", and
+                                         "document_type", "leave_id" or "task_id"}
+    GET    /api/uploads/<id>/            how many bytes have arrived (Upload-Offset)
+    PUT    /api/uploads/<id>/            raw bytes, with an Upload-Offset header
+    POST   /api/uploads/<id>/complete/   turn the file into its Document,
+                                         leave attachment or progress image
+    DELETE /api/uploads/<id>/            give up on the upload
+
+A PUT must start at the session's current offset; a client that lost its
+connection asks GET for the offset and carries on from there. Each PUT is
+streamed straight into the session's part file, so neither a chunk nor the
+whole file is held in memory, and bytes that arrived before a dropped
+connection are kept. Sessions are removed UPLOAD_SESSION_TTL seconds after
+they are created, complete or not.
+"""
+import os
+
+from django.conf import settings
+from django.core.files import locks
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from jobs.queue import enqueue
+from .models import UploadSession
+from .serializers import UploadSessionCreateSerializer, UploadSessionSerializer
+from .targets import TARGETS, SessionFile
+
+OFFSET_HEADER = 'Upload-Offset'
+READ_SIZE = 64 * 1024
+
+
+def _session_response(session, status_code=status.HTTP_200_OK):
+    response = Response(UploadSessionSerializer(session).data, status=status_code)
+    response[OFFSET_HEADER] = str(session.offset)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def _offset_conflict(session, message):
+    response = Response({"error": message, "offset": session.offset}, status=status.HTTP_409_CONFLICT)
+    response[OFFSET_HEADER] = str(session.offset)
+    return response
+
+
+def _remove_part(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class UploadSessionCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = UploadSessionCreateSerializer(data=request.data, context={'employee': request.user})
+        if not serializer.is_valid():
+            return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        os.makedirs(settings.UPLOAD_SESSION_ROOT, exist_ok=True)
+        with transaction.atomic():
+            session = UploadSession.objects.create(
+                employee=request.user,
+                target=data['target'],
+                params=data['params'],
+                filename=os.path.basename(data['filename']),
+                size=data['size'],
+            )
+            enqueue('uploads.expire', {'session_id': str(session.id)}, delay=settings.UPLOAD_SESSION_TTL)
+        return _session_response(session, status.HTTP_201_CREATED)
+
+
+class UploadSessionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, session_id):
+        session = get_object_or_404(UploadSession, pk=session_id, employee=request.user)
+        return _session_response(session)
+
+    def put(self, request, session_id):
+        session = get_object_or_404(UploadSession, pk=session_id, employee=request.user)
+        if session.status != 'open':
+            return _offset_conflict(session, "The upload is already complete")
+        try:
+            offset = int(request.headers[OFFSET_HEADER])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response(
+                {"error": f"{OFFSET_HEADER} and Content-Length headers are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if length < 0 or offset + length > session.size:
+            return Response(
+                {"error": f"The chunk ends past the declared size of {session.size} bytes"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fd = os.open(session.part_path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+b') as part:
+            # One writer per session; a second PUT racing the first is turned away
+            if not locks.lock(part, locks.LOCK_EX | locks.LOCK_NB):
+                return _offset_conflict(session, "Another chunk of this upload is being written")
+            try:
+                session.refresh_from_db(fields=['offset'])
+                if offset != session.offset:
+                    return _offset_conflict(session, f"Expected {OFFSET_HEADER} {session.offset}")
+
+                part.seek(offset)
+                written = 0
+                try:
+                    while written < length:
+                        chunk = request.stream.read(min(READ_SIZE, length - written))
+                        if not chunk:
+                            break
+                        part.write(chunk)
+                        written += len(chunk)
+                finally:
+                    # Whatever arrived is kept, even if the connection dropped
+                    part.flush()
+                    session.offset = offset + written
+                    UploadSession.objects.filter(pk=session.pk, offset=offset).update(
+                        offset=session.offset, updated_at=timezone.now()
+                    )
+            finally:
+                locks.unlock(part)
+
+        if written < length:
+            return _offset_conflict(session, "The chunk ended early")
+        return _session_response(session)
+
+    def delete(self, request, session_id):
+        session = get_object_or_404(UploadSession, pk=session_id, employee=request.user)
+        _remove_part(session.part_path)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        with transaction.atomic():
+            session = get_object_or_404(
+                UploadSession.objects.select_for_update(), pk=session_id, employee=request.user
+            )
+            # A retried completion gets the first one's result
+            if session.status == 'complete':
+                return _session_response(session)
+            if session.offset != session.size:
+                return _offset_conflict(session, f"{session.size - session.offset} bytes are still missing")
+
+            # Drop bytes past the size left by a write that failed midway
+            os.truncate(session.part_path, session.size)
+            file = SessionFile(session)
+            try:
+                session.result = TARGETS[session.target].finalize(session, file)
+            except serializers.ValidationError as e:
+                transaction.set_rollback(True)
+                return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+            finally:
+                file.close()
+            session.status = 'complete'
+            session.save(update_fields=['status', 'result', 'updated_at'])
+            # The storage normally moves the part file away; remove it if it copied
+            part_path = session.part_path
+            transaction.on_commit(lambda: _remove_part(part_path))
+        return _session_response(session, status.HTTP_201_CREATED)